@@ -11,14 +11,39 @@ Plant recommendation module (production version).
 """
 
 import json
+import numbers
+import os
 import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.pipeline import make_pipeline
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import FunctionTransformer, normalize
+
+# --- Pomiar etapów (opcjonalny) ---
+# Serwis może podpiąć np. metrics.span z backend_app: set_stage_timer(metrics.span).
+# Domyślnie nic nie mierzymy, więc moduł działa też samodzielnie.
+_stage_timer = None
+
+
+def set_stage_timer(timer) -> None:
+    """timer(stage_name) -> context manager mierzący dany etap (None = wyłączone)."""
+    global _stage_timer
+    _stage_timer = timer
+
+
+def _stage(name: str):
+    return _stage_timer(name) if _stage_timer is not None else nullcontext()
+
 
 # --- NLTK preprocessing ---
 import nltk
@@ -44,6 +69,7 @@ def ensure_nltk_resources():
 
 PROCESSING_OPTS = {
     "use_stemmer": "porter",  # w produkcji zawsze Porter, do stestów mamy inne opcje
+    "tokenizer": "nltk",  # "nltk" (word_tokenize) albo "regex" (przybliżenie nltk: szybszy, nie potrzebuje punkt)
     "lowercase": True,
     "min_df": 1,
     "max_df": 0.95,
@@ -51,12 +77,43 @@ PROCESSING_OPTS = {
     "stop_words": "english",
 }
 
+# Tokeny czysto alfabetyczne - przybliżenie word_tokenize + isalpha(), nie jego odpowiednik:
+#  - litera nie może sąsiadować z cyfrą/"_"/"-"/"/"/"°" ani kropką w środku słowa ("well-known", "3pm", "a/b", "www.x.com"),
+#  - końcówki po ASCII apostrofie odpadają ("'s", "'re"), a "don't" daje "do" (nltk tnie na "do" + "n't"),
+#  - "--" rozdziela słowa ("well--known" -> "well", "known"), "’" też ("don’t" -> "don", "t"), jak w nltk.
+# Zostają różnice (vocabulary Jaccard ~0.998 na plant_articles.json, benchmarks/bench_preprocessing.py):
+# nltk rozbija "cannot"/"gotta", skleja słowo z "™", "…" czy "\u200b", a kropkę zostawia przy słowie
+# zależnie od podziału na zdania z punkt - regex tego nie odtwarza.
+_ALPHA_TOKEN_RE = re.compile(
+    r"(?<![\w/°-])(?<!\w[.'])"
+    r"(?:[^\W\d_]+?(?=n't(?![\w/-]))|[^\W\d_]+(?![\w/-]|\.\w))"
+)
+
+_STEMMER = None
+
 
 def get_stemmer():
-    if PROCESSING_OPTS["use_stemmer"] == "porter":
-        return PorterStemmer()
-    else:
+    # jeden stemmer na proces zamiast nowego obiektu dla każdego dokumentu
+    global _STEMMER
+    if PROCESSING_OPTS["use_stemmer"] != "porter":
         return None
+    if _STEMMER is None:
+        _STEMMER = PorterStemmer()
+    return _STEMMER
+
+
+@lru_cache(maxsize=200_000)
+def stem_cached(word: str) -> str:
+    """Porter stem z pamięcią podręczną – słownik jest malutki w porównaniu do liczby tokenów."""
+    return get_stemmer().stem(word)
+
+
+def tokenize(txt: str) -> List[str]:
+    """Zwraca tylko tokeny alfabetyczne, tokenizerem wybranym w PROCESSING_OPTS["tokenizer"]."""
+    if PROCESSING_OPTS["tokenizer"] == "regex":
+        # "--" nltk rozsuwa spacjami, zanim cokolwiek spojrzy na łączniki; isalpha() odrzuca "½" i podobne (\w, ale nie litery)
+        return [t for t in _ALPHA_TOKEN_RE.findall(txt.replace("--", " -- ")) if t.isalpha()]
+    return [t for t in word_tokenize(txt) if t.isalpha()]
 
 
 def preprocess_text(doc: str) -> str:
@@ -64,17 +121,43 @@ def preprocess_text(doc: str) -> str:
     if not isinstance(doc, str):
         return ""
     txt = doc.lower() if PROCESSING_OPTS["lowercase"] else doc
-    tokens = word_tokenize(txt)
-    stemmer = get_stemmer()
-    processed = []
-    for t in tokens:
-        if not t.isalpha():
-            continue
-        w = t
-        if stemmer:
-            w = stemmer.stem(w)
-        processed.append(w)
-    return " ".join(processed)
+    tokens = tokenize(txt)
+    if get_stemmer() is None:
+        return " ".join(tokens)
+    return " ".join([stem_cached(t) for t in tokens])
+
+
+# --- Budowanie równoległe (duże korpusy) ---
+# Funkcje *_chunk muszą być na poziomie modułu, żeby dało się je przesłać do procesów w puli.
+# PROCESSING_OPTS przekazujemy jawnie, bo przy "spawn" (Windows) worker importuje moduł od nowa.
+
+def _resolve_n_jobs(n_jobs: Optional[int]) -> int:
+    if n_jobs is None or n_jobs <= 0:
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+def _chunked(items: list, size: int) -> List[list]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _map_chunks(fn, chunks: List[tuple], n_jobs: int) -> list:
+    if n_jobs == 1 or len(chunks) <= 1:
+        return [fn(c) for c in chunks]
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks))) as pool:
+        return list(pool.map(fn, chunks))
+
+
+def _preprocess_chunk(args) -> List[str]:
+    docs, opts = args
+    PROCESSING_OPTS.update(opts)
+    return [preprocess_text(d) for d in docs]
+
+
+def _hash_chunk(args):
+    docs, opts, hashing_params = args
+    PROCESSING_OPTS.update(opts)
+    return HashingVectorizer(**hashing_params).transform([preprocess_text(d) for d in docs])
 
 
 # ======================================================================
@@ -91,26 +174,96 @@ def load_and_aggregate_json(path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
     with open(path, "r", encoding="utf-8") as f:
         js = json.load(f)
     df_raw = pd.DataFrame(js)
+    return df_raw, aggregate_articles(df_raw)
+
+
+def aggregate_articles(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Jeden wiersz na roślinę (posortowane po plant_name): treści artykułów sklejone '\\n'."""
     if "plant_name" not in df_raw.columns or "content" not in df_raw.columns:
         raise ValueError("Brak wymaganych kolumn 'plant_name' i 'content'")
-    df_agg = (
+    return (
         df_raw.groupby("plant_name", as_index=False)
         .agg({"content": lambda s: "\n".join([x for x in s if isinstance(x, str)])})
     )
-    return df_raw, df_agg
 
 
 # ======================================================================
 # 3. TF-IDF i podobieństwo tekstowe
 # ======================================================================
 
-def build_tfidf_matrix(df_agg: pd.DataFrame):
+def _df_keep_mask(df: np.ndarray, n_docs: int, min_df, max_df) -> np.ndarray:
+    """Kolumny, które TfidfVectorizer by zostawił: min_df <= df <= max_df (int = liczba dokumentów, float = udział)."""
+    max_count = max_df if isinstance(max_df, numbers.Integral) else max_df * n_docs
+    min_count = min_df if isinstance(min_df, numbers.Integral) else min_df * n_docs
+    return (df >= max(min_count, 1)) & (df <= max_count)
+
+
+def _mask_columns(counts, keep: np.ndarray):
+    """Zeruje kolumny spoza keep (termy przycięte przez min_df/max_df w ścieżce hashującej)."""
+    counts = sp.csr_matrix(counts, copy=True)
+    counts.data[~keep[counts.indices]] = 0
+    counts.eliminate_zeros()
+    return counts
+
+
+def build_tfidf_matrix(
+    df_agg: pd.DataFrame,
+    n_jobs: int = 1,
+    use_hashing: bool = False,
+    n_features: int = 2 ** 20,
+    chunk_size: int = 256,
+):
     """
     Buduje tf-idf dla kolumny 'content'.
+    n_jobs != 1 -> preprocessing (tokenizacja + stemming) liczony w puli procesów, po chunk_size dokumentów.
+    use_hashing -> HashingVectorizer + TfidfTransformer zamiast słownika w pamięci (pamięć ograniczona
+    przez n_features, bez możliwości odczytania termów z kolumn). min_df/max_df liczone po kolumnach
+    hashy: kolumny poza zakresem są zerowane przed TfidfTransformer, jak przycinanie słownika.
     Zwraca:
         vectorizer, matrix (scipy sparse), plant_names (lista nazw roślin)
     """
-    vectorizer = TfidfVectorizer(
+    docs = df_agg["content"].fillna("").tolist()
+    plant_names = df_agg["plant_name"].tolist()
+    n_jobs = _resolve_n_jobs(n_jobs)
+    opts = dict(PROCESSING_OPTS)
+
+    if use_hashing:
+        hashing_params = dict(
+            n_features=n_features,
+            lowercase=False,
+            ngram_range=PROCESSING_OPTS["ngram_range"],
+            stop_words=PROCESSING_OPTS["stop_words"],
+            alternate_sign=False,
+            norm=None,
+        )
+        parts = _map_chunks(_hash_chunk, [(c, opts, hashing_params) for c in _chunked(docs, chunk_size)], n_jobs)
+        counts = sp.vstack(parts).tocsr() if parts else sp.csr_matrix((0, n_features))
+        # bez tego termy z prawie każdego dokumentu (boilerplate) dominują podobieństwo
+        df = np.bincount(counts.indices, minlength=n_features)
+        mask = FunctionTransformer(_mask_columns, kw_args={
+            "keep": _df_keep_mask(df, counts.shape[0], PROCESSING_OPTS["min_df"], PROCESSING_OPTS["max_df"]),
+        }, accept_sparse=True)
+        transformer = TfidfTransformer()
+        matrix = transformer.fit_transform(mask.fit_transform(counts))
+        # ten sam obiekt co w ścieżce standardowej: transform(surowy tekst) -> tf-idf
+        vectorizer = make_pipeline(HashingVectorizer(preprocessor=preprocess_text, **hashing_params), mask, transformer)
+        return vectorizer, matrix, plant_names
+
+    vectorizer = _make_tfidf_vectorizer()
+    if n_jobs == 1:
+        matrix = vectorizer.fit_transform(docs)
+        return vectorizer, matrix, plant_names
+
+    # tekst jest już po preprocessingu (stemming nie jest idempotentny), więc fitujemy bez preprocessora
+    # i przywracamy go po fit, żeby vectorizer.transform(surowy tekst) działał jak w ścieżce szeregowej
+    vectorizer.set_params(preprocessor=lambda d: d)
+    matrix = vectorizer.fit_transform(_preprocess_parallel(docs, n_jobs, chunk_size))
+    vectorizer.set_params(preprocessor=preprocess_text)
+    return vectorizer, matrix, plant_names
+
+
+def _make_tfidf_vectorizer(**overrides) -> TfidfVectorizer:
+    params = dict(
         preprocessor=preprocess_text,
         tokenizer=None,
         lowercase=False,
@@ -119,27 +272,305 @@ def build_tfidf_matrix(df_agg: pd.DataFrame):
         ngram_range=PROCESSING_OPTS["ngram_range"],
         stop_words=PROCESSING_OPTS["stop_words"],
     )
-    matrix = vectorizer.fit_transform(df_agg["content"].fillna(""))
-    plant_names = df_agg["plant_name"].tolist()
-    return vectorizer, matrix, plant_names
+    params.update(overrides)
+    return TfidfVectorizer(**params)
+
+
+def _preprocess_parallel(docs: List[str], n_jobs: int, chunk_size: int = 256) -> List[str]:
+    opts = dict(PROCESSING_OPTS)
+    return [
+        d
+        for part in _map_chunks(_preprocess_chunk, [(c, opts) for c in _chunked(docs, chunk_size)], n_jobs)
+        for d in part
+    ]
+
 
+# --- Przyrostowy tf-idf (PlantRecommender.add_articles) ---
 
-def get_centroid_vector(seed_plants: List[str], matrix, plant_names: List[str]):
+class TfidfState:
+    """
+    Surowe liczności n-gramów per roślina na pełnym słowniku (bez przycinania max_df; kolumny posortowane
+    alfabetycznie jak w sklearn) + document frequency. Dodanie artykułów liczy od nowa tylko wiersze
+    zmienionych roślin; tfidf() odtwarza z tego dokładnie TfidfVectorizer(...).fit_transform na wszystkich
+    dokumentach. IDF zależy od liczby dokumentów, więc przeważenie dotyka każdego wiersza, ale to jedno
+    wektorowe przejście po nnz - drogie są tokenizacja i stemming, a te robimy tylko dla nowych treści.
+    Obiekt jest niemutowalny: updated() zwraca nowy stan (stary model może dalej obsługiwać zapytania).
+    """
+
+    def __init__(self, terms: np.ndarray, counts: sp.csr_matrix, df: np.ndarray):
+        self.terms = terms  # tablica object z termami, posortowana
+        self.counts = counts  # rośliny x terms, int32
+        self.df = df  # liczba roślin zawierających term
+
+    @staticmethod
+    def _count(docs: List[str], n_jobs: int = 1) -> Tuple[np.ndarray, sp.csr_matrix]:
+        n_jobs = _resolve_n_jobs(n_jobs)
+        counter = CountVectorizer(
+            preprocessor=preprocess_text if n_jobs == 1 else (lambda d: d),
+            lowercase=False,
+            ngram_range=PROCESSING_OPTS["ngram_range"],
+            stop_words=PROCESSING_OPTS["stop_words"],
+        )
+        try:
+            counts = counter.fit_transform(docs if n_jobs == 1 else _preprocess_parallel(docs, n_jobs))
+        except ValueError:  # same puste dokumenty / same stop words -> pusty słownik
+            return np.array([], dtype=object), sp.csr_matrix((len(docs), 0), dtype=np.int32)
+        return counter.get_feature_names_out().astype(object), counts.tocsr().astype(np.int32)
+
+    @classmethod
+    def from_docs(cls, docs: List[str], n_jobs: int = 1) -> "TfidfState":
+        terms, counts = cls._count(docs, n_jobs)
+        return cls(terms, counts, np.bincount(counts.indices, minlength=len(terms)).astype(np.int64))
+
+    def updated(self, rows: List[int], changed_docs: List[str]) -> "TfidfState":
+        """
+        Nowy stan po zmianie dokumentów. rows[i] = wiersz starego stanu dla i-tego wiersza nowego stanu
+        albo -(j+1) dla changed_docs[j] (nowa roślina albo roślina z dopisanymi artykułami).
+        """
+        local_terms, local_counts = self._count(changed_docs)
+
+        # nowe termy wstawiamy w posortowany słownik; stare kolumny przesuwają się o liczbę wstawionych przed nimi
+        pos = np.searchsorted(self.terms, local_terms)
+        known = pos < len(self.terms)
+        known[known] = self.terms[pos[known]] == local_terms[known]
+        fresh = local_terms[~known]
+        insert_at = pos[~known]
+        terms = np.insert(self.terms, insert_at, fresh)
+        shift = np.arange(len(self.terms)) + np.searchsorted(insert_at, np.arange(len(self.terms)), side="right")
+        old_counts = sp.csr_matrix(
+            (self.counts.data, shift[self.counts.indices], self.counts.indptr), shape=(self.counts.shape[0], len(terms))
+        )
+        # kolumny liczności nowych treści -> indeksy w scalonym słowniku (local_terms są posortowane)
+        local_to_global = np.searchsorted(terms, local_terms)
+        new_counts = sp.csr_matrix(
+            (local_counts.data, local_to_global[local_counts.indices], local_counts.indptr),
+            shape=(len(changed_docs), len(terms)),
+        )
+
+        rows = np.asarray(rows, dtype=np.int64)
+        stacked = sp.vstack([old_counts, new_counts], format="csr")
+        counts = stacked[np.where(rows >= 0, rows, self.counts.shape[0] - rows - 1)]
+        counts.sort_indices()
+
+        df = np.zeros(len(terms), dtype=np.int64)
+        df[shift] = self.df
+        dropped = np.setdiff1d(np.arange(self.counts.shape[0]), rows[rows >= 0])  # wiersze zastąpione nowymi
+        df -= np.bincount(old_counts[dropped].indices, minlength=len(terms))
+        df += np.bincount(new_counts.indices, minlength=len(terms))
+        return TfidfState(terms, counts, df)
+
+    def tfidf(self, min_df=None, max_df=None) -> Tuple[sp.csr_matrix, np.ndarray, np.ndarray]:
+        """(macierz tf-idf, termy po przycięciu min_df/max_df, idf) - jak TfidfVectorizer z PROCESSING_OPTS."""
+        min_df = PROCESSING_OPTS["min_df"] if min_df is None else min_df
+        max_df = PROCESSING_OPTS["max_df"] if max_df is None else max_df
+        n = self.counts.shape[0]
+        keep = np.flatnonzero(_df_keep_mask(self.df, n, min_df, max_df))
+        matrix = self.counts[:, keep].astype(np.float64)
+        # smooth_idf jak w sklearn: ln((1 + n) / (1 + df)) + 1
+        idf = np.log((n + 1) / (self.df[keep] + 1.0)) + 1
+        matrix.data *= idf[matrix.indices]
+        return normalize(matrix, norm="l2", copy=False), self.terms[keep], idf
+
+
+def compact_tfidf_matrix(matrix, top_n_terms: Optional[int] = None):
+    """
+    Reprezentacja do serwowania: float32 CSR, wiersze znormalizowane L2.
+    top_n_terms -> w każdym wierszu (roślinie) zostaje tylko N termów o najwyższej wadze.
+    """
+    matrix = sp.csr_matrix(matrix, dtype=np.float32, copy=True)
+    if top_n_terms is not None:
+        keep = np.zeros(matrix.nnz, dtype=bool)
+        for row in range(matrix.shape[0]):
+            start, end = matrix.indptr[row], matrix.indptr[row + 1]
+            if end - start <= top_n_terms:
+                keep[start:end] = True
+                continue
+            top = np.argpartition(matrix.data[start:end], -top_n_terms)[-top_n_terms:]
+            keep[start + top] = True
+        matrix.data[~keep] = 0.0
+        matrix.eliminate_zeros()
+    matrix = normalize(matrix, norm="l2", copy=False)
+    matrix.sort_indices()
+    return matrix
+
+
+# --- Rozpoznawanie nazw roślin z kolekcji użytkownika (seedy) ---
+# Seedy to nazwy nadane przez użytkownika albo plants.species - z literówkami ("peace lilly"),
+# innym zapisem ("Croton,") albo nazwą łacińską. PlantNameIndex budowany raz przy ładowaniu modelu:
+# dokładna nazwa -> alias -> krótszy prefiks nazwy ("monstera deliciosa thai" -> "monstera") ->
+# podobieństwo trigramów znakowych (Dice) do nazw i aliasów.
+
+# nazwa łacińska / potoczna -> nazwa z korpusu (po _normalize_name); używane tylko gdy cel jest w modelu
+PLANT_ALIASES = {
+    "spathiphyllum": "peace lily",
+    "sansevieria": "snake plant",
+    "sansevieria trifasciata": "snake plant",
+    "dracaena trifasciata": "snake plant",
+    "mother in law s tongue": "snake plant",
+    "epipremnum aureum": "pothos",
+    "devil s ivy": "pothos",
+    "zamioculcas zamiifolia": "zz plant",
+    "zamioculcas": "zz plant",
+    "zz": "zz plant",
+    "chlorophytum comosum": "spider plant",
+    "pilea peperomioides": "chinese money plant",
+    "pilea": "chinese money plant",
+    "ficus elastica": "rubber plant",
+    "crassula ovata": "jade plant",
+    "strelitzia reginae": "bird of paradise",
+    "strelitzia": "bird of paradise",
+    "hedera helix": "english ivy",
+    "maranta leuconeura": "prayer plant",
+    "maranta": "prayer plant",
+    "dypsis lutescens": "areca palm",
+    "aglaonema": "chinese evergreen",
+    "nephrolepis exaltata": "boston fern",
+    "codiaeum variegatum": "croton",
+    "senecio rowleyanus": "string of pearls",
+    "curio rowleyanus": "string of pearls",
+    "phalaenopsis": "orchid",
+    "ocimum basilicum": "basil",
+    "lavandula": "lavender",
+    "mentha": "mint",
+    "salvia rosmarinus": "rosemary",
+    "rosmarinus officinalis": "rosemary",
+    "matricaria chamomilla": "chamomile",
+    "aloe barbadensis": "aloe vera",
+    "goeppertia orbifolia": "calathea orbifolia",
+    "peperomia": "peperomia obtusifolia",
+    "hoya": "hoya carnosa",
+    "asparagus setaceus": "asparagus fern",
+    "heptapleurum arboricola": "schefflera",
+    "philodendron hederaceum": "philodendron brasil",
+}
+FUZZY_NAME_THRESHOLD = 0.6  # minimalne podobieństwo trigramów (Dice), poniżej seed nierozpoznany
+
+_NAME_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize_name(name: str) -> str:
+    """Małe litery, bez akcentów i interpunkcji: "Croton," -> "croton", "Devil's Ivy" -> "devil s ivy"."""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return _NAME_NON_ALNUM_RE.sub(" ", name.lower()).strip()
+
+
+def _name_trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SeedMatch:
+    seed: str                   # nazwa podana przez użytkownika
+    plant_name: Optional[str]   # nazwa z modelu, None gdy nierozpoznana
+    score: float                # 1.0 dla exact/alias/prefix, podobieństwo trigramów dla fuzzy
+    method: Optional[str]       # "exact" | "alias" | "prefix" | "fuzzy" | None
+
+
+class PlantNameIndex:
+    """
+    Indeks nazw roślin modelu: słownik znormalizowanych nazw + aliasów i odwrócony indeks trigramów
+    (trigram -> tablica numerów kluczy). Fuzzy = zliczenie wspólnych trigramów przez np.bincount
+    po listach z indeksu, więc koszt zapytania nie zależy od liczby roślin w pętli Pythona.
+    """
+
+    def __init__(self, plant_names: List[str], aliases: Optional[Dict[str, str]] = None,
+                 threshold: float = FUZZY_NAME_THRESHOLD):
+        self.plant_names = plant_names
+        self.threshold = threshold
+        self.exact: Dict[str, int] = {}
+        self.variants: Dict[str, List[int]] = {}  # wszystkie wiersze o tej samej nazwie po normalizacji
+        for i, name in enumerate(plant_names):
+            key = _normalize_name(name)
+            self.exact.setdefault(key, i)  # "Areca Palm"/"Areca palm" -> pierwszy wiersz
+            self.variants.setdefault(key, []).append(i)
+        self.aliases: Dict[str, int] = {}
+        for alias, target in (PLANT_ALIASES if aliases is None else aliases).items():
+            target_idx = self.exact.get(_normalize_name(target))
+            alias_key = _normalize_name(alias)
+            if target_idx is not None and alias_key not in self.exact:
+                self.aliases[alias_key] = target_idx
+
+        # klucze fuzzy: nazwy i aliasy, każdy wskazuje na wiersz modelu
+        keys = list(self.exact) + list(self.aliases)
+        self._key_rows = np.fromiter(
+            (self.exact[k] if k in self.exact else self.aliases[k] for k in keys), dtype=np.int64, count=len(keys)
+        )
+        postings: Dict[str, List[int]] = {}
+        sizes = np.empty(len(keys), dtype=np.int32)
+        for k, key in enumerate(keys):
+            grams = _name_trigrams(key)
+            sizes[k] = len(grams)
+            for g in grams:
+                postings.setdefault(g, []).append(k)
+        self._postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+        self._sizes = sizes
+
+    def _fuzzy(self, key: str) -> Tuple[Optional[int], float]:
+        grams = _name_trigrams(key)
+        lists = [self._postings[g] for g in grams if g in self._postings]
+        if not lists:
+            return None, 0.0
+        shared = np.bincount(np.concatenate(lists), minlength=len(self._sizes))
+        dice = 2.0 * shared / (self._sizes + len(grams))
+        best = int(np.argmax(dice))
+        return int(self._key_rows[best]), float(dice[best])
+
+    def _lookup(self, key: str) -> Tuple[Optional[int], float, Optional[str]]:
+        if not key:
+            return None, 0.0, None
+        if key in self.exact:
+            return self.exact[key], 1.0, "exact"
+        if key in self.aliases:
+            return self.aliases[key], 1.0, "alias"
+        # odmiana/kultywar: "monstera deliciosa thai constellation" -> "monstera deliciosa" -> "monstera"
+        tokens = key.split()
+        for n in range(len(tokens) - 1, 0, -1):
+            prefix = " ".join(tokens[:n])
+            row = self.exact.get(prefix, self.aliases.get(prefix))
+            if row is not None:
+                return row, 1.0, "prefix"
+        row, score = self._fuzzy(key)
+        if row is not None and score >= self.threshold:
+            return row, score, "fuzzy"
+        return None, score, None
+
+    def lookup(self, seed: str) -> SeedMatch:
+        row, score, method = self._lookup(_normalize_name(seed))
+        return SeedMatch(seed, self.plant_names[row] if row is not None else None, round(score, 4), method)
+
+    def resolve(self, seeds: List[str]) -> List[SeedMatch]:
+        return [self.lookup(s) for s in seeds]
+
+    def rows(self, seeds: List[str]) -> List[int]:
+        """Numery wierszy rozpoznanych seedów, bez powtórzeń, w kolejności podania."""
+        rows = []
+        for seed in seeds:
+            row = self._lookup(_normalize_name(seed))[0]
+            if row is not None and row not in rows:
+                rows.append(row)
+        return rows
+
+    def variant_rows(self, rows: List[int]) -> List[int]:
+        """Wiersze wszystkich wariantów zapisu tych samych nazw co rows."""
+        return [v for r in rows for v in self.variants[_normalize_name(self.plant_names[r])]]
+
+
+def get_centroid_vector(seed_plants: List[str], matrix, plant_names: List[str],
+                        name_index: Optional[PlantNameIndex] = None, valid_rows: Optional[np.ndarray] = None):
     """
     Liczy centroid wektorów tf-idf dla listy roślin seedowych --> czyli te które użytkownik będzie miał w kolekcji
     Narazxie wpisujemy je z łapki ale później będzie potrzebne połączenie ze strukturą koll;ekcji reoślin użytkownika.
+    Nazwy rozpoznaje name_index (PlantRecommender trzyma gotowy; bez niego budowany na miejscu).
+    valid_rows: maska wierszy, które mają wektor (embeddingi, patrz embedding_rows) - pozostałe seedy są pomijane.
     """
-    name_to_idx = {n.lower(): i for i, n in enumerate(plant_names)}
-    idx = []
-    for p in seed_plants:
-        key = p.strip().lower()
-        if not key:
-            continue
-        match = name_to_idx.get(key)
-        if match is not None:
-            idx.append(match)
+    if name_index is None:
+        name_index = PlantNameIndex(plant_names)
+    idx = name_index.rows(seed_plants)
+    if valid_rows is not None:
+        idx = [i for i in idx if valid_rows[i]]
     if not idx:
-        raise ValueError("Brak znanych roślin w listy seedów.")
+        raise ValueError(f"Brak znanych roślin w listy seedów: {', '.join(seed_plants)}.")
     sub = matrix[idx]
     centroid = sub.sum(axis=0) / len(idx)
     centroid = np.asarray(centroid)
@@ -154,18 +585,28 @@ def get_similar_plants(
     plant_names: List[str],
     top_k: int = 10,
     exclude_seeds: bool = True,
+    name_index: Optional[PlantNameIndex] = None,
+    valid_rows: Optional[np.ndarray] = None,
 ) -> List[Tuple[str, float]]:
     """
     Zwraca listę (plant_name, similarity) najbardziej podobnych roślin.
+    Z valid_rows (maska) rośliny bez wektora nie są ani seedami, ani wynikami.
     """
-    centroid = get_centroid_vector(seed_plants, matrix, plant_names)
-    sims = cosine_similarity(centroid, matrix)[0]
-    order = np.argsort(-sims)
-    exclude = set(seed_plants) if exclude_seeds else set()
+    if name_index is None:
+        name_index = PlantNameIndex(plant_names)
+    with _stage("centroid"):
+        centroid = get_centroid_vector(seed_plants, matrix, plant_names, name_index, valid_rows)
+    with _stage("similarity"):
+        sims = cosine_similarity(centroid, matrix)[0]
+        order = np.argsort(-sims)
+    # pomijamy rozpoznane seedy razem z wariantami zapisu tej samej nazwy ("Areca Palm"/"Areca palm")
+    exclude = set()
+    if exclude_seeds:
+        exclude = {plant_names[r] for r in name_index.variant_rows(name_index.rows(seed_plants))} | set(seed_plants)
     results: List[Tuple[str, float]] = []
     for i in order:
         name = plant_names[i]
-        if name in exclude:
+        if name in exclude or (valid_rows is not None and not valid_rows[i]):
             continue
         results.append((name, float(sims[i])))
         if len(results) >= top_k:
@@ -173,6 +614,33 @@ def get_similar_plants(
     return results
 
 
+# --- Embeddingi roślin (średnia embeddingów chunków z plant_documents, MiniLM 384-d) ---
+
+def load_plant_embeddings(path: str) -> Tuple[List[str], np.ndarray]:
+    """Wczytuje plik .npz z backend_app/compute_plant_embeddings.py (plant_names, embeddings)."""
+    with np.load(path, allow_pickle=False) as data:
+        return [str(n) for n in data["plant_names"]], data["embeddings"].astype(np.float32)
+
+
+def align_embeddings(plant_names: List[str], names: List[str], vectors: np.ndarray) -> np.ndarray:
+    """
+    Macierz (len(plant_names), dim) w kolejności plant_names, wiersze znormalizowane L2.
+    Rośliny bez embeddingu dostają wiersz zerowy (podobieństwo 0 do wszystkiego) - embedding_rows je odróżnia.
+    """
+    name_to_row = {n.lower(): i for i, n in enumerate(names)}
+    aligned = np.zeros((len(plant_names), vectors.shape[1]), dtype=np.float32)
+    for i, name in enumerate(plant_names):
+        row = name_to_row.get(name.lower())
+        if row is not None:
+            aligned[i] = vectors[row]
+    return normalize(aligned, norm="l2", copy=False)
+
+
+def embedding_rows(embeddings) -> np.ndarray:
+    """Maska wierszy z embeddingiem: po align_embeddings tylko rośliny bez embeddingu mają wiersz zerowy."""
+    return np.asarray(embeddings).any(axis=1)
+
+
 # ======================================================================
 # 4. Wyciąganie cech z tekstu (light/water/humidity/toxicity/difficulty)
 # ======================================================================
@@ -234,6 +702,142 @@ def parse_traits_from_text(text: str) -> Dict[str, Optional[str]]:
     }
 
 
+TRAIT_MAPS = {
+    "light": LIGHT_MAP,
+    "water": WATER_MAP,
+    "humidity": HUMIDITY_MAP,
+    "toxicity": TOXIC_MAP,
+    "difficulty": DIFFICULTY_MAP,
+}
+
+
+def _split_alternatives(pattern: str) -> List[str]:
+    """Dzieli wzorzec po "|" najwyższego poziomu (poza nawiasami, klasami znaków i escape'ami)."""
+    parts, depth, start, i, in_class = [], 0, 0, 0, False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+def _non_capturing(pattern: str) -> str:
+    """Zamienia grupy "(...)" na "(?:...)" – każda grupa przechwytująca spowalnia skan."""
+    out, i, in_class = [], 0, False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        elif c == "(" and pattern[i + 1:i + 2] != "?":
+            c = "(?:"
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _split_first_literal(alternative: str) -> Tuple[Optional[str], str]:
+    """
+    ("l", "ow light") dla "low light"; ("t", r"(?<!\wt)oxic\b") dla r"\btoxic\b".
+    (None, alternative), gdy alternatywa nie zaczyna się obowiązkową literą.
+    """
+    boundary = alternative.startswith("\\b")
+    body = alternative[2:] if boundary else alternative
+    if len(body) < 2 or not (body[0].isalnum() or body[0] == " ") or body[1] in "?*+{":
+        return None, alternative
+    first, rest = body[0], body[1:]
+    if boundary:
+        # \b przed literą == poprzedni znak nie jest \w
+        rest = f"(?<!\\w{first})" + rest
+    return first, rest
+
+
+class TraitExtractor:
+    """
+    Ekstrakcja wszystkich cech w jednym przejściu po tekście (zamiast re.search dla każdego wzorca z osobna).
+    - _scan to jedna alternacja wszystkich wzorców wszystkich map, pogrupowana po pierwszej literze i bez
+      grup przechwytujących (inaczej moduł re jest wolniejszy niż osobne wyszukiwania); służy tylko do
+      znalezienia pozycji, w których zaczyna się jakiekolwiek dopasowanie,
+    - po trafieniu na pozycji p szukamy dalej od p + 1, więc nakładające się dopasowania też są widoczne,
+    - na pozycji trafienia rozstrzygamy cechy zakotwiczonymi alternacjami z grupami nazwanymi
+      "<cecha>_<nr>" – wzorce w kolejności z mapy, wygrywa najniższy numer, czyli dokładnie jak w
+      extract_trait (np. safe przed toxic).
+    """
+
+    def __init__(self, maps: Dict[str, Dict[str, str]]):
+        self.values = {trait: list(mapping.values()) for trait, mapping in maps.items()}
+        buckets: Dict[str, List[str]] = {}
+        unfactored: List[str] = []
+        for mapping in maps.values():
+            for pattern in mapping:
+                for alternative in _split_alternatives(_non_capturing(pattern)):
+                    first, rest = _split_first_literal(alternative)
+                    if first is None:
+                        unfactored.append(f"(?:{alternative})")
+                    else:
+                        buckets.setdefault(first, []).append(rest)
+        self._scan = re.compile("|".join(
+            [f"{re.escape(first)}(?:{'|'.join(rests)})" for first, rests in buckets.items()] + unfactored
+        ))
+        self._anchored = {
+            trait: (
+                re.compile("|".join(f"(?P<{trait}_{i}>{pattern})" for i, pattern in enumerate(mapping))),
+                [f"{trait}_{i}" for i in range(len(mapping))],
+            )
+            for trait, mapping in maps.items()
+        }
+
+    def parse(self, text: str) -> Dict[str, Optional[str]]:
+        t = (text or "").lower()
+        best: Dict[str, Optional[int]] = {trait: None for trait in self.values}
+        m = self._scan.search(t)
+        while m is not None:
+            pos = m.start()
+            for trait, (anchored, names) in self._anchored.items():
+                if best[trait] == 0:
+                    continue
+                am = anchored.match(t, pos)
+                if am is None:
+                    continue
+                i = next(i for i, name in enumerate(names) if am.group(name) is not None)
+                if best[trait] is None or i < best[trait]:
+                    best[trait] = i
+            if all(b == 0 for b in best.values()):
+                break
+            m = self._scan.search(t, pos + 1)
+        return {
+            trait: (self.values[trait][i] if i is not None else None)
+            for trait, i in best.items()
+        }
+
+
+TRAIT_EXTRACTOR = TraitExtractor(TRAIT_MAPS)
+
+
+def parse_traits_single_pass(text: str) -> Dict[str, Optional[str]]:
+    """To samo co parse_traits_from_text, ale jednym skanem tekstu (TRAIT_EXTRACTOR)."""
+    return TRAIT_EXTRACTOR.parse(text)
+
+
 def _majority_or_first(s: pd.Series):
     s = s.dropna()
     if s.empty:
@@ -242,24 +846,38 @@ def _majority_or_first(s: pd.Series):
     return counts.index[0]
 
 
-def build_traits_table(df_raw: pd.DataFrame) -> pd.DataFrame:
+def _traits_chunk(texts: List[str]) -> List[Dict[str, Optional[str]]]:
+    return [parse_traits_single_pass(t) for t in texts]
+
+
+def build_traits_table(df_raw: pd.DataFrame, n_jobs: int = 1, chunk_size: int = 1000) -> pd.DataFrame:
     """
     Wyciąga cechy z poszczególnych artykułów, a następnie robi majority vote
     po plant_name (jedna linia na roślinę).
+    n_jobs != 1 -> ekstrakcja cech w puli procesów, po chunk_size artykułów.
     """
-    rows = []
-    for _, row in df_raw.iterrows():
-        pn, ct = row.get("plant_name"), row.get("content")
-        if isinstance(pn, str) and isinstance(ct, str):
-            traits = parse_traits_from_text(ct)
-            rows.append({"plant_name": pn, **traits})
+    pairs = [
+        (pn, ct)
+        for pn, ct in zip(df_raw["plant_name"], df_raw["content"])
+        if isinstance(pn, str) and isinstance(ct, str)
+    ]
+    texts = [ct for _, ct in pairs]
+    traits = [
+        t
+        for part in _map_chunks(_traits_chunk, _chunked(texts, chunk_size), _resolve_n_jobs(n_jobs))
+        for t in part
+    ]
+    rows = [{"plant_name": pn, **tr} for (pn, _), tr in zip(pairs, traits)]
     df_traits = pd.DataFrame(rows)
     df_traits = (
         df_traits
         .groupby("plant_name", as_index=False)
         .agg(_majority_or_first)
     )
-    return df_traits
+    # jeden format niezależnie od danych: object + None dla braków (jak decode_traits). Bez tego kolumna
+    # z samymi brakami wychodzi jako object/None, a reszta jako StringDtype/NaN - i pd.concat w add_articles
+    # daje inną tabelę niż pełna budowa
+    return df_traits.astype(object).where(df_traits.notna(), None)
 
 
 # ======================================================================
@@ -311,7 +929,8 @@ def recommend_by_constraints(
     Zwraca listę (plant_name, score).
     """
     names = df_agg["plant_name"].tolist()
-    scores = [(n, score_constraints(n, df_traits, constraints)) for n in names]
+    with _stage("constraint_scoring"):
+        scores = [(n, score_constraints(n, df_traits, constraints)) for n in names]
     # odrzucamy rośliny z -1e9 (niebezpieczne dla zwierząt przy pets_safe=True)
     scores = [x for x in scores if x[1] > -1e8]
     scores.sort(key=lambda x: x[1], reverse=True)
@@ -338,12 +957,13 @@ def hybrid_recommend(
 
     denom = sum(WEIGHTS.values())
     rescored: List[Tuple[str, float]] = []
-    for name, sim in sims:
-        cscore = score_constraints(name, df_traits, constraints)
-        if cscore <= -1e8:
-            continue
-        final = alpha * sim + (1 - alpha) * (cscore / denom)
-        rescored.append((name, float(final)))
+    with _stage("constraint_scoring"):
+        for name, sim in sims:
+            cscore = score_constraints(name, df_traits, constraints)
+            if cscore <= -1e8:
+                continue
+            final = alpha * sim + (1 - alpha) * (cscore / denom)
+            rescored.append((name, float(final)))
     rescored.sort(key=lambda x: x[1], reverse=True)
     return rescored[:top_k]
 
@@ -352,6 +972,121 @@ def hybrid_recommend(
 # 6. Klasa wysokopoziomowa do łatwego użycia w aplikacji
 # ======================================================================
 
+# Format katalogu z modelem do serwowania (PlantRecommender.save_serving / load_serving):
+# tablice CSR, kody cech, tablice ConstraintIndex i embeddingi jako .npy (ładowane przez mmap, więc wiele procesów-workerów
+# współdzieli te same strony pamięci z page cache), nazwy roślin i słowniki cech w meta.json.
+SERVING_FORMAT = 2
+TRAIT_COLUMNS = list(TRAIT_MAPS)
+
+
+def _trait_values(column: str) -> List[str]:
+    return sorted(set(TRAIT_MAPS[column].values()))
+
+
+def encode_traits(df_traits: pd.DataFrame, plant_names: List[str]) -> np.ndarray:
+    """Cechy jako int8 (rośliny x TRAIT_COLUMNS): 0 = brak, i+1 = _trait_values(kolumna)[i]."""
+    codes = np.zeros((len(plant_names), len(TRAIT_COLUMNS)), dtype=np.int8)
+    rows = df_traits.drop_duplicates("plant_name").set_index("plant_name")
+    for j, column in enumerate(TRAIT_COLUMNS):
+        lookup = {v: i + 1 for i, v in enumerate(_trait_values(column))}
+        values = rows[column].reindex(plant_names) if column in rows else pd.Series(index=plant_names, dtype=object)
+        codes[:, j] = [lookup.get(v, 0) if isinstance(v, str) else 0 for v in values]
+    return codes
+
+
+def decode_traits(codes: np.ndarray, plant_names: List[str]) -> pd.DataFrame:
+    data = {"plant_name": plant_names}
+    for j, column in enumerate(TRAIT_COLUMNS):
+        values = [None] + _trait_values(column)
+        data[column] = [values[c] for c in codes[:, j]]
+    return pd.DataFrame(data)
+
+
+# --- Rankingi dla wszystkich kombinacji ograniczeń ---
+# light/water/humidity/difficulty: brak albo jedna z 3 wartości (wartość spoza słownika nie pasuje do żadnej
+# rośliny, więc działa jak brak), pets_safe: tak/nie -> 4^4 * 2 = 512 kombinacji. score_constraints to suma
+# wag trafionych cech, a wagi * 2 są całkowite, więc wyniki trzymamy w pół-punktach jako int8.
+CONSTRAINT_TRAITS = ["light", "water", "humidity", "difficulty"]
+N_CONSTRAINT_COMBOS = 4 ** len(CONSTRAINT_TRAITS) * 2
+EXCLUDED_SCORE = -128  # roślina toksyczna przy pets_safe=True
+RANKING_DEPTH = 256
+
+# PlantRecommender.add_articles: co tyle aktualizacji przyrostowych pełna przebudowa (0 = nigdy)
+FULL_REBUILD_EVERY = 50
+
+
+def constraint_combo(constraints: UserConstraints) -> int:
+    """Numer kombinacji (0..N_CONSTRAINT_COMBOS-1) dla ograniczeń użytkownika."""
+    combo = 0
+    for column in CONSTRAINT_TRAITS:
+        values = _trait_values(column)
+        value = getattr(constraints, column)
+        combo = combo * 4 + (values.index(value) + 1 if value in values else 0)
+    return combo * 2 + (1 if constraints.pets_safe else 0)
+
+
+class ConstraintIndex:
+    """
+    recommend_by_constraints policzone z góry dla każdej kombinacji ograniczeń (constraint_combo):
+    scores[c]   - dopasowanie wszystkich roślin w pół-punktach (EXCLUDED_SCORE = odrzucona),
+    rankings[c] - pierwsze `depth` dozwolonych roślin wg wyniku, remisy w kolejności plant_names
+                  (jak stabilny sort w recommend_by_constraints),
+    counts[c]   - liczba dozwolonych roślin.
+    top_k <= depth to odczyt wycinka tablicy; głębsze zapytania sortują wektor scores[c].
+    Pamięć: 512 * (n_roślin + 4 * depth) bajtów.
+    """
+
+    def __init__(self, scores: np.ndarray, rankings: np.ndarray, counts: np.ndarray):
+        self.scores = scores
+        self.rankings = rankings
+        self.counts = counts
+
+    @classmethod
+    def build(cls, codes: np.ndarray, depth: int = RANKING_DEPTH) -> "ConstraintIndex":
+        """codes: kody cech z encode_traits (rośliny x TRAIT_COLUMNS)."""
+        n = codes.shape[0]
+        depth = min(depth, n)
+        toxic = codes[:, TRAIT_COLUMNS.index("toxicity")] == _trait_values("toxicity").index("toxic") + 1
+        # matches[j][v] = pół-punkty za trafienie wartości v (1..3) cechy j, matches[j][0] = zera
+        matches = []
+        for column in CONSTRAINT_TRAITS:
+            col = codes[:, TRAIT_COLUMNS.index(column)]
+            weight = np.int8(2 * WEIGHTS[column])
+            matches.append([np.zeros(n, dtype=np.int8)] + [(col == v).astype(np.int8) * weight for v in (1, 2, 3)])
+
+        scores = np.zeros((N_CONSTRAINT_COMBOS, n), dtype=np.int8)
+        rankings = np.full((N_CONSTRAINT_COMBOS, depth), -1, dtype=np.int32)
+        counts = np.zeros(N_CONSTRAINT_COMBOS, dtype=np.int32)
+        for combo in range(N_CONSTRAINT_COMBOS):
+            rest, pets_safe = divmod(combo, 2)
+            row = scores[combo]
+            for j in reversed(range(len(CONSTRAINT_TRAITS))):
+                rest, value = divmod(rest, 4)
+                row += matches[j][value]
+            if pets_safe:
+                row[toxic] = EXCLUDED_SCORE
+            counts[combo] = n - int(toxic.sum()) if pets_safe else n
+            # stabilny sort int16 (radix sort w numpy): odrzucone (-128 -> 128) lądują na końcu
+            order = np.argsort(-row.astype(np.int16), kind="stable")
+            k = min(depth, int(counts[combo]))
+            rankings[combo, :k] = order[:k]
+        return cls(scores, rankings, counts)
+
+    def score_vector(self, constraints: UserConstraints) -> np.ndarray:
+        """Wektor dopasowania wszystkich roślin (pół-punkty int8) – do hybrid_recommend."""
+        return self.scores[constraint_combo(constraints)]
+
+    def top(self, constraints: UserConstraints, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(indeksy roślin, wyniki jak w score_constraints) dla top_k najlepiej dopasowanych."""
+        combo = constraint_combo(constraints)
+        k = max(0, min(top_k, int(self.counts[combo])))
+        row = self.scores[combo]
+        if k <= self.rankings.shape[1]:
+            idx = self.rankings[combo, :k]
+        else:
+            idx = np.argsort(-row.astype(np.int16), kind="stable")[:k]
+        return idx, row[idx] / 2.0
+
 class PlantRecommender: #Wysokopoziomowy wrapper, żeby w apce nie bawić się w DF-y ręcznie.
     def __init__(
         self,
@@ -361,6 +1096,7 @@ class PlantRecommender: #Wysokopoziomowy wrapper, żeby w apce nie bawić się w
         vectorizer,
         matrix,
         plant_names: List[str],
+        constraint_index: Optional[ConstraintIndex] = None,
     ):
         self.df_raw = df_raw
         self.df_agg = df_agg
@@ -368,20 +1104,238 @@ class PlantRecommender: #Wysokopoziomowy wrapper, żeby w apce nie bawić się w
         self.vectorizer = vectorizer
         self.matrix = matrix
         self.plant_names = plant_names
+        self.embeddings = None  # opcjonalnie: gęsta macierz embeddingów roślin, patrz attach_embeddings
+        self.is_compact = False
+        self._name_index = {n: i for i, n in enumerate(plant_names)}
+        self.name_index = PlantNameIndex(plant_names)  # seedy: aliasy + fuzzy, patrz resolve_seeds
+        # rankingi dla wszystkich kombinacji ograniczeń liczone raz, przy budowie modelu
+        if constraint_index is None:
+            with _stage("constraint_index"):
+                constraint_index = ConstraintIndex.build(encode_traits(df_traits, plant_names))
+        self.constraint_index = constraint_index
+        self.tfidf_state = None  # liczności termów do add_articles, patrz TfidfState
+        self.full_rebuild_every = FULL_REBUILD_EVERY
+        self.updates_since_rebuild = 0
 
     @classmethod
-    def from_json(cls, json_path: str) -> "PlantRecommender": #Główna metoda inicjalizacji: ładuje JSON, buduje tf-idf + cechy.
+    def from_json(
+        cls,
+        json_path: str,
+        n_jobs: int = 1,
+        use_hashing: bool = False,
+        incremental: bool = False,
+    ) -> "PlantRecommender": #Główna metoda inicjalizacji: ładuje JSON, buduje tf-idf + cechy.
+        # n_jobs != 1 (None/0/-1 = wszystkie rdzenie) -> preprocessing i cechy liczone w puli procesów,
+        # use_hashing -> HashingVectorizer zamiast słownika (ograniczona pamięć przy bardzo dużych korpusach),
+        # incremental -> tf-idf liczony przez TfidfState, od razu gotowy do add_articles
         df_raw, df_agg = load_and_aggregate_json(json_path)
-        df_traits = build_traits_table(df_raw)
-        vectorizer, matrix, plant_names = build_tfidf_matrix(df_agg)
+        if incremental:
+            if use_hashing:
+                raise ValueError("incremental=True działa tylko ze słownikowym TfidfVectorizer (bez use_hashing).")
+            return cls._from_articles(df_raw, n_jobs=n_jobs)
+        df_traits = build_traits_table(df_raw, n_jobs=n_jobs)
+        vectorizer, matrix, plant_names = build_tfidf_matrix(df_agg, n_jobs=n_jobs, use_hashing=use_hashing)
         return cls(df_raw, df_agg, df_traits, vectorizer, matrix, plant_names)
 
+    @classmethod
+    def _from_articles(cls, df_raw: pd.DataFrame, n_jobs: int = 1) -> "PlantRecommender":
+        """Pełna budowa przez TfidfState (ten sam wynik co build_tfidf_matrix)."""
+        df_agg = aggregate_articles(df_raw)
+        state = TfidfState.from_docs(df_agg["content"].fillna("").tolist(), n_jobs=n_jobs)
+        matrix, vectorizer = cls._tfidf_from_state(state)
+        recommender = cls(df_raw, df_agg, build_traits_table(df_raw, n_jobs=n_jobs), vectorizer, matrix,
+                          df_agg["plant_name"].tolist())
+        recommender.tfidf_state = state
+        return recommender
+
+    @staticmethod
+    def _tfidf_from_state(state: TfidfState):
+        matrix, terms, idf = state.tfidf()
+        # vectorizer jak po fit (transform(surowy tekst) działa), tylko słownik i idf przepisane ze stanu
+        vectorizer = _make_tfidf_vectorizer()
+        vectorizer.vocabulary_ = dict(zip(terms, range(len(terms))))
+        vectorizer.idf_ = idf
+        return matrix, vectorizer
+
+    def add_articles(self, articles: List[dict]) -> List[str]:
+        """
+        Dopisuje artykuły (rekordy jak w plant_articles.json) bez pełnego przebudowania modelu: tokenizacja
+        i stemming tylko dla roślin, których dotyczą nowe artykuły (TfidfState), cechy tylko dla nich,
+        reszta (idf, normalizacja, ConstraintIndex) to szybkie operacje wektorowe. Wynik jest taki sam jak
+        from_json na pliku z dopisanymi artykułami. Co full_rebuild_every wywołań (0 = nigdy) zamiast
+        aktualizacji robimy pełną budowę - siatka bezpieczeństwa na wypadek rozjechania się stanu.
+        Zwraca nazwy zmienionych roślin. Atrybuty są podmieniane na końcu, więc równoległe zapytania widzą
+        stary albo nowy model (w serwisie i tak aktualizujemy kopię i podmieniamy referencję).
+        """
+        if self.is_compact or self.df_raw is None:
+            raise ValueError("add_articles wymaga pełnego modelu (bez compact() / load_serving).")
+        if not isinstance(self.vectorizer, TfidfVectorizer):
+            raise ValueError("add_articles nie obsługuje trybu use_hashing.")
+        new = pd.DataFrame(articles)
+        if new.empty:
+            return []
+        if "plant_name" not in new.columns or "content" not in new.columns:
+            raise ValueError("Brak wymaganych kolumn 'plant_name' i 'content'")
+        df_raw = pd.concat([self.df_raw, new], ignore_index=True)
+        affected = sorted({n for n in new["plant_name"] if isinstance(n, str)})
+
+        if self.tfidf_state is None or (self.full_rebuild_every and
+                                        self.updates_since_rebuild + 1 >= self.full_rebuild_every):
+            # pierwszy add na modelu z build_tfidf_matrix (brak liczności) albo okresowa pełna przebudowa
+            with _stage("full_rebuild"):
+                rebuilt = self._from_articles(df_raw)
+            embeddings = self._realigned_embeddings(rebuilt.plant_names)
+            self.__dict__.update(rebuilt.__dict__, embeddings=embeddings, full_rebuild_every=self.full_rebuild_every)
+            return affected
+
+        with _stage("incremental_tfidf"):
+            changed = aggregate_articles(df_raw[df_raw["plant_name"].isin(affected)])
+            df_agg = (
+                pd.concat([self.df_agg[~self.df_agg["plant_name"].isin(affected)], changed])
+                .sort_values("plant_name", kind="stable")
+                .reset_index(drop=True)
+            )
+            plant_names = df_agg["plant_name"].tolist()
+            changed_pos = {n: j for j, n in enumerate(changed["plant_name"])}
+            rows = [-(changed_pos[n] + 1) if n in changed_pos else self._name_index[n] for n in plant_names]
+            state = self.tfidf_state.updated(rows, changed["content"].fillna("").tolist())
+            matrix, vectorizer = self._tfidf_from_state(state)
+
+        with _stage("incremental_traits"):
+            changed_traits = build_traits_table(df_raw[df_raw["plant_name"].isin(affected)])
+            df_traits = (
+                pd.concat([self.df_traits[~self.df_traits["plant_name"].isin(affected)], changed_traits])
+                .sort_values("plant_name", kind="stable")
+                .reset_index(drop=True)
+            )
+            constraint_index = ConstraintIndex.build(encode_traits(df_traits, plant_names))
+
+        self.__dict__.update(
+            df_raw=df_raw, df_agg=df_agg, df_traits=df_traits, vectorizer=vectorizer, matrix=matrix,
+            plant_names=plant_names, _name_index={n: i for i, n in enumerate(plant_names)},
+            name_index=PlantNameIndex(plant_names),
+            constraint_index=constraint_index, tfidf_state=state, embeddings=self._realigned_embeddings(plant_names),
+            updates_since_rebuild=self.updates_since_rebuild + 1,
+        )
+        return affected
+
+    def _realigned_embeddings(self, plant_names: List[str]):
+        """Embeddingi w nowej kolejności roślin; nowe rośliny dostają wiersz zerowy (jak w align_embeddings)."""
+        if self.embeddings is None:
+            return None
+        return align_embeddings(plant_names, self.plant_names, np.asarray(self.embeddings))
+
+    def compact(self, top_n_terms: Optional[int] = None) -> "PlantRecommender":
+        """
+        Przełącza obiekt w tryb serwowania: zostaje tylko float32 macierz tf-idf (opcjonalnie przycięta do
+        top_n_terms termów na roślinę), nazwy roślin i tabela cech. Vectorizer (ogromny słownik n-gramów),
+        df_raw i treści w df_agg są zwalniane – w zapytaniach i tak używamy tylko matrix i plant_names.
+        """
+        self.matrix = compact_tfidf_matrix(self.matrix, top_n_terms=top_n_terms)
+        self.vectorizer = None
+        self.df_raw = None
+        self.df_agg = self.df_agg[["plant_name"]].copy()
+        self.tfidf_state = None
+        self.is_compact = True
+        return self
+
+    def save_serving(self, path: str) -> None:
+        """
+        Zapisuje model do serwowania w katalogu path (nie może istnieć): float32 tf-idf jak po compact(),
+        kody cech, opcjonalne embeddingi. Odczyt: PlantRecommender.load_serving(path).
+        """
+        matrix = self.matrix if self.is_compact else compact_tfidf_matrix(self.matrix)
+        os.makedirs(path)
+        np.save(os.path.join(path, "data.npy"), matrix.data.astype(np.float32, copy=False))
+        # indeksy w typie wybranym przez scipy (int32 do 2^31 niezerowych) -> przy wczytaniu bez konwersji/kopii
+        np.save(os.path.join(path, "indices.npy"), matrix.indices)
+        np.save(os.path.join(path, "indptr.npy"), matrix.indptr)
+        np.save(os.path.join(path, "traits.npy"), encode_traits(self.df_traits, self.plant_names))
+        np.save(os.path.join(path, "constraint_scores.npy"), self.constraint_index.scores)
+        np.save(os.path.join(path, "constraint_rankings.npy"), self.constraint_index.rankings)
+        np.save(os.path.join(path, "constraint_counts.npy"), self.constraint_index.counts)
+        if self.embeddings is not None:
+            np.save(os.path.join(path, "embeddings.npy"), self.embeddings)
+        meta = {
+            "format": SERVING_FORMAT,
+            "shape": list(matrix.shape),
+            "plant_names": list(self.plant_names),
+            "trait_columns": TRAIT_COLUMNS,
+            "trait_values": {c: _trait_values(c) for c in TRAIT_COLUMNS},
+        }
+        # meta.json na końcu: jego obecność oznacza kompletny zapis
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load_serving(cls, path: str, mmap: bool = True) -> "PlantRecommender":
+        """
+        Wczytuje katalog z save_serving. mmap=True -> tablice są mapowane tylko do odczytu (np.load mmap_mode="r"),
+        nic nie jest kopiowane do pamięci procesu; N workerów = jedna kopia w page cache.
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != SERVING_FORMAT or meta.get("trait_columns") != TRAIT_COLUMNS:
+            raise ValueError(f"Niezgodny format modelu w {path}, trzeba go zbudować ponownie.")
+        mode = "r" if mmap else None
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode=mode)  # noqa: E731
+        matrix = sp.csr_matrix(
+            (load("data.npy"), load("indices.npy"), load("indptr.npy")), shape=tuple(meta["shape"]), copy=False
+        )
+        plant_names = meta["plant_names"]
+        df_traits = decode_traits(load("traits.npy"), plant_names)
+        constraint_index = ConstraintIndex(
+            load("constraint_scores.npy"), load("constraint_rankings.npy"), load("constraint_counts.npy")
+        )
+        recommender = cls(
+            None, pd.DataFrame({"plant_name": plant_names}), df_traits, None, matrix, plant_names, constraint_index
+        )
+        if os.path.exists(os.path.join(path, "embeddings.npy")):
+            recommender.embeddings = load("embeddings.npy")
+        recommender.is_compact = True
+        return recommender
+
+    def attach_embeddings(self, names: List[str], vectors: np.ndarray) -> "PlantRecommender":
+        """
+        Dołącza embeddingi roślin (np. z load_plant_embeddings) jako alternatywę dla tf-idf: mode="embedding".
+        Macierz jest mała i gęsta (rośliny x 384), więc szukamy dokładnie (jedno mnożenie macierz-wektor).
+        """
+        self.embeddings = align_embeddings(self.plant_names, names, vectors)
+        return self
+
+    def _similarity_matrix(self, mode: str):
+        if mode == "tfidf":
+            return self.matrix
+        if mode == "embedding":
+            if self.embeddings is None:
+                raise ValueError("Brak embeddingów roślin – uruchom compute_plant_embeddings.py (PLANT_EMBEDDINGS_PATH).")
+            return self.embeddings
+        raise ValueError(f"Nieznany tryb podobieństwa: {mode!r} (tfidf albo embedding).")
+
+    def _valid_rows(self, mode: str) -> Optional[np.ndarray]:
+        """Dla mode="embedding" maska roślin z embeddingiem (liczona raz na macierz), dla tf-idf None."""
+        if mode != "embedding":
+            return None
+        # embeddings bywa podmieniane (attach_embeddings, add_articles, load_serving) - maska idzie za obiektem
+        if getattr(self, "_embedding_rows_of", None) is not self.embeddings:
+            self._embedding_rows = embedding_rows(self.embeddings)
+            self._embedding_rows_of = self.embeddings
+        return self._embedding_rows
+
     # --- API do wykorzystania w aplikacji ---
-    def similar_plants(self, seed_plants: List[str], top_k: int = 10) -> List[Tuple[str, float]]:
-        return get_similar_plants(seed_plants, self.matrix, self.plant_names, top_k=top_k)
+    def resolve_seeds(self, seed_plants: List[str]) -> List[SeedMatch]:
+        """Jak zostały rozpoznane nazwy z kolekcji użytkownika (nazwa w modelu, metoda, podobieństwo)."""
+        return self.name_index.resolve(seed_plants)
+
+    def similar_plants(self, seed_plants: List[str], top_k: int = 10, mode: str = "tfidf") -> List[Tuple[str, float]]:
+        return get_similar_plants(seed_plants, self._similarity_matrix(mode), self.plant_names, top_k=top_k,
+                                  name_index=self.name_index, valid_rows=self._valid_rows(mode))
 
     def recommend_by_constraints(self, constraints: UserConstraints, top_k: int = 10) -> List[Tuple[str, float]]:
-        return recommend_by_constraints(self.df_agg, self.df_traits, constraints, top_k=top_k)
+        # to samo co recommend_by_constraints(df_agg, df_traits, ...), ale odczyt z ConstraintIndex
+        with _stage("constraint_scoring"):
+            idx, scores = self.constraint_index.top(constraints, top_k)
+        return [(self.plant_names[i], float(s)) for i, s in zip(idx, scores)]
 
     def hybrid_recommend(
         self,
@@ -389,14 +1343,20 @@ class PlantRecommender: #Wysokopoziomowy wrapper, żeby w apce nie bawić się w
         constraints: Optional[UserConstraints] = None,
         alpha: float = 0.6,
         top_k: int = 10,
+        mode: str = "tfidf",
     ) -> List[Tuple[str, float]]:
-        return hybrid_recommend(
-            seed_plants,
-            self.matrix,
-            self.plant_names,
-            self.df_agg,
-            self.df_traits,
-            constraints,
-            alpha,
-            top_k,
-        )
+        # to samo co hybrid_recommend(...), ale wyniki ograniczeń to gotowy wektor z ConstraintIndex
+        matrix = self._similarity_matrix(mode)
+        sims = get_similar_plants(seed_plants, matrix, self.plant_names, top_k=len(self.plant_names), exclude_seeds=True,
+                                  name_index=self.name_index, valid_rows=self._valid_rows(mode))
+        if not constraints:
+            return sims[:top_k]
+        with _stage("constraint_scoring"):
+            cscores = self.constraint_index.score_vector(constraints)[
+                np.fromiter((self._name_index[name] for name, _ in sims), dtype=np.int64, count=len(sims))
+            ]
+            sim = np.fromiter((sim for _, sim in sims), dtype=np.float64, count=len(sims))
+            keep = np.flatnonzero(cscores != EXCLUDED_SCORE)
+            final = alpha * sim[keep] + (1 - alpha) * ((cscores[keep] / 2.0) / sum(WEIGHTS.values()))
+            order = np.argsort(-final, kind="stable")[:top_k]
+        return [(sims[keep[i]][0], float(final[i])) for i in order]
@@ -1,5 +1,14 @@
 # recommender_service.py
+import copy
+import hashlib
+import json
 import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
@@ -7,33 +16,230 @@ from typing import List, Optional
 # Używamy lokalnego modułu rekomendera (plik recommender_for_app.py)
 from recommender_for_app import (
     ensure_nltk_resources,
+    load_plant_embeddings,
     PlantRecommender,
+    SERVING_FORMAT,
+    set_stage_timer,
     UserConstraints,
 )
 
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Wspólne metryki (backend_app/metrics.py): czas requestów + etapy rekomendera pod /metrics
+sys.path.append(os.path.join(ROOT_DIR, "backend_app"))
+import metrics  # noqa: E402
+import profiling  # noqa: E402
+
 app = FastAPI()
+metrics.install(app, service="recommender")
+profiling.install(app, service="recommender")  # tylko przy PROFILING_ENABLED=1
+set_stage_timer(metrics.span)
 
 
 # Prosty healthcheck do sond w backendzie Node
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "loaded_at": _RECOMMENDER_LOADED_AT}
 
 # 1. Przy starcie serwisu ogarniamy NLTK + ładujemy model/rekomender
 ensure_nltk_resources()
 
 # Ścieżka do danych — użyjemy pliku z backend_app/data/plant_articles.json
-ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 DEFAULT_DATA = os.path.join(ROOT_DIR, "backend_app", "data", "plant_articles.json")
 DATA_PATH = os.getenv("PLANT_DATA_PATH", DEFAULT_DATA)
 
-RECOMMENDER = PlantRecommender.from_json(DATA_PATH)
+# Co ile sekund sprawdzamy, czy plik z danymi się zmienił (0 = hot reload wyłączony)
+RELOAD_INTERVAL = float(os.getenv("RECOMMENDER_RELOAD_INTERVAL", "5"))
+
+
+def _data_signature(path: str):
+    """(mtime, rozmiar) pliku z danymi albo None, gdy pliku chwilowo nie ma."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+# Budowanie modelu: liczba procesów (0 = wszystkie rdzenie) i tryb HashingVectorizer dla bardzo dużych korpusów
+BUILD_JOBS = int(os.getenv("RECOMMENDER_BUILD_JOBS", "1"))
+USE_HASHING = os.getenv("RECOMMENDER_HASHING", "0") == "1"
+# Tryb serwowania: float32 tf-idf bez vectorizera i surowych artykułów w pamięci (opcjonalnie top-N termów na roślinę)
+COMPACT = os.getenv("RECOMMENDER_COMPACT", "0") == "1"
+TOP_TERMS = int(os.getenv("RECOMMENDER_TOP_TERMS", "0")) or None
+# Hot reload przyrostowo: gdy do pliku tylko dopisano artykuły na końcu, PlantRecommender.add_articles
+# zamiast pełnej budowy (nie dotyczy trybów compact/hashing/shared - tam model nie ma treści ani liczności)
+INCREMENTAL = os.getenv("RECOMMENDER_INCREMENTAL", "0") == "1"
+FULL_REBUILD_EVERY = os.getenv("RECOMMENDER_FULL_REBUILD_EVERY")
+# Embeddingi roślin z backend_app/compute_plant_embeddings.py (tryb mode="embedding"); brak pliku = tylko tf-idf
+DEFAULT_EMBEDDINGS = os.path.join(ROOT_DIR, "backend_app", "data", "plant_embeddings.npz")
+EMBEDDINGS_PATH = os.getenv("PLANT_EMBEDDINGS_PATH", DEFAULT_EMBEDDINGS)
+
+
+# Tryb wielu workerów (uvicorn --workers N): model budowany raz, zapisywany do RECOMMENDER_SHARED_DIR
+# i mapowany (mmap, tylko do odczytu) przez każdy worker -> N workerów, jedna kopia macierzy w RAM.
+# Brak zmiennej = każdy proces buduje własny model jak dotąd.
+SHARED_DIR = os.getenv("RECOMMENDER_SHARED_DIR")
+
+
+def _incremental_enabled() -> bool:
+    return INCREMENTAL and not (COMPACT or SHARED_DIR or USE_HASHING)
+
+
+def _build_local_recommender() -> PlantRecommender:
+    recommender = PlantRecommender.from_json(
+        DATA_PATH, n_jobs=BUILD_JOBS, use_hashing=USE_HASHING, incremental=_incremental_enabled()
+    )
+    if FULL_REBUILD_EVERY is not None:
+        recommender.full_rebuild_every = int(FULL_REBUILD_EVERY)
+    if COMPACT or SHARED_DIR:
+        recommender.compact(top_n_terms=TOP_TERMS)
+    if os.path.exists(EMBEDDINGS_PATH):
+        recommender.attach_embeddings(*load_plant_embeddings(EMBEDDINGS_PATH))
+    return recommender
+
+
+@contextmanager
+def _exclusive_lock(path: str):
+    """Blokada międzyprocesowa na pliku (fcntl na Linux/macOS, msvcrt na Windows)."""
+    with open(path, "a+") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK poddaje się po ~10 s, czekamy dalej
+                    time.sleep(0.5)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _shared_version() -> str:
+    """Klucz wersji modelu: dane, embeddingi i ustawienia budowania (inne ustawienia = inny katalog)."""
+    key = [SERVING_FORMAT, os.path.abspath(DATA_PATH), _data_signature(DATA_PATH),
+           os.path.abspath(EMBEDDINGS_PATH), _data_signature(EMBEDDINGS_PATH), USE_HASHING, TOP_TERMS]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()[:16]
+
+
+def _load_shared_recommender() -> PlantRecommender:
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    version_dir = os.path.join(SHARED_DIR, _shared_version())
+    # pierwszy worker buduje i zapisuje, pozostałe czekają na blokadzie i tylko mapują gotowe pliki
+    with _exclusive_lock(os.path.join(SHARED_DIR, ".lock")):
+        if not os.path.exists(os.path.join(version_dir, "meta.json")):
+            tmp_dir = f"{version_dir}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            _build_local_recommender().save_serving(tmp_dir)
+            shutil.rmtree(version_dir, ignore_errors=True)
+            os.replace(tmp_dir, version_dir)
+            print(f"[recommender] built shared model {version_dir}")
+            # stare wersje: na Linuksie workery, które je jeszcze mapują, zachowują dostęp do usuniętych plików
+            for name in os.listdir(SHARED_DIR):
+                old = os.path.join(SHARED_DIR, name)
+                if old != version_dir and os.path.isdir(old):
+                    shutil.rmtree(old, ignore_errors=True)
+    return PlantRecommender.load_serving(version_dir)
+
+
+def _build_recommender() -> PlantRecommender:
+    if SHARED_DIR:
+        return _load_shared_recommender()
+    return _build_local_recommender()
+
+
+RECOMMENDER = _build_recommender()
+_RECOMMENDER_SIGNATURE = _data_signature(DATA_PATH)
+_RECOMMENDER_LOADED_AT = time.time()
+_RELOAD_LOCK = threading.Lock()
+
+
+def reload_recommender(force: bool = False) -> bool:
+    """
+    Buduje nowy PlantRecommender z DATA_PATH i podmienia referencję RECOMMENDER.
+    Stary model obsługuje requesty aż do momentu podmiany (przypisanie referencji jest atomowe),
+    a gdy budowanie się wywali, zostajemy przy starym modelu.
+    Zwraca True, jeśli model został podmieniony.
+    """
+    global RECOMMENDER, _RECOMMENDER_SIGNATURE, _RECOMMENDER_LOADED_AT
+    with _RELOAD_LOCK:  # tylko jeden rebuild naraz
+        signature = _data_signature(DATA_PATH)
+        if signature is None or (not force and signature == _RECOMMENDER_SIGNATURE):
+            return False
+        new_recommender = _incrementally_updated(RECOMMENDER) if _incremental_enabled() else None
+        if new_recommender is None:
+            new_recommender = _build_recommender()
+        RECOMMENDER = new_recommender
+        _RECOMMENDER_SIGNATURE = signature
+        _RECOMMENDER_LOADED_AT = time.time()
+        print(f"[recommender] reloaded model from {DATA_PATH}")
+        return True
+
+
+def _incrementally_updated(recommender: PlantRecommender) -> Optional[PlantRecommender]:
+    """
+    Kopia modelu z dopisanymi artykułami, jeśli plik różni się od modelu tylko nowymi rekordami na końcu;
+    None = plik zmieniony inaczej (usunięcia, edycje) -> pełna budowa.
+    """
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        articles = json.load(f)
+    known = list(zip(recommender.df_raw["plant_name"], recommender.df_raw["content"]))
+    if len(articles) < len(known) or [(a.get("plant_name"), a.get("content")) for a in articles[:len(known)]] != known:
+        return None
+    # płytka kopia: add_articles podmienia atrybuty, nie modyfikuje tablic, więc stary model działa dalej
+    updated = copy.copy(recommender)
+    changed = updated.add_articles(articles[len(known):])
+    print(f"[recommender] added {len(articles) - len(known)} articles incrementally ({len(changed)} plants)")
+    return updated
+
+
+def _watch_data_file():
+    while True:
+        time.sleep(RELOAD_INTERVAL)
+        try:
+            reload_recommender()
+        except Exception as e:
+            # np. plik zapisany w połowie -> sygnatura się nie zaktualizowała, spróbujemy w kolejnym cyklu
+            print(f"[recommender] reload failed, keeping previous model: {e}")
+
+
+@app.on_event("startup")
+def start_data_watcher():
+    if RELOAD_INTERVAL > 0:
+        threading.Thread(target=_watch_data_file, name="recommender-reload", daemon=True).start()
+
+
+@app.post("/reload")
+def trigger_reload():
+    """Ręczny rebuild w tle (np. po wgraniu nowego plant_articles.json); odpowiada od razu."""
+    def _run():
+        try:
+            reload_recommender(force=True)
+        except Exception as e:
+            print(f"[recommender] reload failed, keeping previous model: {e}")
+
+    threading.Thread(target=_run, name="recommender-reload-manual", daemon=True).start()
+    return {"status": "reloading"}
 
 
 # ---------- MODELE REQUESTÓW/RESPONSÓW ----------
 
 class SimilarRequest(BaseModel):
     seed_plants: List[str]
+    mode: str = "tfidf"  # "tfidf" albo "embedding" (embeddingi MiniLM z plant_documents)
+    with_seeds: bool = False  # True -> {"recommendations": [...], "seeds": [jak rozpoznano każdy seed]}
     top_k: int = 10 #tutaj to top k możemy też w sumie dać jako user input później w apce, ale no niech zostanie bazowo 10 np (wtedy ważne że jak będzie okienko w apce to żeby się pokazywało 10 i user może to zmienić)
 
 
@@ -49,6 +255,19 @@ class ConstraintsRequest(BaseModel):
 #tutaj ten nasz seed to będą wszystkie rośliny które użytkownik będzie miał w kolekcji
 class HybridRequest(ConstraintsRequest):
     seed_plants: List[str]
+    mode: str = "tfidf"
+    with_seeds: bool = False
+
+
+def _recommendations(results, recommender: PlantRecommender, req):
+    body = [
+        {"plant_name": name, "score": score}
+        for name, score in results
+    ]
+    if not req.with_seeds:
+        return body
+    # seedy rozpoznane przez PlantNameIndex (alias/fuzzy) i te pominięte (plant_name=None)
+    return {"recommendations": body, "seeds": [asdict(m) for m in recommender.resolve_seeds(req.seed_plants)]}
 
 
 # ---------- ENDPOINTY ----------
@@ -60,21 +279,21 @@ class HybridRequest(ConstraintsRequest):
 
 @app.post("/recommend/similar")
 def recommend_similar(req: SimilarRequest):
+    recommender = RECOMMENDER  # ta sama wersja modelu do wyników i seedów mimo przeładowania
     try:
-        results = RECOMMENDER.similar_plants(
-            seed_plants=req.seed_plants,
-            top_k=req.top_k,
-        )
+        with profiling.section():
+            results = recommender.similar_plants(
+                seed_plants=req.seed_plants,
+                top_k=req.top_k,
+                mode=req.mode,
+            )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         # fallback to 500 but with a clear message
         raise HTTPException(status_code=500, detail=f"similar failed: {e}")
 
-    return [
-        {"plant_name": name, "score": score}
-        for name, score in results
-    ]
+    return _recommendations(results, recommender, req)
 
 
 #dalej w krokach mamy opcje z constraiuntam,i - je user będzie sam podawał
@@ -88,10 +307,11 @@ def recommend_constraints(req: ConstraintsRequest):
         pets_safe=req.pets_safe,
         difficulty=req.difficulty,
     )
-    results = RECOMMENDER.recommend_by_constraints(
-        constraints=constraints,
-        top_k=req.top_k,
-    )
+    with profiling.section():
+        results = RECOMMENDER.recommend_by_constraints(
+            constraints=constraints,
+            top_k=req.top_k,
+        )
     return [
         {"plant_name": name, "score": score}
         for name, score in results
@@ -107,18 +327,18 @@ def recommend_hybrid(req: HybridRequest):
         pets_safe=req.pets_safe,
         difficulty=req.difficulty,
     )
+    recommender = RECOMMENDER
     try:
-        results = RECOMMENDER.hybrid_recommend(
-            seed_plants=req.seed_plants,
-            constraints=constraints,
-            top_k=req.top_k,
-        )
+        with profiling.section():
+            results = recommender.hybrid_recommend(
+                seed_plants=req.seed_plants,
+                constraints=constraints,
+                top_k=req.top_k,
+                mode=req.mode,
+            )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"hybrid failed: {e}")
 
-    return [
-        {"plant_name": name, "score": score}
-        for name, score in results
-    ]
+    return _recommendations(results, recommender, req)
@@ -7,13 +7,16 @@ from dotenv import load_dotenv
 from sentence_transformers import SentenceTransformer
 import google.generativeai as genai
 from langchain_text_splitters import CharacterTextSplitter
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import List
-import psycopg2
-from psycopg2.extras import Json
+from typing import List, Optional
 from rag_service import retrieve_relevant_chunks
+import metrics
+import profiling
+from llm_client import GeminiClient, LLMOverloaded, LLMUnavailable
+from ingest_jobs import IngestJobManager
+from conversations import ConversationNotFound, ConversationStore, extractive_summary, summary_prompt
 
 # ------------------ Setup & load once at startup ------------------
 env_path = Path(__file__).parent.parent / '.env'
@@ -23,18 +26,25 @@ print(f"DB Config: host={os.getenv('DB_HOST')}, port={os.getenv('DB_PORT')}, db=
 
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-# Database connection
-def get_db_connection():
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=int(os.getenv("DB_PORT", "5433")),
-        database=os.getenv("DB_NAME", "plant_app_db"),
-        user=os.getenv("DB_USER", "postgres"),
-        password=os.getenv("DB_PASSWORD")
-    )
-
 embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
 gemini_model = genai.GenerativeModel("gemini-2.5-flash-lite")
+# Deadlines, admission control, hedging and circuit breaker around Gemini (GEMINI_* env, see llm_client.py)
+llm = GeminiClient.from_env(gemini_model)
+
+FALLBACK_ANSWER = ("The assistant is temporarily unavailable. "
+                   "These articles look most relevant to your question:")
+
+def summarize_turns(summary: str, turns: List[tuple]) -> str:
+    """Fold older turns into a conversation's rolling summary; extractive when Gemini is unavailable."""
+    try:
+        text = llm.generate(summary_prompt(summary, turns))
+    except LLMUnavailable as e:
+        print(f"Gemini unavailable for the conversation summary: {e}")
+        text = ""
+    return (text or "").strip() or extractive_summary(summary, turns)
+
+# Recent turns + rolling summary per conversation, cached in memory (CHAT_* env, see conversations.py)
+conversations = ConversationStore(summarize_turns)
 
 # ------------------ FastAPI models ------------------
 class Turn(BaseModel):
@@ -44,7 +54,8 @@ class Turn(BaseModel):
 class ChatRequest(BaseModel):
     message: str = Field(..., description="User question")
     k: int = 5
-    history: List[Turn] = Field(default_factory=list)
+    conversation_id: Optional[int] = Field(None, description="Use and extend this conversation's stored history")
+    history: List[Turn] = Field(default_factory=list, description="Previous turns when no conversation_id is given")
 
 class Source(BaseModel):
     plant_name: str
@@ -54,6 +65,8 @@ class Source(BaseModel):
 class ChatResponse(BaseModel):
     answer: str
     sources: List[Source]
+    degraded: bool = False  # True when Gemini was unavailable and only sources are returned
+    message_id: Optional[int] = None  # stored messages row, with conversation_id
 
 # ------------------ FastAPI app ------------------
 app = FastAPI(title="RAG Plant Chatbot API", version="1.0.0")
@@ -67,51 +80,74 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request timing middleware + Prometheus /metrics (see metrics.py)
+metrics.install(app, service="rag")
+# Opt-in per-request profiles (PROFILING_ENABLED=1, see profiling.py)
+profiling.install(app, service="rag")
+
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
 
-@app.post("/api/initialize")
-def initialize_embeddings():
-    """Initialize embeddings from JSON and store in PostgreSQL using ingest_data.py"""
-    try:
-        # Don't import and call initDb.js from here - it should already be initialized
-        # Just load the plant data
-        from ingest_data import load_and_store_articles
-        
-        # Clear existing embeddings
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM plant_documents")
-        conn.commit()
-        
-        # Load and store new articles
-        count = load_and_store_articles()
-        
-        # Get total count of stored chunks
-        cursor.execute("SELECT COUNT(*) as chunk_count FROM plant_documents")
-        result = cursor.fetchone()
-        total_chunks = result[0] if result else 0
-        
-        cursor.close()
-        conn.close()
-        
-        return {"status": "success", "message": "Articles loaded successfully", "count": total_chunks}
-    except Exception as e:
-        return {"status": "error", "message": str(e), "count": 0}
-
-def build_prompt(query: str, context_chunks: List[dict], chat_history: List[dict]):
+def _rebuild_index(*args, **kwargs):
+    # imported on first use: ingest_data loads its own embedding model
+    from ingest_data import rebuild_index
+    return rebuild_index(*args, **kwargs)
+
+# Index rebuilds run in the background; chat keeps serving the old rows until the swap
+ingest_jobs = IngestJobManager(_rebuild_index)
+
+class InitializeRequest(BaseModel):
+    # the corpus is ingest_data.INGEST_JSON_PATH, never a path from the request
+    dedup: Optional[bool] = None  # default: INGEST_DEDUP
+
+def _job_or_404(job_id: str):
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingest job")
+    return job
+
+@app.post("/api/initialize", status_code=202)
+def initialize_embeddings(response: Response, req: Optional[InitializeRequest] = None):
+    """Start rebuilding plant_documents from INGEST_JSON_PATH (ingest_data.rebuild_index) as a background job.
+
+    Returns the job at once (or the one already queued/running); poll
+    GET /api/initialize/{job_id} for progress.
+    """
+    req = req or InitializeRequest()
+    job, created = ingest_jobs.submit(dedup=req.dedup)
+    response.headers["Location"] = f"/api/initialize/{job.id}"
+    return {**job.to_dict(), "created": created}
+
+@app.get("/api/initialize")
+def list_ingest_jobs():
+    return {"jobs": [job.to_dict() for job in ingest_jobs.list()]}
+
+@app.get("/api/initialize/{job_id}")
+def ingest_job_status(job_id: str):
+    return _job_or_404(job_id).to_dict()
+
+@app.delete("/api/initialize/{job_id}")
+def cancel_ingest_job(job_id: str):
+    """Cancel a queued or running job; plant_documents keeps its current rows."""
+    job = _job_or_404(job_id)
+    if job.status not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+    return ingest_jobs.cancel(job_id).to_dict()
+
+def build_prompt(query: str, context_chunks: List[dict], chat_history: List[dict], summary: str = ""):
     context = "\n\n".join(
         f"Title: {c['title']}\nURL: {c['url']}\nText: {c['text']}"
         for c in context_chunks
     )
     history_str = "\n".join(f"User: {h['user']}\nAssistant: {h['assistant']}" for h in chat_history)
+    summary_str = f"Summary of the earlier conversation:\n{summary}\n" if summary else ""
     prompt = f"""You are a helpful plant care assistant.
 Use ONLY the context below to answer the question. If the answer is not in the context, reply exactly: "I don't know".
 When you see US units (inches, feet, Fahrenheit, etc.), convert them to European metric units in your answer.
 If the plant was not mentioned in the question, use the plant stated in the previous questions - in the chat history.
 If you need any clarification, ask the user for more details.
-Chat history so far:
+{summary_str}Chat history so far:
 {history_str}
 
 Context:
@@ -123,6 +159,27 @@ Answer:"""
 
 @app.post("/api/chat", response_model=ChatResponse)
 def chat(req: ChatRequest):
+    with profiling.section():
+        return _chat(req)
+
+def _overloaded():
+    return HTTPException(status_code=503, detail="Chat is overloaded, please retry shortly",
+                         headers={"Retry-After": "2"})
+
+def _chat(req: ChatRequest):
+    # Shed load before embedding/DB work when the Gemini queue is already full
+    if not llm.can_admit():
+        raise _overloaded()
+
+    if req.conversation_id is not None:
+        try:
+            state = conversations.get(req.conversation_id)
+        except ConversationNotFound:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        history, summary = state.history(), state.summary
+    else:
+        history, summary = [{"user": t.user, "assistant": t.assistant} for t in req.history], ""
+
     # Use pgvector-based retrieval from rag_service
     chunks = retrieve_relevant_chunks(req.message, top_k=req.k)
     
@@ -137,13 +194,23 @@ def chat(req: ChatRequest):
         for c in chunks
     ]
     
-    prompt = build_prompt(
-        query=req.message,
-        context_chunks=formatted_chunks,
-        chat_history=[{"user": t.user, "assistant": t.assistant} for t in req.history]
-    )
-    response = gemini_model.generate_content(prompt)
-    answer = response.text or "I don't know"
+    with metrics.span("prompt_build"):
+        prompt = build_prompt(
+            query=req.message,
+            context_chunks=formatted_chunks,
+            chat_history=history,
+            summary=summary
+        )
+    degraded = False
+    try:
+        with metrics.span("gemini"):
+            answer = llm.generate(prompt) or "I don't know"
+    except LLMOverloaded:
+        raise _overloaded()
+    except LLMUnavailable as e:
+        # timeout, upstream error or open circuit breaker: answer with the retrieved sources only
+        print(f"Gemini unavailable, returning sources only: {e}")
+        answer, degraded = FALLBACK_ANSWER, True
 
     # Unique sources from returned chunks
     seen = set()
@@ -154,4 +221,13 @@ def chat(req: ChatRequest):
             seen.add(key)
             sources.append(Source(plant_name=c["plant_name"], title=c["title"], url=c["url"]))
 
-    return ChatResponse(answer=answer, sources=sources)
+    # degraded answers are only a pointer to the sources; keep them out of the history
+    message_id = None
+    if req.conversation_id is not None and not degraded:
+        try:
+            stored_sources = [{"plant_name": s.plant_name, "title": s.title, "url": s.url} for s in sources]
+            message_id = conversations.append(req.conversation_id, req.message, answer, stored_sources)
+        except ConversationNotFound:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+    return ChatResponse(answer=answer, sources=sources, degraded=degraded, message_id=message_id)
@@ -0,0 +1,106 @@
+"""
+Compute one 384-d embedding per catalogue plant: the mean of its plant_documents chunk
+embeddings (all-MiniLM-L6-v2, written by ingest_data.py).
+
+The vectors are upserted into plant_embeddings, copied onto user plants
+(plants.embedding, matched by species) and optionally exported to an .npz file that the
+recommender service loads for its mode="embedding" similarity (PLANT_EMBEDDINGS_PATH).
+
+    python compute_plant_embeddings.py                       # DB only
+    python compute_plant_embeddings.py --export data/plant_embeddings.npz
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import psycopg2
+from dotenv import load_dotenv
+
+env_path = Path(__file__).parent.parent / '.env'
+load_dotenv(dotenv_path=env_path)
+
+DEFAULT_EXPORT = os.path.join(os.path.dirname(__file__), 'data', 'plant_embeddings.npz')
+
+
+def get_db_connection():
+    """Get a PostgreSQL database connection."""
+    return psycopg2.connect(
+        host=os.getenv('DB_HOST'),
+        port=os.getenv('DB_PORT'),
+        database=os.getenv('DB_NAME'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD')
+    )
+
+
+def refresh_plant_embeddings(conn) -> int:
+    """Average chunk embeddings per plant inside Postgres (pgvector AVG) and upsert them."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO plant_embeddings (plant_name, embedding, n_chunks, updated_at)
+            SELECT plant_name, AVG(embedding), COUNT(*), NOW()
+            FROM plant_documents
+            WHERE embedding IS NOT NULL
+            GROUP BY plant_name
+            ON CONFLICT (plant_name) DO UPDATE
+            SET embedding = EXCLUDED.embedding,
+                n_chunks = EXCLUDED.n_chunks,
+                updated_at = EXCLUDED.updated_at
+        """)
+        upserted = cursor.rowcount
+        # plants no longer present in plant_documents
+        cursor.execute("""
+            DELETE FROM plant_embeddings e
+            WHERE NOT EXISTS (SELECT 1 FROM plant_documents d WHERE d.plant_name = e.plant_name)
+        """)
+    conn.commit()
+    return upserted
+
+
+def fill_user_plants(conn) -> int:
+    """Copy the catalogue embedding onto user plants whose species matches a catalogue plant."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE plants p
+            SET embedding = e.embedding
+            FROM plant_embeddings e
+            WHERE lower(p.species) = lower(e.plant_name)
+        """)
+        updated = cursor.rowcount
+    conn.commit()
+    return updated
+
+
+def export_embeddings(conn, path: str) -> int:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT plant_name, embedding::text FROM plant_embeddings ORDER BY plant_name")
+        rows = cursor.fetchall()
+    names = np.array([name for name, _ in rows])
+    # pgvector text format: "[0.1,0.2,...]"
+    vectors = np.array([np.fromstring(vec.strip('[]'), sep=',') for _, vec in rows], dtype=np.float32)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez(path, plant_names=names, embeddings=vectors.reshape(len(rows), -1))
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--export', nargs='?', const=DEFAULT_EXPORT, default=None,
+                        help=f'also write names + vectors to an .npz file (default: {DEFAULT_EXPORT})')
+    parser.add_argument('--skip-user-plants', action='store_true', help='do not update plants.embedding')
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        print(f"Upserted {refresh_plant_embeddings(conn)} plant embeddings")
+        if not args.skip_user_plants:
+            print(f"Updated embedding of {fill_user_plants(conn)} user plants")
+        if args.export:
+            print(f"Exported {export_embeddings(conn, args.export)} embeddings to {args.export}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
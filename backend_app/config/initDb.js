@@ -82,6 +82,15 @@ const createTables = async () => {
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
       );
 
+      -- Embedding gatunku = średnia embeddingów jego chunków z plant_documents
+      -- (backend_app/compute_plant_embeddings.py), źródło dla plants.embedding
+      CREATE TABLE IF NOT EXISTS plant_embeddings (
+        plant_name VARCHAR(255) PRIMARY KEY,
+        embedding vector(384) NOT NULL,
+        n_chunks INTEGER NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+      );
+
       -- User plant collection table (for images of plants)
       CREATE TABLE IF NOT EXISTS plants (
           id SERIAL PRIMARY KEY,
@@ -97,6 +106,13 @@ const createTables = async () => {
         -- Ensure new columns exist when upgrading
         ALTER TABLE plants ADD COLUMN IF NOT EXISTS species VARCHAR(255);
         ALTER TABLE plants ADD COLUMN IF NOT EXISTS notes TEXT;
+        -- Wyniki klasyfikatora zdjęć (backend_app/models/classify_uploads.py)
+        ALTER TABLE plants ADD COLUMN IF NOT EXISTS predicted_class INTEGER;
+        ALTER TABLE plants ADD COLUMN IF NOT EXISTS predicted_label VARCHAR(255);
+        ALTER TABLE plants ADD COLUMN IF NOT EXISTS prediction_confidence REAL;
+        -- Rolling summary of older turns, kept by the RAG service (backend_app/conversations.py)
+        ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary TEXT;
+        ALTER TABLE conversations ADD COLUMN IF NOT EXISTS summary_message_id INTEGER;
 
 
       CREATE INDEX IF NOT EXISTS idx_plants_user_id ON plants(user_id);
@@ -133,6 +149,21 @@ const createTables = async () => {
 
     `);
 
+    // Indeksy na skompresowanych kopiach embeddingów dla RAG_RETRIEVAL_MODE=halfvec|binary
+    // (backend_app/rag_service.py): wyrażenia, bez dodatkowych kolumn. Wymaga pgvector >= 0.7,
+    // na starszym tylko ostrzeżenie - tryb exact działa dalej. Skan HNSW zwraca najwyżej
+    // hnsw.ef_search wierszy (domyślnie 40), więc rag_service ustawia je (SET LOCAL) na liczbę kandydatów.
+    try {
+      await pool.query(`
+        CREATE INDEX IF NOT EXISTS plant_documents_embedding_halfvec_idx
+          ON plant_documents USING hnsw ((embedding::halfvec(384)) halfvec_ip_ops);
+        CREATE INDEX IF NOT EXISTS plant_documents_embedding_bit_idx
+          ON plant_documents USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops);
+      `);
+    } catch (error) {
+      console.warn('⚠ Quantised embedding indexes not created (pgvector >= 0.7 needed):', error.message);
+    }
+
     // Analyze table for better query planning
     await pool.query('ANALYZE plant_documents;');
 
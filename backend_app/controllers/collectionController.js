@@ -1,6 +1,46 @@
 const pool = require('../config/database');
 const multer = require('multer');
 const path = require('path');
+const fs = require('fs');
+const { spawn } = require('child_process');
+
+const backendDir = path.join(__dirname, '..');
+const uploadsDir = path.join(backendDir, 'uploads');
+const derivedDir = path.join(uploadsDir, 'derived');
+
+// Python z venv, jeśli istnieje (jak w ragController)
+const pythonCmd = [
+    path.join(backendDir, '..', '.venv', 'Scripts', 'python.exe'),
+    path.join(backendDir, 'venv', 'Scripts', 'python.exe'),
+    path.join(backendDir, '.venv', 'Scripts', 'python.exe'),
+].find((p) => fs.existsSync(p)) || 'python';
+
+// Miniatura, wersja webowa i piksele 224x224 dla modelu (models/derivatives.py), w tle -
+// odpowiedź nie czeka; bez nich klient dostaje oryginał, a klasyfikator dekoduje zdjęcie
+const generateDerivatives = (filePath) => {
+    const child = spawn(pythonCmd, ['derivatives.py', filePath], {
+        cwd: path.join(backendDir, 'models'),
+        stdio: ['ignore', 'ignore', 'pipe'],
+        shell: false
+    });
+    child.stderr.on('data', (data) => console.error(`[derivatives] ${data.toString().trim()}`));
+    child.on('error', (err) => console.error('Derivatives process error:', err.message));
+    child.on('close', (code) => {
+        if (code !== 0) console.error(`Derivatives for ${filePath} failed (exit ${code})`);
+    });
+};
+
+// thumbnail_url / web_url, gdy pochodne już istnieją
+const withDerivatives = (plant) => {
+    if (!plant.image_url) return plant;
+    const stem = path.parse(plant.image_url).name;
+    const urls = {};
+    for (const [key, suffix] of [['thumbnail_url', 'thumb'], ['web_url', 'web']]) {
+        const file = `${stem}.${suffix}.webp`;
+        if (fs.existsSync(path.join(derivedDir, file))) urls[key] = `/uploads/derived/${file}`;
+    }
+    return { ...plant, ...urls };
+};
 
 // Configure multer for file uploads
 const storage = multer.diskStorage({
@@ -43,6 +83,7 @@ const addPlant = async (req, res) => {
             [userId, name, imageUrl, species, notes || null]
         );
 
+        generateDerivatives(path.join(uploadsDir, req.file.filename));
         res.status(201).json({ plant: result.rows[0] });
     } catch (err) {
         console.error('Add plant error:', err);
@@ -61,7 +102,7 @@ const getPlants = async (req, res) => {
             [userId]
         );
 
-        res.json({ plants: result.rows });
+        res.json({ plants: result.rows.map(withDerivatives) });
     } catch (err) {
         console.error('Get plants error:', err);
         res.status(500).json({ error: 'Database error' });
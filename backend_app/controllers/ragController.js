@@ -100,6 +100,8 @@ const startPythonRAG = () => {
   });
 };
 
+const INGEST_POLL_MS = 5000;
+
 // Initialize embeddings from JSON file to database
 const initializeEmbeddings = async () => {
   try {
@@ -131,8 +133,24 @@ const initializeEmbeddings = async () => {
           throw new Error(`HTTP ${response.status}`);
         }
 
-        const result = await response.json();
-        console.log(`✓ Initialized ${result.count} document chunks in database`);
+        // The rebuild runs as a background job in the Python service; poll until it ends
+        let job = await response.json();
+        console.log(`⏳ Ingest job ${job.job_id} started`);
+        while (['queued', 'running', 'swapping'].includes(job.status)) {
+          await new Promise(resolve => setTimeout(resolve, INGEST_POLL_MS));
+          const statusResponse = await fetch(`http://localhost:8000/api/initialize/${job.job_id}`);
+          if (!statusResponse.ok) {
+            throw new Error(`HTTP ${statusResponse.status}`);
+          }
+          job = await statusResponse.json();
+          console.log(`⏳ Ingest ${job.status}: ${job.articles_done}/${job.articles_total} articles, `
+            + `${job.chunks_stored} chunks (${job.chunks_per_s} chunks/s)`);
+        }
+        if (job.status !== 'succeeded') {
+          console.error(`⚠️  Ingest job ${job.job_id} ${job.status}${job.error ? `: ${job.error}` : ''}`);
+          return;
+        }
+        console.log(`✓ Initialized ${job.chunks_stored} document chunks in database`);
         return; // Success!
       } catch (error) {
         attempts++;
@@ -150,21 +168,36 @@ const initializeEmbeddings = async () => {
 };
 
 // Chat with RAG
+// With conversationId the Python service keeps the history (recent turns + rolling summary)
+// and stores the turn in messages; without it the user's chat_history is used as before.
 const chat = async (req, res) => {
   try {
-    const { message } = req.body;
+    const { message, conversationId } = req.body;
     const userId = req.user.id;
 
-    // Get recent chat history for context
-    const historyResult = await pool.query(
-      'SELECT message, response FROM chat_history WHERE user_id = $1 ORDER BY created_at DESC LIMIT 5',
-      [userId]
-    );
-
-    const history = historyResult.rows.reverse().map(row => ({
-      user: row.message,
-      assistant: row.response
-    }));
+    let body;
+    if (conversationId) {
+      const convCheck = await pool.query(
+        'SELECT id FROM conversations WHERE id = $1 AND user_id = $2',
+        [conversationId, userId]
+      );
+      if (convCheck.rows.length === 0) {
+        return res.status(404).json({ error: 'Conversation not found' });
+      }
+      body = { message, k: 5, conversation_id: Number(conversationId) };
+    } else {
+      // Get recent chat history for context
+      const historyResult = await pool.query(
+        'SELECT message, response FROM chat_history WHERE user_id = $1 ORDER BY created_at DESC LIMIT 5',
+        [userId]
+      );
+
+      const history = historyResult.rows.reverse().map(row => ({
+        user: row.message,
+        assistant: row.response
+      }));
+      body = { message, k: 5, history };
+    }
 
     // Call Python RAG service
     const ragResponse = await fetch('http://localhost:8000/api/chat', {
@@ -172,36 +205,34 @@ const chat = async (req, res) => {
       headers: {
         'Content-Type': 'application/json',
       },
-      body: JSON.stringify({
-        message,
-        k: 5,
-        history
-      }),
+      body: JSON.stringify(body),
     });
 
+    // Python sheds load with 503 when too many Gemini calls are queued - pass that on
+    if (ragResponse.status === 503) {
+      res.set('Retry-After', ragResponse.headers.get('retry-after') || '2');
+      return res.status(503).json({ error: 'Chat is busy, please retry in a moment' });
+    }
+
     if (!ragResponse.ok) {
       throw new Error(`RAG service error: ${ragResponse.status}`);
     }
 
     const ragData = await ragResponse.json();
 
-    // Save to chat history with sources
-    // old version 
-    // await pool.query(
-    //   'INSERT INTO chat_history (user_id, message, response, sources) VALUES ($1, $2, $3, $4)',
-    //   [userId, message, ragData.answer, JSON.stringify(ragData.sources)]
-    // );
-
-    // new 
-    
-    await pool.query(
-      'INSERT INTO messages (conversation_id, message, response, sources) VALUES ($1, $2, $3, $4)',
-      [conversationId, message, ragData.answer, JSON.stringify(ragData.sources)]
-    );
+    // degraded = Gemini unavailable, answer is only a pointer to the sources; keep it out of the history
+    if (!conversationId && !ragData.degraded) {
+      await pool.query(
+        'INSERT INTO chat_history (user_id, message, response, sources) VALUES ($1, $2, $3, $4)',
+        [userId, message, ragData.answer, JSON.stringify(ragData.sources)]
+      );
+    }
 
     res.json({
       message: ragData.answer,
-      sources: ragData.sources
+      sources: ragData.sources,
+      messageId: ragData.message_id,
+      degraded: Boolean(ragData.degraded)
     });
   } catch (error) {
     console.error('Chat error:', error);
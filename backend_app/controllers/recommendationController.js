@@ -57,7 +57,8 @@ const recommendSimilar = async (req, res) => {
     const response = await fetch(`${RECOMMENDER_URL}/recommend/similar`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ seed_plants, top_k }),
+      // with_seeds: rekomender zwraca też, jak rozpoznał każdą nazwę (alias / fuzzy / nierozpoznana)
+      body: JSON.stringify({ seed_plants, top_k, with_seeds: true }),
     });
 
     if (!response.ok) {
@@ -67,7 +68,7 @@ const recommendSimilar = async (req, res) => {
     }
 
     const data = await response.json();
-    res.json({ recommendations: data });
+    res.json({ recommendations: data.recommendations, seeds: data.seeds });
   } catch (err) {
     console.error('recommendSimilar error:', err.message);
     res.status(500).json({ error: 'Failed to get similar recommendations', details: err.message });
@@ -93,7 +94,7 @@ const recommendHybrid = async (req, res) => {
     }
 
     const constraints = buildConstraints(req.body);
-    const payload = { ...constraints, seed_plants };
+    const payload = { ...constraints, seed_plants, with_seeds: true };
     const response = await fetch(`${RECOMMENDER_URL}/recommend/hybrid`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
@@ -107,7 +108,7 @@ const recommendHybrid = async (req, res) => {
     }
 
     const data = await response.json();
-    res.json({ recommendations: data });
+    res.json({ recommendations: data.recommendations, seeds: data.seeds });
   } catch (err) {
     console.error('recommendHybrid error:', err.message);
     res.status(500).json({ error: 'Failed to get hybrid recommendations', details: err.message });
@@ -1,11 +1,14 @@
 const { spawn } = require('child_process');
 const path = require('path');
 const fs = require('fs');
+const os = require('os');
 
 let pythonProcess = null;
 
 const RECOMMENDER_PORT = process.env.RECOMMENDER_PORT || 8030; // zmieniony domyślny port aby uniknąć kolizji i blokad
 const RECOMMENDER_HOST = process.env.RECOMMENDER_HOST || '127.0.0.1';
+// >1: kilka procesów uvicorna; model budowany raz i współdzielony przez mmap (RECOMMENDER_SHARED_DIR)
+const RECOMMENDER_WORKERS = parseInt(process.env.RECOMMENDER_WORKERS || '1', 10);
 
 const possiblePythonPaths = (backendDir) => [
   path.join(backendDir, 'venv', 'Scripts', 'python.exe'),
@@ -37,11 +40,17 @@ const startRecommenderService = () => {
     const isWindows = process.platform === 'win32';
     const command = pythonCmd;
     const args = ['-m', 'uvicorn', 'recommender_service:app', '--port', `${RECOMMENDER_PORT}`, '--host', RECOMMENDER_HOST];
+    const env = { ...process.env };
+    if (RECOMMENDER_WORKERS > 1) {
+      args.push('--workers', `${RECOMMENDER_WORKERS}`);
+      env.RECOMMENDER_SHARED_DIR = env.RECOMMENDER_SHARED_DIR || path.join(os.tmpdir(), 'plant-recommender');
+    }
 
-    console.log(`Starting recommender service with Python: ${pythonCmd} on ${RECOMMENDER_HOST}:${RECOMMENDER_PORT}`);
+    console.log(`Starting recommender service with Python: ${pythonCmd} on ${RECOMMENDER_HOST}:${RECOMMENDER_PORT} (workers: ${RECOMMENDER_WORKERS})`);
 
     pythonProcess = spawn(command, args, {
       cwd: recommenderDir,
+      env,
       stdio: ['ignore', 'pipe', 'pipe'],
       shell: false,
     });
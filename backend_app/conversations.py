@@ -0,0 +1,194 @@
+"""
+Server-side conversation state for /api/chat (see app.py).
+
+With a conversation_id the client sends only the new message; the service keeps, per
+conversation, the last CHAT_RECENT_TURNS turns verbatim plus a rolling summary of
+everything older, so the request and the prompt stay the same size however long the
+conversation gets:
+
+    state = conversations.get(conversation_id)      # LRU cache, else loaded from Postgres
+    prompt = build_prompt(..., state.history(), summary=state.summary)
+    conversations.append(conversation_id, message, answer, sources)
+
+Turns are stored in the existing messages table; the summary and the id of the last
+message folded into it live in conversations.summary / conversations.summary_message_id
+(config/initDb.js). Folding runs on a background thread after the reply has been sent,
+using the ``summarize(summary, turns)`` callable given by app.py (Gemini, with
+extractive_summary as the fallback). The cache assumes this process is the only writer
+of a conversation's messages - the RAG service runs a single uvicorn worker.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+import psycopg2
+from psycopg2.extras import Json
+
+import db
+
+RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", "4"))
+TURN_MAX_CHARS = int(os.getenv("CHAT_TURN_MAX_CHARS", "1000"))
+SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", "1200"))
+CACHE_SIZE = int(os.getenv("CHAT_STATE_CACHE_SIZE", "256"))
+
+
+class ConversationNotFound(LookupError):
+    pass
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def summary_prompt(summary: str, turns: List[Tuple[str, str]], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Prompt asking Gemini to fold ``turns`` into the running ``summary``."""
+    turns_str = "\n".join(f"User: {_clip(u, TURN_MAX_CHARS)}\nAssistant: {_clip(a, TURN_MAX_CHARS)}"
+                          for u, a in turns)
+    return f"""Update the summary of a conversation between a user and a plant care assistant.
+Keep the plants the user owns or asked about, their conditions and problems, and advice already given.
+Write at most {max_chars} characters of plain text, no preamble.
+
+Current summary:
+{summary or "(none)"}
+
+New turns:
+{turns_str}
+
+Updated summary:"""
+
+
+def extractive_summary(summary: str, turns: List[Tuple[str, str]], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Summary without the LLM: the user's questions, oldest dropped first to fit ``max_chars``."""
+    lines = [line for line in (summary or "").split("\n") if line]
+    lines += [f"User asked: {_clip(' '.join(u.split()), 200)}" for u, _ in turns]
+    while lines and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ConversationState:
+    def __init__(self, conversation_id: int, summary: str = "", summary_message_id: int = 0, turns=()):
+        self.id = conversation_id
+        self.summary = summary
+        self.summary_message_id = summary_message_id
+        self.turns = list(turns)  # (message_id, user, assistant), oldest first, not yet in the summary
+        self.folding = False
+        self.lock = threading.Lock()
+
+    def history(self, recent_turns: int = RECENT_TURNS) -> List[dict]:
+        """The last ``recent_turns`` turns for build_prompt, each side clipped to CHAT_TURN_MAX_CHARS."""
+        with self.lock:
+            turns = self.turns[-recent_turns:] if recent_turns else []
+        return [{"user": _clip(u, TURN_MAX_CHARS), "assistant": _clip(a, TURN_MAX_CHARS)} for _, u, a in turns]
+
+
+class ConversationStore:
+    def __init__(self, summarize: Callable, recent_turns: int = RECENT_TURNS, cache_size: int = CACHE_SIZE,
+                 summary_max_chars: int = SUMMARY_MAX_CHARS):
+        self._summarize = summarize
+        self.recent_turns = recent_turns
+        self.cache_size = cache_size
+        self.summary_max_chars = summary_max_chars
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+        self.hits = self.misses = self.folds = 0
+
+    def get(self, conversation_id: int) -> ConversationState:
+        """Cached state of a conversation, loaded from Postgres on a miss; ConversationNotFound if none."""
+        with self._lock:
+            state = self._cache.get(conversation_id)
+            if state is not None:
+                self._cache.move_to_end(conversation_id)
+                self.hits += 1
+                return state
+            self.misses += 1
+        state = self._load(conversation_id)
+        with self._lock:
+            state = self._cache.setdefault(conversation_id, state)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return state
+
+    def evict(self, conversation_id: int):
+        with self._lock:
+            self._cache.pop(conversation_id, None)
+
+    def append(self, conversation_id: int, message: str, answer: str, sources) -> int:
+        """Store a turn in messages, add it to the cached state and fold old turns if needed; returns its id."""
+        state = self.get(conversation_id)
+        try:
+            with db.connection() as conn, conn.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO messages (conversation_id, message, response, sources) "
+                    "VALUES (%s, %s, %s, %s) RETURNING id",
+                    (conversation_id, message, answer, Json(sources)),
+                )
+                message_id = cursor.fetchone()[0]
+        except psycopg2.IntegrityError:
+            # conversation deleted since it was cached
+            self.evict(conversation_id)
+            raise ConversationNotFound(conversation_id)
+        with state.lock:
+            state.turns.append((message_id, message, answer))
+        self._schedule_fold(state)
+        return message_id
+
+    def stats(self) -> dict:
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses, "folds": self.folds}
+
+    def _load(self, conversation_id: int) -> ConversationState:
+        with db.connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT summary, summary_message_id FROM conversations WHERE id = %s", (conversation_id,))
+            row = cursor.fetchone()
+            if row is None:
+                raise ConversationNotFound(conversation_id)
+            summary, summary_message_id = row[0] or "", row[1] or 0
+            # older unsummarised messages (from before summaries existed) are left out
+            cursor.execute(
+                "SELECT id, message, response FROM messages WHERE conversation_id = %s AND id > %s "
+                "ORDER BY id DESC LIMIT %s",
+                (conversation_id, summary_message_id, 2 * self.recent_turns),
+            )
+            turns = list(reversed(cursor.fetchall()))
+        return ConversationState(conversation_id, summary, summary_message_id, turns)
+
+    def _schedule_fold(self, state: ConversationState):
+        with state.lock:
+            if state.folding or len(state.turns) <= self.recent_turns:
+                return
+            state.folding = True
+        self._executor.submit(self._fold, state)
+
+    def _fold(self, state: ConversationState):
+        """Move every turn but the last ``recent_turns`` into the summary (background thread)."""
+        folded = False
+        try:
+            with state.lock:
+                old = state.turns[:len(state.turns) - self.recent_turns]
+                summary = state.summary
+            if not old:
+                return
+            summary = self._summarize(summary, [(u, a) for _, u, a in old])
+            summary = summary[-self.summary_max_chars:] if len(summary) > self.summary_max_chars else summary
+            upto = old[-1][0]
+            with db.connection() as conn, conn.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE conversations SET summary = %s, summary_message_id = %s WHERE id = %s",
+                    (summary, upto, state.id),
+                )
+            with state.lock:
+                state.summary, state.summary_message_id = summary, upto
+                state.turns = [turn for turn in state.turns if turn[0] > upto]
+            self.folds += 1
+            folded = True
+        except Exception as e:
+            # turns stay unsummarised; history() still only sends the last recent_turns
+            print(f"Summarising conversation {state.id} failed: {e}")
+        finally:
+            with state.lock:
+                state.folding = False
+            if folded:
+                self._schedule_fold(state)  # turns that arrived meanwhile
@@ -0,0 +1,62 @@
+"""
+Pooled PostgreSQL connections for the RAG service.
+
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(...)
+
+One process-wide psycopg2 ThreadedConnectionPool (DB_POOL_MIN..DB_POOL_MAX connections,
+created on first use) instead of a new connection per request. When every connection is
+checked out, callers wait for one to come back rather than getting psycopg2's PoolError.
+connection() commits when the block succeeds, rolls back when it raises, and drops
+connections that broke instead of returning them to the pool.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+
+_pool = None
+_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_lock = threading.Lock()
+
+
+def get_pool() -> ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX,
+                    host=os.getenv("DB_HOST", "localhost"),
+                    port=int(os.getenv("DB_PORT", "5433")),
+                    database=os.getenv("DB_NAME", "plant_app_db"),
+                    user=os.getenv("DB_USER", "postgres"),
+                    password=os.getenv("DB_PASSWORD"),
+                )
+    return _pool
+
+
+@contextmanager
+def connection():
+    """A pooled connection for the duration of the block (commit on success, rollback on error)."""
+    pool = get_pool()
+    with _slots:
+        conn = pool.getconn()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=broken or bool(conn.closed))
@@ -0,0 +1,113 @@
+"""
+Near-duplicate detection for text chunks (MinHash + LSH), used by ingest_data.py to skip
+chunks that repeat text already ingested - the same article republished by several sites,
+scraped twice, or sharing boilerplate - before they are embedded and stored.
+
+    index = NearDuplicateIndex(threshold=0.8)
+    for text in chunks:
+        if index.add(text):        # False = near-duplicate of an earlier kept chunk
+            store(text)
+
+Each chunk is reduced to word 3-shingles, a 128-value MinHash signature estimates the
+Jaccard similarity between chunks, and LSH banding (16 bands x 8 rows) finds candidate
+pairs without comparing every chunk with every other; a candidate counts as a duplicate
+when its estimated Jaccard similarity is >= threshold. Exact repeats (after lower-casing
+and collapsing whitespace) are caught by a plain hash first.
+"""
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+_PRIME = np.uint64(4294967311)  # smallest prime > 2^32, so a * x fits in uint64 for 32-bit a, x
+_MAX_HASH = np.uint64(2 ** 32 - 1)
+
+
+def shingles(text: str, size: int = 3) -> np.ndarray:
+    """crc32 hashes of the word ``size``-grams of ``text`` (a single shingle for shorter texts)."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return np.array([zlib.crc32(" ".join(words).encode())], dtype=np.uint64)
+    grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """MinHash signatures with ``num_perm`` universal hash functions (a * x + b) mod p."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        values = (np.outer(hashes, self.a) % _PRIME + self.b) % _PRIME
+        return (values & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 16, shingle_size: int = 3):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self._exact: Dict[bytes, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+        self.checked = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def duplicate_of(self, text: str) -> Optional[int]:
+        """Id (insertion order among kept chunks) of a near-duplicate already in the index, or None."""
+        return self._find(text)[0]
+
+    def add(self, text: str) -> bool:
+        """Index ``text`` unless it duplicates a kept chunk; True when it was kept."""
+        self.checked += 1
+        match, digest, signature, band_keys = self._find(text)
+        if match is not None:
+            if signature is None:
+                self.exact_duplicates += 1
+            else:
+                self.near_duplicates += 1
+            return False
+        chunk_id = len(self._signatures)
+        self._exact[digest] = chunk_id
+        self._signatures.append(signature)
+        for band, key in zip(self._buckets, band_keys):
+            band.setdefault(key, []).append(chunk_id)
+        return True
+
+    def _find(self, text: str):
+        normalized = " ".join(text.lower().split())
+        digest = hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+        if digest in self._exact:
+            return self._exact[digest], digest, None, None
+        signature = self.hasher.signature(shingles(normalized, self.shingle_size))
+        band_keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+        candidates = {c for band, key in zip(self._buckets, band_keys) for c in band.get(key, ())}
+        for candidate in sorted(candidates):
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                return candidate, digest, signature, band_keys
+        return None, digest, signature, band_keys
+
+    @property
+    def kept(self) -> int:
+        return len(self._signatures)
+
+    def stats(self) -> dict:
+        dropped = self.exact_duplicates + self.near_duplicates
+        return {
+            "chunks": self.checked,
+            "kept": self.kept,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "dropped_ratio": round(dropped / self.checked, 4) if self.checked else 0.0,
+        }
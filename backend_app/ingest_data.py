@@ -1,10 +1,12 @@
 import os
+import sys
 import json
 import psycopg2
 import numpy as np
 from pathlib import Path
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
+from dedup import NearDuplicateIndex
 
 # Load environment variables from parent directory
 env_path = Path(__file__).parent.parent / '.env'
@@ -14,6 +16,21 @@ print(f"Loading .env from: {env_path}")
 print(f"DB_HOST: {os.getenv('DB_HOST')}")
 print(f"DB_PORT: {os.getenv('DB_PORT')}")
 
+# Corpus for rebuilds - a server-side setting only, POST /api/initialize does not take a path
+INGEST_JSON_PATH = os.getenv('INGEST_JSON_PATH', os.path.join(os.path.dirname(__file__), 'data', 'plant_articles.json'))
+# Near-duplicate filtering before embedding (see dedup.py), opt-in with INGEST_DEDUP=1. Off by default:
+# the bundled plant_articles.json has no near-duplicates, so it only adds time there (benchmarks/bench_dedup.py);
+# turn it on for scraped corpora where the same article is republished by several sites
+INGEST_DEDUP = os.getenv('INGEST_DEDUP', '0') == '1'
+INGEST_DEDUP_THRESHOLD = float(os.getenv('INGEST_DEDUP_THRESHOLD', '0.8'))
+
+# Rebuilds (rebuild_index) write here first and swap into plant_documents only at the end
+STAGING_TABLE = 'plant_documents_staging'
+DOCUMENT_COLUMNS = 'plant_name, article_title, article_url, chunk_text, embedding'
+
+class IngestCancelled(Exception):
+    """Raised by load_and_store_articles when should_stop() asks it to stop."""
+
 # Load the SentenceTransformer model
 embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
 
@@ -27,14 +44,15 @@ def get_db_connection():
         password=os.getenv('DB_PASSWORD')
     )
 
-def store_chunk_in_db(plant_name: str, article_title: str, article_url: str, chunk_text: str):
+def store_chunk_in_db(plant_name: str, article_title: str, article_url: str, chunk_text: str,
+                      table: str = 'plant_documents'):
     """Store a chunk with its embedding as vector type."""
     embedding = embedding_model.encode([chunk_text], convert_to_numpy=True)[0]
     
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO plant_documents (plant_name, article_title, article_url, chunk_text, embedding)
+    cursor.execute(f"""
+        INSERT INTO {table} ({DOCUMENT_COLUMNS})
         VALUES (%s, %s, %s, %s, %s::vector)
     """, (plant_name, article_title, article_url, chunk_text, embedding.tolist()))
     conn.commit()
@@ -51,28 +69,116 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> list:
         start += chunk_size - overlap
     return chunks
 
-def load_and_store_articles():
-    """Load articles from JSON file and store them in database with embeddings."""
-    json_path = os.path.join(os.path.dirname(__file__), 'data', 'plant_articles.json')
+def load_and_store_articles(json_path: str = None, dedup: bool = None, table: str = 'plant_documents',
+                            progress=None, should_stop=None):
+    """Load articles from JSON file (default: INGEST_JSON_PATH) and store them in database with embeddings.
+
+    With dedup (default INGEST_DEDUP, off) near-duplicate articles - the same text republished by
+    another site - are skipped first, then near-duplicate chunks, before anything is embedded.
+    Before every article progress(**counters) gets the counters for the articles finished so far
+    (articles_done of articles_total) and should_stop() is checked - IngestCancelled if true;
+    progress is called once more with the final counters. Returns the number of stored chunks.
+    """
+    if json_path is None:
+        json_path = INGEST_JSON_PATH
+    if dedup is None:
+        dedup = INGEST_DEDUP
     
     with open(json_path, 'r', encoding='utf-8') as f:
         articles = json.load(f)
     
-    for article in articles:
+    # Whole articles first: a republished copy with a different lead-in shifts every chunk
+    # boundary, so its chunks would not match the original's one by one
+    article_index = NearDuplicateIndex(INGEST_DEDUP_THRESHOLD) if dedup else None
+    chunk_index = NearDuplicateIndex(INGEST_DEDUP_THRESHOLD) if dedup else None
+    stored = skipped_chunks = skipped_articles = 0
+    
+    for done, article in enumerate(articles):
+        if should_stop is not None and should_stop():
+            raise IngestCancelled(f"stopped after {done} of {len(articles)} articles")
+        if progress is not None:
+            progress(articles_done=done, articles_total=len(articles), articles_skipped=skipped_articles,
+                     chunks_stored=stored, chunks_skipped=skipped_chunks)
         plant_name = article.get('plant_name', '')
         article_title = article.get('article_title', '')
         article_url = article.get('link', '') or article.get('article_url', '')
         content = article.get('content', '')
         
+        if article_index is not None and content.strip() and not article_index.add(content):
+            print(f"Skipped duplicate article for {plant_name}: {article_title}")
+            skipped_articles += 1
+            continue
+        
         # Chunk the content
         chunks = chunk_text(content)
         
         # Store each chunk with its embedding
         for chunk in chunks:
-            if chunk.strip():  # Only store non-empty chunks
-                store_chunk_in_db(plant_name, article_title, article_url, chunk)
-                print(f"Stored chunk for {plant_name}")
+            if not chunk.strip():  # Only store non-empty chunks
+                continue
+            if chunk_index is not None and not chunk_index.add(chunk):
+                skipped_chunks += 1
+                continue
+            store_chunk_in_db(plant_name, article_title, article_url, chunk, table)
+            stored += 1
+            print(f"Stored chunk for {plant_name}")
+    
+    if dedup:
+        print(f"Dedup articles: {article_index.stats()}")
+        print(f"Dedup chunks: {chunk_index.stats()}")
+    if progress is not None:
+        progress(articles_done=len(articles), articles_total=len(articles), articles_skipped=skipped_articles,
+                 chunks_stored=stored, chunks_skipped=skipped_chunks)
+    return stored
+
+def _execute(*statements):
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+def swap_in_staging():
+    """Replace plant_documents with the staging table's rows in one transaction.
+
+    Readers keep seeing the previous rows (MVCC) until the commit and never an empty or
+    half-filled table. Rows are copied rather than the tables renamed, so the id sequence,
+    the indexes from config/initDb.js and their names stay as they are.
+    """
+    _execute(
+        "DELETE FROM plant_documents",
+        f"INSERT INTO plant_documents ({DOCUMENT_COLUMNS}) SELECT {DOCUMENT_COLUMNS} FROM {STAGING_TABLE}",
+        f"DROP TABLE {STAGING_TABLE}",
+    )
+    _execute("ANALYZE plant_documents")
+
+def rebuild_index(json_path: str = None, dedup: bool = None, progress=None, should_stop=None):
+    """Ingest the corpus into STAGING_TABLE and atomically swap it in; chat keeps using the old rows meanwhile.
+
+    On cancellation (IngestCancelled) or any error the staging table is dropped and
+    plant_documents is left untouched. Returns the number of stored chunks.
+    """
+    _execute(
+        f"DROP TABLE IF EXISTS {STAGING_TABLE}",
+        f"CREATE TABLE {STAGING_TABLE} (LIKE plant_documents INCLUDING DEFAULTS)",
+    )
+    try:
+        stored = load_and_store_articles(json_path, dedup, STAGING_TABLE, progress, should_stop)
+        if should_stop is not None and should_stop():
+            raise IngestCancelled("stopped before the swap")
+    except BaseException:
+        _execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        raise
+    if progress is not None:
+        progress(phase="swapping")
+    swap_in_staging()
+    return stored
 
 if __name__ == "__main__":
-    load_and_store_articles()
+    # optional argument: path to another corpus, e.g. one from benchmarks/generate_corpus.py
+    load_and_store_articles(sys.argv[1] if len(sys.argv) > 1 else None)
     print("✓ All articles loaded and stored successfully")
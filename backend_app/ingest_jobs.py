@@ -0,0 +1,130 @@
+"""
+Background index rebuilds for POST /api/initialize (see app.py).
+
+The delete + chunk + embed + insert pipeline used to run inside the HTTP request, which
+timed out behind proxies on larger corpora and held a worker for minutes. Now a request
+only enqueues an IngestJob; one worker thread runs jobs one at a time through
+ingest_data.rebuild_index, which fills a staging table and swaps it into plant_documents
+in a single transaction, so /api/chat keeps answering from the previous index until then.
+
+    job = jobs.submit()            # or the already queued/running job
+    jobs.get(job.id).to_dict()     # status + progress counters
+    jobs.cancel(job.id)            # stops before the next article; old index kept
+
+Jobs live in this process only (the RAG service runs a single uvicorn worker); the last
+MAX_FINISHED_JOBS finished ones are kept for status queries.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+MAX_FINISHED_JOBS = 20
+ACTIVE_STATES = ("queued", "running", "swapping")
+
+
+class IngestJob:
+    def __init__(self, json_path: Optional[str] = None, dedup: Optional[bool] = None):
+        self.id = uuid.uuid4().hex
+        self.json_path = json_path
+        self.dedup = dedup
+        self.status = "queued"  # queued -> running -> swapping -> succeeded | failed | cancelled
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.counters = {"articles_done": 0, "articles_total": 0, "articles_skipped": 0,
+                         "chunks_stored": 0, "chunks_skipped": 0}
+        self._cancel = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATES
+
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def progress(self, phase: Optional[str] = None, **counters):
+        if phase is not None:
+            self.status = phase
+        self.counters.update(counters)
+
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "cancel_requested": self.cancel_requested(),
+            "error": self.error,
+            **self.counters,
+            "chunks_per_s": round(self.counters["chunks_stored"] / elapsed, 2) if elapsed else 0.0,
+            "elapsed_s": round(elapsed, 1),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestJobManager:
+    """Runs IngestJobs on a single background thread; at most one job is queued or running."""
+
+    def __init__(self, rebuild: Callable):
+        self._rebuild = rebuild  # ingest_data.rebuild_index
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, json_path: Optional[str] = None, dedup: Optional[bool] = None):
+        """Enqueue a rebuild; returns (job, created) - the active job and False if one exists."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.active:
+                    return job, False
+            job = IngestJob(json_path, dedup)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """Ask a job to stop; a queued or running job ends as "cancelled" with the old index kept.
+
+        A job that is already swapping finishes normally.
+        """
+        job = self._jobs.get(job_id)
+        if job is not None and job.status in ("queued", "running"):
+            job._cancel.set()
+        return job
+
+    def _run(self, job: IngestJob):
+        from ingest_data import IngestCancelled
+
+        job.started_at = time.time()
+        if job.cancel_requested():
+            job.status, job.finished_at = "cancelled", time.time()
+            return
+        job.status = "running"
+        try:
+            self._rebuild(job.json_path, job.dedup, progress=job.progress, should_stop=job.cancel_requested)
+            job.status = "succeeded"
+        except IngestCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+            print(f"Ingest job {job.id} failed: {job.error}")
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
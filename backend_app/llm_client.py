@@ -0,0 +1,234 @@
+"""
+Tail-latency control around the Gemini model used by app.py.
+
+GeminiClient(model).generate(prompt) adds:
+- a per-call deadline (also passed to the SDK as request_options.timeout),
+- admission control: at most ``max_concurrency`` calls in flight upstream, at most
+  ``max_queue`` callers waiting (up to ``max_queue_wait_s``) for a slot; everyone else
+  is rejected at once (LLMOverloaded -> HTTP 503) instead of piling up in the worker
+  threadpool,
+- optional hedging: if the first call has not answered after ``hedge_after`` seconds
+  (fixed, or "p95" of recent latencies) a second identical call is raced against it,
+- a circuit breaker: after ``breaker_failures`` consecutive timeouts/errors calls fail
+  fast (CircuitOpen) for ``breaker_reset_s``, then one trial call decides whether to close.
+
+A slot is released only when the upstream call really finishes (not when the caller
+gives up), so abandoned slow calls still count against the concurrency limit.
+
+Settings come from env (see from_env): GEMINI_TIMEOUT_S, GEMINI_MAX_CONCURRENCY,
+GEMINI_MAX_QUEUE, GEMINI_MAX_QUEUE_WAIT_S, GEMINI_HEDGE (off | p95 | seconds),
+GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_RESET_S.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class LLMUnavailable(Exception):
+    """No answer from the model; callers fall back to a degraded response."""
+
+
+class LLMOverloaded(LLMUnavailable):
+    """Rejected by admission control (too many calls in flight and queued)."""
+
+
+class LLMTimeout(LLMUnavailable):
+    pass
+
+
+class CircuitOpen(LLMUnavailable):
+    pass
+
+
+class Admission:
+    """Counting semaphore with a bounded wait queue."""
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def has_capacity(self) -> bool:
+        with self._cond:
+            return self.in_flight < self.limit or self.waiting < self.max_queue
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, timeout: float) -> bool:
+        with self._cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+            try:
+                if not self._cond.wait_for(lambda: self.in_flight < self.limit, timeout):
+                    return False
+                self.in_flight += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int, reset_s: float):
+        self.threshold = max(1, failures)
+        self.reset_s = reset_s
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self.opened_at >= self.reset_s else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_s or self._trial_running:
+                return False
+            self._trial_running = True  # half-open: exactly one trial call
+            return True
+
+    def abandon_trial(self):
+        """The half-open trial never reached the model (e.g. rejected by admission control)."""
+        with self._lock:
+            self._trial_running = False
+
+    def record(self, success: bool):
+        with self._lock:
+            self._trial_running = False
+            if success:
+                self.consecutive_failures = 0
+                self.opened_at = None
+                return
+            self.consecutive_failures += 1
+            if self.opened_at is not None or self.consecutive_failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class GeminiClient:
+    def __init__(
+        self,
+        model,
+        timeout_s: float = 20.0,
+        max_concurrency: int = 8,
+        max_queue: int = 16,
+        max_queue_wait_s: float = 5.0,
+        hedge_after=None,
+        breaker_failures: int = 5,
+        breaker_reset_s: float = 30.0,
+        hedge_min_samples: int = 20,
+    ):
+        self.model = model
+        self.timeout_s = timeout_s
+        self.max_queue_wait_s = max_queue_wait_s
+        self.hedge_after = hedge_after  # None, "p95" or seconds
+        self.hedge_min_samples = hedge_min_samples
+        self.admission = Admission(max_concurrency, max_queue)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_s)
+        self._latencies = deque(maxlen=200)
+        self._latency_lock = threading.Lock()
+        # primary + hedge per admitted call; abandoned calls keep their thread until the SDK returns
+        self._executor = ThreadPoolExecutor(max_workers=2 * self.admission.limit, thread_name_prefix="gemini")
+
+    @classmethod
+    def from_env(cls, model) -> "GeminiClient":
+        hedge = os.getenv("GEMINI_HEDGE", "off").strip().lower()
+        return cls(
+            model,
+            timeout_s=float(os.getenv("GEMINI_TIMEOUT_S", "20")),
+            max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("GEMINI_MAX_QUEUE", "16")),
+            max_queue_wait_s=float(os.getenv("GEMINI_MAX_QUEUE_WAIT_S", "5")),
+            hedge_after=None if hedge in ("", "off", "0") else ("p95" if hedge == "p95" else float(hedge)),
+            breaker_failures=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+            breaker_reset_s=float(os.getenv("GEMINI_BREAKER_RESET_S", "30")),
+        )
+
+    def can_admit(self) -> bool:
+        """Cheap pre-check so callers can shed load before doing retrieval work."""
+        return self.admission.has_capacity()
+
+    def _hedge_delay(self):
+        if self.hedge_after is None:
+            return None
+        if self.hedge_after != "p95":
+            return float(self.hedge_after)
+        with self._latency_lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _call(self, prompt, deadline):
+        remaining = max(0.1, deadline - time.monotonic())
+        start = time.monotonic()
+        response = self.model.generate_content(prompt, request_options={"timeout": remaining})
+        text = response.text
+        with self._latency_lock:
+            self._latencies.append(time.monotonic() - start)
+        return text
+
+    def _submit(self, prompt, deadline):
+        future = self._executor.submit(self._call, prompt, deadline)
+        future.add_done_callback(lambda _: self.admission.release())
+        return future
+
+    def generate(self, prompt: str) -> str:
+        if not self.breaker.allow():
+            raise CircuitOpen("Gemini circuit breaker is open")
+        deadline = time.monotonic() + self.timeout_s
+        if not self.admission.acquire(timeout=min(self.max_queue_wait_s, self.timeout_s)):
+            self.breaker.abandon_trial()
+            raise LLMOverloaded("too many concurrent Gemini calls")
+        try:
+            text = self._race(prompt, deadline)
+        except Exception:
+            self.breaker.record(False)
+            raise
+        self.breaker.record(True)
+        return text
+
+    def _race(self, prompt, deadline):
+        pending = {self._submit(prompt, deadline)}
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and hedge_delay < self.timeout_s:
+            done, _ = wait(pending, timeout=hedge_delay)
+            # the hedge needs its own slot; no free slot -> no hedge (never queue for it)
+            if not done and self.admission.try_acquire():
+                pending.add(self._submit(prompt, deadline))
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        # an upstream failure at the deadline is the SDK enforcing request_options.timeout
+        if error is not None and not pending and time.monotonic() < deadline:
+            raise LLMUnavailable(f"Gemini call failed: {error}") from error
+        raise LLMTimeout(f"no Gemini answer within {self.timeout_s:.1f} s")
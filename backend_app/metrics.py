@@ -0,0 +1,150 @@
+"""
+Minimal Prometheus-style latency metrics shared by the three FastAPI services
+(app.py, Recommendation_module/recommender_service.py, models/fastapi_pred.py).
+
+    import metrics
+    metrics.install(app, service="rag")          # timing middleware + GET /metrics
+
+    with metrics.span("gemini"):                 # per-stage histogram
+        response = gemini_model.generate_content(prompt)
+
+Exposed series (text exposition format 0.0.4, scrapeable by Prometheus):
+    http_request_duration_seconds{service,method,route,status}
+    stage_duration_seconds{service,stage}
+
+Kept dependency-free on purpose; values live in the process, so with several uvicorn
+workers each worker reports its own series.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a fixed tuple of label names."""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.service = "unknown"
+        self._metrics = []
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route, measured by the timing middleware.",
+    ("service", "method", "route", "status"),
+)
+STAGE_DURATION = REGISTRY.histogram(
+    "stage_duration_seconds",
+    "Latency of individual request stages (embedding, retrieval, model call, ...).",
+    ("service", "stage"),
+)
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_DURATION.observe(seconds, service=REGISTRY.service, stage=stage)
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block into stage_duration_seconds{stage=...} (also when it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def _route_template(request: Request) -> str:
+    # the matched path template (/items/{id}) keeps label cardinality bounded
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def install(app, service: str, path: str = "/metrics"):
+    """Add the timing middleware and a GET endpoint serving all metrics of this process."""
+    REGISTRY.service = service
+
+    @app.middleware("http")
+    async def record_request_duration(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            if request.url.path != path:
+                REQUEST_DURATION.observe(
+                    time.perf_counter() - start,
+                    service=service,
+                    method=request.method,
+                    route=_route_template(request),
+                    status=status,
+                )
+
+    @app.get(path, include_in_schema=False)
+    def metrics_endpoint():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    return app
@@ -0,0 +1,261 @@
+"""
+Offline bulk classification of uploaded plant photos, built on the fastapi_pred model/backend.
+
+Images are streamed from a directory, a manifest (one path per line) or the `plants` table
+(rows without a prediction yet), decoded in parallel threads (or read from the derived
+224px pixels when derivatives.py has processed the upload), classified in batches and the
+results written in bulk – to a JSONL file and/or back to `plants` (predicted_class,
+predicted_label, prediction_confidence). Re-running skips every input already written to all
+requested targets (listed in --out, and with --write-db already predicted in `plants`), so an
+interrupted run simply continues.
+
+Run from backend_app/models (same working directory as the API, so output/best_model.pth resolves):
+    python classify_uploads.py --dir ../uploads --out ../uploads/predictions.jsonl
+    python classify_uploads.py --from-db --write-db
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import torch
+
+import fastapi_pred as pred
+
+IMAGE_EXTENSIONS = pred.derivatives.IMAGE_EXTENSIONS
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def get_db_connection():
+    import psycopg2
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=BACKEND_DIR.parent / ".env")
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5433")),
+        database=os.getenv("DB_NAME", "plant_app_db"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD"),
+    )
+
+
+def image_url_for(path: str) -> str:
+    """The value the Node backend stores in plants.image_url for a file in uploads/."""
+    return f"/uploads/{os.path.basename(path)}"
+
+
+def iter_sources(args, is_done, counts: dict):
+    """Yields image paths still to classify; counts["skipped"] = inputs is_done(path) said were written."""
+    if args.from_db:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT image_url FROM plants WHERE predicted_class IS NULL AND image_url IS NOT NULL")
+        urls = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        conn.close()
+        paths = (os.path.join(args.uploads_dir, os.path.basename(url)) for url in urls)
+    elif args.manifest:
+        with open(args.manifest, encoding="utf-8") as f:
+            paths = [line.strip() for line in f if line.strip()]
+    else:
+        paths = (
+            os.path.join(args.dir, name)
+            for name in sorted(os.listdir(args.dir))
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        if is_done(path):
+            counts["skipped"] += 1
+            continue
+        yield path
+
+
+def already_done(out_path: str) -> set:
+    if not out_path or not os.path.exists(out_path):
+        return set()
+    with open(out_path, encoding="utf-8") as f:
+        return {json.loads(line)["path"] for line in f if line.strip()}
+
+
+def already_in_db(conn) -> set:
+    """image_urls whose plants rows already have a prediction (what write_db would overwrite)."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT DISTINCT image_url FROM plants WHERE predicted_class IS NOT NULL AND image_url IS NOT NULL")
+    urls = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return urls
+
+
+def done_check(args, db_conn):
+    """is_done(path) for resuming: written to every requested target (--out file and/or plants)."""
+    done_out = already_done(args.out) if args.out else None
+    # --from-db only selects rows without a prediction, so the table needs no second look
+    done_db = already_in_db(db_conn) if db_conn is not None and not args.from_db else None
+
+    def is_done(path: str) -> bool:
+        if done_out is None and done_db is None:
+            return False
+        return ((done_out is None or path in done_out) and
+                (done_db is None or image_url_for(path) in done_db))
+
+    return is_done
+
+
+def decode(path: str):
+    derived = pred.derivatives.load_model_pixels(path)
+    if derived is not None:
+        # fresh 224px pixels from derivatives.py: a ~35 KB lossless WebP instead of the full photo
+        return path, derived[1]["bytes"]["model"], pred.preprocess_pixels(derived[0])
+    with open(path, "rb") as f:
+        data = f.read()
+    return path, len(data), pred.decode_and_preprocess(data)
+
+
+def decoded_stream(paths, workers: int):
+    """Parallel decode with a bounded read-ahead window (keeps memory flat on huge folders)."""
+    window = max(1, workers) * 4
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decode") as pool:
+        pending = deque()
+        for path in paths:
+            pending.append(pool.submit(decode, path))
+            if len(pending) >= window:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+def write_db(conn, rows):
+    from psycopg2.extras import execute_values
+
+    cursor = conn.cursor()
+    execute_values(
+        cursor,
+        """
+        UPDATE plants AS p
+        SET predicted_class = v.predicted_class,
+            predicted_label = v.predicted_label,
+            prediction_confidence = v.prediction_confidence
+        FROM (VALUES %s) AS v(image_url, predicted_class, predicted_label, prediction_confidence)
+        WHERE p.image_url = v.image_url
+        """,
+        [(image_url_for(r["path"]), r["class_index"], r["label"], r["probability"]) for r in rows],
+    )
+    conn.commit()
+    cursor.close()
+
+
+class Writer:
+    """Buffers results and flushes them in bulk to the JSONL file and/or the database."""
+
+    def __init__(self, out_path, db_conn, flush_every: int):
+        self.out = open(out_path, "a", encoding="utf-8") if out_path else None
+        self.db_conn = db_conn
+        self.flush_every = flush_every
+        self.buffer = []
+
+    def add(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        if self.db_conn is not None:
+            write_db(self.db_conn, self.buffer)
+        if self.out is not None:
+            self.out.writelines(json.dumps(r) + "\n" for r in self.buffer)
+            self.out.flush()
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.out is not None:
+            self.out.close()
+
+
+def classify_batch(paths, tensors):
+    probs = torch.softmax(pred.infer(torch.cat(tensors)).float(), dim=1)
+    rows = []
+    for path, p in zip(paths, probs):
+        best = pred.top_k_predictions(p, 1)[0]
+        rows.append({"path": path, **best})
+    return rows
+
+
+def run(args):
+    db_conn = get_db_connection() if args.write_db else None
+    is_done = done_check(args, db_conn)
+    counts = {"skipped": 0}
+    writer = Writer(args.out, db_conn, args.flush_every)
+
+    started = last_report = time.perf_counter()
+    n_images = n_bytes = n_failed = 0
+    batch_paths, batch_tensors = [], []
+
+    def finish_batch():
+        nonlocal n_images
+        writer.add(classify_batch(batch_paths, batch_tensors))
+        n_images += len(batch_paths)
+        batch_paths.clear()
+        batch_tensors.clear()
+
+    try:
+        for future in decoded_stream(iter_sources(args, is_done, counts), args.workers):
+            try:
+                path, size, tensor = future.result()
+            except Exception as e:
+                n_failed += 1
+                print(f"skipping unreadable image: {e}", file=sys.stderr)
+                continue
+            n_bytes += size
+            batch_paths.append(path)
+            batch_tensors.append(tensor)
+            if len(batch_paths) >= args.batch_size:
+                finish_batch()
+            now = time.perf_counter()
+            if now - last_report >= args.report_every:
+                last_report = now
+                print(f"{n_images} images, {n_images / (now - started):.1f} img/s, {n_bytes / (now - started) / 2**20:.1f} MB/s")
+        if batch_paths:
+            finish_batch()
+    finally:
+        writer.close()
+        if db_conn is not None:
+            db_conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"done: {n_images} classified, {counts['skipped']} skipped (already done), {n_failed} failed "
+        f"in {elapsed:.1f}s ({n_images / max(elapsed, 1e-9):.1f} img/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk classification of uploaded plant images.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="classify every image in this directory")
+    source.add_argument("--manifest", help="text file with one image path per line")
+    source.add_argument("--from-db", action="store_true", help="plants rows with predicted_class IS NULL")
+    parser.add_argument("--uploads-dir", default=str(BACKEND_DIR / "uploads"), help="where /uploads/... files live")
+    parser.add_argument("--out", help="append results to this JSONL file (also used to resume)")
+    parser.add_argument("--write-db", action="store_true", help="bulk-update plants with the predictions")
+    parser.add_argument("--batch-size", type=int, default=pred.MAX_BATCH_SIZE * 4)
+    parser.add_argument("--workers", type=int, default=pred.DECODE_WORKERS)
+    parser.add_argument("--flush-every", type=int, default=256)
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args()
+    if not args.out and not args.write_db:
+        parser.error("nothing to write: pass --out and/or --write-db")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,325 @@
+import asyncio
+import contextvars
+import glob
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import FastAPI, UploadFile, File
 from fastapi.responses import JSONResponse
 import torch
 from PIL import Image
 from torchvision import transforms
 
+from inference_backends import load_backend
+import derivatives
+from derivatives import INPUT_SIZE, load_image, pixel_hash
+
+# Shared request/stage latency metrics (backend_app/metrics.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics  # noqa: E402
+import profiling  # noqa: E402
+
 # Load your model
 from my_model import MyModel  # replace with your class
 model = MyModel()
 model.load_state_dict(torch.load("output/best_model.pth", map_location="cpu"))
 model.eval()
 
+# Inference backend: eager | torchscript | onnx | int8 (see inference_backends.py);
+# PRED_THREADS caps torch / ONNX Runtime intra-op threads (default: torch's own choice).
+BACKEND = os.getenv("PRED_BACKEND", "eager")
+INTRA_OP_THREADS = int(os.getenv("PRED_THREADS", "0")) or None
+
+# Dynamic batching: concurrent requests are run through the model together once
+# PRED_MAX_BATCH images are queued or the oldest one has waited PRED_MAX_WAIT_MS.
+MAX_BATCH_SIZE = int(os.getenv("PRED_MAX_BATCH", "8"))
+MAX_WAIT_MS = float(os.getenv("PRED_MAX_WAIT_MS", "10"))
+# Decoding/resizing runs in a bounded thread pool (PIL and torch release the GIL), the forward
+# pass in its own single thread – torch already parallelises a batch across cores.
+DECODE_WORKERS = int(os.getenv("PRED_DECODE_WORKERS", str(min(4, os.cpu_count() or 1))))
+decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="decode")
+inference_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+# Predictions are cached by a hash of the decoded pixels, so re-uploads of the same photo skip the model.
+CACHE_SIZE = int(os.getenv("PRED_CACHE_SIZE", "1024"))
+# Optional: pre-fill the cache at startup from a folder of already uploaded images (e.g. ../uploads)
+CACHE_WARM_DIR = os.getenv("PRED_CACHE_WARM_DIR")
+# Class names: JSON list or a text file with one label per line, index = class id
+LABELS_PATH = os.getenv("PRED_LABELS_PATH", "output/labels.json")
+
 # Preprocessing function -change so it matches mine.
+# Built once at import instead of on every request.
+transform = transforms.Compose([
+    transforms.Resize(INPUT_SIZE),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                         std=[0.229, 0.224, 0.225])
+])
+
+
 def preprocess(image: Image.Image):
-    transform = transforms.Compose([
-        transforms.Resize((224, 224)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                             std=[0.229, 0.224, 0.225])
-    ])
     return transform(image).unsqueeze(0)  # batch of 1 for predicting users image
 
+
+# Normalize step of `transform` for pixels that are already resized (derivatives.py .224.webp)
+_MEAN = torch.tensor([0.485, 0.456, 0.406]).view(3, 1, 1)
+_STD = torch.tensor([0.229, 0.224, 0.225]).view(3, 1, 1)
+
+
+def preprocess_pixels(pixels) -> torch.Tensor:
+    """(224, 224, 3) uint8 array -> model input, identical to preprocess() of the source image."""
+    tensor = torch.from_numpy(pixels).permute(2, 0, 1).float().div(255)
+    return ((tensor - _MEAN) / _STD).unsqueeze(0)
+
+
+def decode_and_preprocess(data: bytes) -> torch.Tensor:
+    return preprocess(load_image(data))
+
+
+def load_labels(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return [line.strip() for line in f if line.strip()]
+
+
+labels = load_labels(LABELS_PATH)
+
+
+class PredictionCache:
+    """Thread-safe LRU of softmax probability vectors keyed by pixel hash."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            probs = self._items.get(key)
+            if probs is not None:
+                self._items.move_to_end(key)
+            return probs
+
+    def put(self, key: str, probs: torch.Tensor):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = probs
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+prediction_cache = PredictionCache(CACHE_SIZE)
+
+
+def decode_for_prediction(data: bytes):
+    """(pixel hash, cached probabilities or None, model input or None when cached)."""
+    with metrics.span("decode"):
+        image = load_image(data)
+    with metrics.span("cache_lookup"):
+        key = pixel_hash(image)
+        cached = prediction_cache.get(key)
+    if cached is not None:
+        return key, cached, None
+    with metrics.span("preprocess"):
+        return key, None, preprocess(image)
+
+
+def top_k_predictions(probs: torch.Tensor, k: int):
+    values, indices = torch.topk(probs, min(max(k, 1), probs.numel()))
+    return [
+        {
+            "class_index": i,
+            "label": labels[i] if labels and i < len(labels) else None,
+            "probability": p,
+        }
+        for p, i in zip(values.tolist(), indices.tolist())
+    ]
+
+
+infer = load_backend(
+    model,
+    BACKEND,
+    example=torch.randn(1, 3, *INPUT_SIZE),
+    num_threads=INTRA_OP_THREADS,
+    onnx_path=os.getenv("PRED_ONNX_PATH", "output/best_model.onnx"),
+)
+
+
+BATCH_SIZE = metrics.REGISTRY.histogram(
+    "predict_batch_size",
+    "Number of images per forward pass of the dynamic batcher.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+
+class BatchingWorker:
+    """Queues preprocessed (1, C, H, W) tensors and answers each caller with its row of the batched output."""
+
+    def __init__(self, infer, max_batch_size: int, max_wait_ms: float, executor=None):
+        self.infer = infer
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = None
+        self._task = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, input_tensor: torch.Tensor) -> torch.Tensor:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((input_tensor, future))
+        return await future
+
+    def _forward(self, inputs: torch.Tensor) -> torch.Tensor:
+        BATCH_SIZE.observe(inputs.shape[0])
+        with metrics.span("forward"):
+            return self.infer(inputs)
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                # inside the try: a bad input shape fails this batch's requests, not the worker
+                inputs = torch.cat([tensor for tensor, _ in batch])
+                # forward pass off the event loop, so the next batch keeps filling meanwhile
+                outputs = await loop.run_in_executor(self.executor, self._forward, inputs)
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"model returned {len(outputs)} outputs for a batch of {len(batch)}")
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for i, (_, future) in enumerate(batch):
+                if not future.done():  # the client may have disconnected
+                    future.set_result(outputs[i])
+
+
+batcher = BatchingWorker(infer, MAX_BATCH_SIZE, MAX_WAIT_MS, executor=inference_pool)
+
+
+async def _classify_decoded(key: str, probs, input_tensor):
+    if probs is not None:
+        return probs, True
+    output = await batcher.submit(input_tensor)
+    probs = torch.softmax(output.float(), dim=0)
+    prediction_cache.put(key, probs)
+    return probs, False
+
+
+def _profiled_decode(data: bytes):
+    with profiling.section():  # ?profile=cprofile covers the decode of this request
+        return decode_for_prediction(data)
+
+
+async def classify(data: bytes):
+    """Softmax probabilities for one encoded image and whether they came from the cache."""
+    loop = asyncio.get_running_loop()
+    # run in a copy of the request's context, so profiling.section() sees the request's profile
+    decoded = await loop.run_in_executor(decode_pool, contextvars.copy_context().run, _profiled_decode, data)
+    return await _classify_decoded(*decoded)
+
+
+def decode_upload(path: str):
+    """Like decode_for_prediction for a file in uploads/, from its derived 224px pixels when fresh."""
+    derived = derivatives.load_model_pixels(path)
+    if derived is None:
+        with open(path, "rb") as f:
+            return decode_for_prediction(f.read())
+    pixels, meta = derived
+    key = meta["pixel_hash"]  # same key as decoding the original, see derivatives.py
+    cached = prediction_cache.get(key)
+    return key, cached, None if cached is not None else preprocess_pixels(pixels)
+
+
+async def warm_cache(directory: str):
+    loop = asyncio.get_running_loop()
+    paths = sorted(
+        p for p in glob.glob(os.path.join(directory, "*"))
+        if os.path.splitext(p)[1].lower() in derivatives.IMAGE_EXTENSIONS
+    )
+    for start in range(0, len(paths), MAX_BATCH_SIZE):
+        chunk = paths[start:start + MAX_BATCH_SIZE]
+        decoded = await asyncio.gather(*(loop.run_in_executor(decode_pool, decode_upload, p) for p in chunk),
+                                       return_exceptions=True)
+        # submitted together, so they land in the same batch
+        await asyncio.gather(*(_classify_decoded(*d) for d in decoded if not isinstance(d, BaseException)),
+                             return_exceptions=True)
+    print(f"Prediction cache warmed with {len(prediction_cache)} images from {directory}")
+
+
 app = FastAPI()
+metrics.install(app, service="classifier")
+profiling.install(app, service="classifier")  # opt-in, PROFILING_ENABLED=1
+
+
+@app.on_event("startup")
+async def start_batcher():
+    batcher.start()
+    if CACHE_WARM_DIR:
+        asyncio.get_running_loop().create_task(warm_cache(CACHE_WARM_DIR))
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
 
 @app.post("/predict")
-async def predict(file: UploadFile = File(...)):
-    image = Image.open(file.file).convert("RGB")
-    input_tensor = preprocess(image)
-    
-    with torch.no_grad():
-        output = model(input_tensor)
-        predicted_class = torch.argmax(output, dim=1).item()
-    
-    return JSONResponse({"prediction": predicted_class})  #we give out 1 class.
+async def predict(file: UploadFile = File(...), top_k: int = 5):
+    data = await file.read()
+    # cprofile covers the decode and top-k (no await inside a section); the batched forward
+    # pass is shared between requests, the sampling mode covers it
+    probs, cached = await classify(data)
+    with profiling.section():
+        top = top_k_predictions(probs, top_k)
+
+    return JSONResponse({
+        "prediction": top[0]["class_index"],  # kept for existing callers: best class id
+        "label": top[0]["label"],
+        "confidence": top[0]["probability"],
+        "top_k": top,
+        "cached": cached,
+    })
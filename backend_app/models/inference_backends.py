@@ -0,0 +1,92 @@
+"""
+CPU inference backends for the plant classifier, selected with PRED_BACKEND:
+
+- eager        plain PyTorch module under torch.inference_mode()
+- torchscript  traced + frozen TorchScript graph (fuses conv/bn, drops Python overhead)
+- onnx         exported once to ONNX (dynamic batch axis) and run with ONNX Runtime
+- int8         dynamic int8 quantisation of the Linear layers (conv layers stay fp32)
+
+Every backend is a callable taking a (N, 3, 224, 224) float tensor and returning (N, classes) logits.
+"""
+import os
+from typing import Callable, Optional
+
+import torch
+
+BACKENDS = ("eager", "torchscript", "onnx", "int8")
+
+
+def _eager(model) -> Callable:
+    def run(inputs: torch.Tensor) -> torch.Tensor:
+        with torch.inference_mode():
+            return model(inputs)
+    return run
+
+
+def _torchscript(model, example: torch.Tensor) -> Callable:
+    with torch.inference_mode():
+        traced = torch.jit.trace(model, example)
+    frozen = torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+    return _eager(frozen)
+
+
+def _int8(model) -> Callable:
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return _eager(quantized)
+
+
+def _onnx(model, example: torch.Tensor, onnx_path: str, num_threads: Optional[int]) -> Callable:
+    import onnxruntime as ort  # optional dependency, only needed for this backend
+
+    if not os.path.exists(onnx_path):
+        os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+        torch.onnx.export(
+            model,
+            (example,),
+            onnx_path,
+            input_names=["input"],
+            output_names=["logits"],
+            dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        )
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+    session = ort.InferenceSession(onnx_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    def run(inputs: torch.Tensor) -> torch.Tensor:
+        (logits,) = session.run(["logits"], {"input": inputs.contiguous().numpy()})
+        return torch.from_numpy(logits)
+    return run
+
+
+def load_backend(
+    model,
+    name: str = "eager",
+    example: Optional[torch.Tensor] = None,
+    num_threads: Optional[int] = None,
+    onnx_path: str = "output/best_model.onnx",
+    warmup: int = 3,
+) -> Callable:
+    """Builds the requested backend around an eval-mode model and runs a few warm-up passes."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r}, expected one of {BACKENDS}")
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    model.eval()
+    if example is None:
+        example = torch.randn(1, 3, 224, 224)
+
+    if name == "torchscript":
+        run = _torchscript(model, example)
+    elif name == "onnx":
+        run = _onnx(model, example, onnx_path, num_threads)
+    elif name == "int8":
+        run = _int8(model)
+    else:
+        run = _eager(model)
+
+    # first calls pay for lazy init / graph optimisation; keep that out of user requests
+    for _ in range(warmup):
+        run(example)
+    return run
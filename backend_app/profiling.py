@@ -0,0 +1,226 @@
+"""
+Opt-in profiling of single requests for the FastAPI services.
+
+Disabled unless PROFILING_ENABLED=1; then a request asks for a profile with
+``?profile=sample|cprofile`` or an ``X-Profile: sample|cprofile`` header (plus
+``X-Profile-Token`` when PROFILING_TOKEN is set). The response carries ``X-Profile-Id``
+and the result can be fetched from ``GET /debug/profiles/{id}``:
+
+- sample:   a wall-clock sampling profile of every thread in the process while the
+            request runs (so decode/inference pools and the threadpool running sync
+            endpoints are included), in folded-stack format - feed it to flamegraph.pl,
+            speedscope or inferno.
+- cprofile: deterministic cProfile of the code inside ``profiling.section()`` blocks
+            (the request handlers), saved as a .prof file (snakeviz, flameprof, pstats).
+            Only one section is profiled at a time process-wide (Python >= 3.12 allows a
+            single active profiler); a section that finds another one running is skipped.
+            Sections must not contain ``await`` - the profiler would record every other
+            coroutine the event loop runs meanwhile.
+
+    import profiling
+    profiling.install(app, service="rag")
+
+    with profiling.section():      # no-op unless this request asked for cprofile
+        ...
+
+When disabled nothing is installed and section() costs one ContextVar lookup.
+"""
+import cProfile
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse
+
+ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILE_DIR = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "plant-app-profiles"))
+INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+INCLUDE_IDLE = os.getenv("PROFILING_INCLUDE_IDLE", "0") == "1"
+MODES = ("sample", "cprofile")
+
+_current_profiler = ContextVar("current_profiler", default=None)
+# one cProfile section at a time across all requests and threads
+_cprofile_lock = threading.Lock()
+
+# innermost frames of threads that are only waiting (lock, queue, event loop selector)
+_IDLE_FRAMES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get"),
+                ("threading.py", "_wait_for_tstate_lock"), ("socket.py", "accept")}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Counts folded stacks of all other threads every ``interval_ms`` until stopped."""
+
+    def __init__(self, interval_ms: float = INTERVAL_MS, include_idle: bool = INCLUDE_IDLE):
+        self.interval = interval_ms / 1000.0
+        self.include_idle = include_idle
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}").replace(";", ":"))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class RequestProfile:
+    def __init__(self, mode: str, label: str):
+        self.mode = mode
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}"
+        self.sampler = StackSampler() if mode == "sample" else None
+        self.cprofile = cProfile.Profile() if mode == "cprofile" else None
+        self.skipped_sections = 0
+
+    def start(self):
+        if self.sampler is not None:
+            self.sampler.start()
+
+    def finish(self) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if self.sampler is not None:
+            self.sampler.stop()
+            path = os.path.join(PROFILE_DIR, f"{self.id}.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.sampler.folded())
+        else:
+            path = os.path.join(PROFILE_DIR, f"{self.id}.prof")
+            self.cprofile.dump_stats(path)
+        return path
+
+
+def _enable(profile: RequestProfile) -> bool:
+    if not _cprofile_lock.acquire(blocking=False):
+        return False
+    try:
+        profile.cprofile.enable()
+    except ValueError:
+        # another profiling tool (not ours) is active - Python >= 3.12
+        _cprofile_lock.release()
+        return False
+    return True
+
+
+@contextmanager
+def section():
+    """cProfile the enclosed (synchronous) block when the current request asked for mode=cprofile.
+
+    Skipped, never raised, when another section is being profiled.
+    """
+    profile = _current_profiler.get()
+    if profile is None or profile.cprofile is None:
+        yield
+        return
+    if not _enable(profile):
+        profile.skipped_sections += 1
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.cprofile.disable()
+        _cprofile_lock.release()
+
+
+def _requested_mode(request: Request):
+    mode = request.headers.get("x-profile") or request.query_params.get("profile")
+    if not mode:
+        return None
+    if TOKEN and request.headers.get("x-profile-token") != TOKEN:
+        return None
+    mode = "sample" if mode in ("1", "true") else mode
+    return mode if mode in MODES else None
+
+
+def _find_profile(profile_id: str):
+    if not re.fullmatch(r"[\w.-]+", profile_id):
+        return None
+    for ext in (".folded", ".prof"):
+        path = os.path.join(PROFILE_DIR, profile_id + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def install(app, service: str):
+    """Add the per-request profiling middleware and /debug/profiles endpoints (only if enabled)."""
+    if not ENABLED:
+        return app
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        mode = _requested_mode(request)
+        if mode is None:
+            return await call_next(request)
+        label = re.sub(r"[^\w]+", "-", f"{service}{request.url.path}").strip("-")
+        profile = RequestProfile(mode, label)
+        token = _current_profiler.set(profile)
+        profile.start()
+        try:
+            response = await call_next(request)
+        finally:
+            _current_profiler.reset(token)
+            path = profile.finish()
+            print(f"[profiling] {request.method} {request.url.path} -> {path}")
+        response.headers["X-Profile-Id"] = profile.id
+        if profile.skipped_sections:
+            response.headers["X-Profile-Skipped-Sections"] = str(profile.skipped_sections)
+        return response
+
+    def check_token(request: Request):
+        if TOKEN and request.headers.get("x-profile-token") != TOKEN:
+            raise HTTPException(status_code=403, detail="invalid profiling token")
+
+    @app.get("/debug/profiles", include_in_schema=False)
+    def list_profiles(request: Request):
+        check_token(request)
+        if not os.path.isdir(PROFILE_DIR):
+            return {"profiles": []}
+        return {"profiles": sorted(os.path.splitext(name)[0] for name in os.listdir(PROFILE_DIR))}
+
+    @app.get("/debug/profiles/{profile_id}", include_in_schema=False)
+    def get_profile(profile_id: str, request: Request):
+        check_token(request)
+        path = _find_profile(profile_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail="profile not found")
+        return FileResponse(path, filename=os.path.basename(path))
+
+    return app
@@ -1,10 +1,11 @@
 import os
-import psycopg2
 import numpy as np
 from pathlib import Path
 from typing import List, Dict
 from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
+from metrics import span
+import db
 
 # Load environment variables from parent directory
 env_path = Path(__file__).parent.parent / '.env'
@@ -12,37 +13,80 @@ load_dotenv(dotenv_path=env_path)
 
 # Load the embedding model
 embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+EMBEDDING_DIM = 384
 
-def get_db_connection():
-    """Get a PostgreSQL database connection."""
-    return psycopg2.connect(
-        host=os.getenv('DB_HOST'),
-        port=os.getenv('DB_PORT'),
-        database=os.getenv('DB_NAME'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD')
-    )
-
-def retrieve_relevant_chunks(query: str, top_k: int = 5) -> List[Dict]:
-    """Retrieve top-k most relevant chunks using pgvector cosine similarity."""
-    query_embedding = embedding_model.encode([query], convert_to_numpy=True)[0]
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Use pgvector for efficient top-k retrieval with cosine similarity
-    cursor.execute("""
+# First-stage search over a compact copy of the embeddings, then exact re-ranking:
+#   exact   - ORDER BY full float32 vector (previous behaviour)
+#   halfvec - candidates from embedding::halfvec (16-bit floats, half the size)
+#   binary  - candidates by Hamming distance on binary_quantize(embedding) (1 bit per dim)
+# The candidate set (RAG_RERANK_CANDIDATES, at least top_k, at most 1000) is re-ranked by the full vectors;
+# halfvec is close to lossless with few candidates, binary needs a much larger set.
+# Both first stages are served by expression indexes from config/initDb.js (pgvector >= 0.7).
+RETRIEVAL_MODES = ("exact", "halfvec", "binary")
+RETRIEVAL_MODE = os.getenv('RAG_RETRIEVAL_MODE', 'exact')
+RERANK_CANDIDATES = int(os.getenv('RAG_RERANK_CANDIDATES', '100'))
+if RETRIEVAL_MODE not in RETRIEVAL_MODES:
+    raise ValueError(f"RAG_RETRIEVAL_MODE must be one of {RETRIEVAL_MODES}, got {RETRIEVAL_MODE!r}")
+
+# An HNSW index scan returns at most hnsw.ef_search rows (pgvector default 40), so the first
+# stage raises it to the candidate count for its transaction; 1000 is pgvector's maximum.
+HNSW_EF_SEARCH_MAX = 1000
+
+_FIRST_STAGE_ORDER = {
+    "halfvec": f"embedding::halfvec({EMBEDDING_DIM}) <#> %s::halfvec({EMBEDDING_DIM})",
+    "binary": f"binary_quantize(embedding)::bit({EMBEDDING_DIM}) <~> binary_quantize(%s::vector)",
+}
+
+def _retrieval_query(query_vector: list, top_k: int, mode: str, candidates: int):
+    """SQL and parameters for one retrieval mode (see RETRIEVAL_MODES)."""
+    if mode == "exact":
+        # Use pgvector for efficient top-k retrieval with cosine similarity
+        return """
+            SELECT plant_name, article_title, article_url, chunk_text,
+                   1 - (embedding <#> %s::vector) AS similarity
+            FROM plant_documents
+            WHERE embedding IS NOT NULL
+            ORDER BY embedding <#> %s::vector
+            LIMIT %s
+        """, (query_vector, query_vector, top_k)
+    return f"""
         SELECT plant_name, article_title, article_url, chunk_text,
                1 - (embedding <#> %s::vector) AS similarity
-        FROM plant_documents
-        WHERE embedding IS NOT NULL
+        FROM (
+            SELECT plant_name, article_title, article_url, chunk_text, embedding
+            FROM plant_documents
+            WHERE embedding IS NOT NULL
+            ORDER BY {_FIRST_STAGE_ORDER[mode]}
+            LIMIT %s
+        ) AS candidates
         ORDER BY embedding <#> %s::vector
         LIMIT %s
-    """, (query_embedding.tolist(), query_embedding.tolist(), top_k))
+    """, (query_vector, query_vector, _first_stage_size(top_k, candidates), query_vector, top_k)
+
+def _first_stage_size(top_k: int, candidates: int) -> int:
+    return min(max(candidates, top_k), HNSW_EF_SEARCH_MAX)
+
+def retrieve_relevant_chunks(query: str, top_k: int = 5, mode: str = None, candidates: int = None) -> List[Dict]:
+    """Retrieve top-k most relevant chunks using pgvector cosine similarity.
+
+    mode/candidates default to RAG_RETRIEVAL_MODE / RAG_RERANK_CANDIDATES.
+    """
+    mode = mode or RETRIEVAL_MODE
+    with span("embed"):
+        query_embedding = embedding_model.encode([query], convert_to_numpy=True)[0]
     
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
+    with span("db_retrieve"), db.connection() as conn:
+        cursor = conn.cursor()
+        
+        candidates = candidates or RERANK_CANDIDATES
+        if mode != "exact":
+            # SET LOCAL: only for this transaction, the pooled connection keeps its default
+            cursor.execute("SET LOCAL hnsw.ef_search = %s", (_first_stage_size(top_k, candidates),))
+        sql, params = _retrieval_query(query_embedding.tolist(), top_k, mode, candidates)
+        cursor.execute(sql, params)
+        
+        results = cursor.fetchall()
+        cursor.close()
     
     chunks = []
     for row in results:
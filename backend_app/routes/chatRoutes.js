@@ -83,38 +83,33 @@ router.post('/conversations/:conversationId/messages', authMiddleware, async (re
       return res.status(404).json({ error: 'Conversation not found' });
     }
 
-    // Get recent messages for context
-    const historyResult = await pool.query(
-      'SELECT message, response FROM messages WHERE conversation_id = $1 ORDER BY created_at DESC LIMIT 5',
+    // Is this the first message? (it becomes the conversation title)
+    const firstCheck = await pool.query(
+      'SELECT 1 FROM messages WHERE conversation_id = $1 LIMIT 1',
       [conversationId]
     );
 
-    const history = historyResult.rows.reverse().map(row => ({
-      user: row.message,
-      assistant: row.response
-    }));
-
-    // Call Python RAG service
+    // Call Python RAG service; it loads the recent turns + summary of this conversation
+    // itself and stores the new turn (backend_app/conversations.py)
     const ragResponse = await fetch(`${PYTHON_RAG_URL}/api/chat`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ message, k: 5, history }),
+      body: JSON.stringify({ message, k: 5, conversation_id: Number(conversationId) }),
     });
 
+    if (ragResponse.status === 503) {
+      res.set('Retry-After', ragResponse.headers.get('retry-after') || '2');
+      return res.status(503).json({ error: 'Chat is busy, please retry in a moment' });
+    }
+
     if (!ragResponse.ok) {
       throw new Error(`RAG service error: ${ragResponse.status}`);
     }
 
     const ragData = await ragResponse.json();
 
-    // Save message to database
-    const messageResult = await pool.query(
-      'INSERT INTO messages (conversation_id, message, response, sources) VALUES ($1, $2, $3, $4) RETURNING *',
-      [conversationId, message, ragData.answer, JSON.stringify(ragData.sources)]
-    );
-
     // Update conversation's updated_at and generate title from first message
-    if (historyResult.rows.length === 0) {
+    if (firstCheck.rows.length === 0) {
       // First message - use it as title (truncated)
       const title = message.substring(0, 50) + (message.length > 50 ? '...' : '');
       await pool.query(
@@ -131,7 +126,8 @@ router.post('/conversations/:conversationId/messages', authMiddleware, async (re
     res.json({
       message: ragData.answer,
       sources: ragData.sources,
-      messageId: messageResult.rows[0].id
+      messageId: ragData.message_id,
+      degraded: Boolean(ragData.degraded)
     });
   } catch (error) {
     console.error('Send message error:', error);
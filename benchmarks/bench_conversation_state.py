@@ -0,0 +1,131 @@
+"""
+Request and prompt size per turn of a long /api/chat conversation: history resent by the
+client vs. server-side conversation state (conversation_id -> backend_app/conversations.py),
+against the in-memory fakes (fakes.py).
+
+Modes, each a --turns long conversation:
+- history:      the client resends every previous turn in ChatRequest.history
+- history5:     the last 5 turns only (what routes/chatRoutes.js used to send)
+- conversation: only the message + conversation_id; recent turns + rolling summary server-side
+
+Prompt size is measured on app.build_prompt's output; the fake Gemini answers
+--gemini-tokens words per turn (and writes the summaries).
+
+Usage:
+    python benchmarks/bench_conversation_state.py
+    python benchmarks/bench_conversation_state.py --turns 50 --json conversation.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend_app")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+
+QUESTIONS = [
+    "How often should I water my monstera in winter?",
+    "The leaves are turning yellow at the edges, what does that mean?",
+    "Which soil mix works best for it?",
+    "Can I put it on a south-facing windowsill?",
+    "How do I propagate it from cuttings?",
+    "Is it toxic to cats?",
+]
+
+
+def setup(args):
+    import sentence_transformers
+
+    store = fakes.VectorStore()
+    fakes.install(store)
+    sentence_transformers.SentenceTransformer = lambda *a, **k: fakes.FakeEmbedder()
+    sys.path.insert(0, BACKEND_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as rag_app
+        import ingest_data
+
+        ingest_data.load_and_store_articles()
+    rag_app.gemini_model = fakes.FakeGeminiModel(args.gemini_ms, args.gemini_tokens, 0)
+    rag_app.llm.model = rag_app.gemini_model
+    return rag_app, store
+
+
+def run(client, rag_app, mode, turns, conversation_id):
+    prompts = []
+    build_prompt = rag_app.build_prompt
+    rag_app.build_prompt = lambda *a, **k: prompts.append(build_prompt(*a, **k)) or prompts[-1]
+    history, rows = [], []
+    try:
+        for turn in range(turns):
+            message = QUESTIONS[turn % len(QUESTIONS)]
+            body = {"message": message, "k": 5}
+            if mode == "conversation":
+                body["conversation_id"] = conversation_id
+            else:
+                body["history"] = history if mode == "history" else history[-5:]
+            payload = json.dumps(body)
+            start = time.perf_counter()
+            reply = client.post("/api/chat", content=payload, headers={"Content-Type": "application/json"})
+            latency = time.perf_counter() - start
+            reply.raise_for_status()
+            history.append({"user": message, "assistant": reply.json()["answer"]})
+            rows.append({"turn": turn + 1, "request_bytes": len(payload.encode()), "prompt_chars": len(prompts[-1]),
+                         "latency_ms": round(latency * 1000, 1)})
+            if mode == "conversation":
+                # let the background fold finish so every turn sees the steady state
+                rag_app.conversations._executor.submit(lambda: None).result()
+    finally:
+        rag_app.build_prompt = build_prompt
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--gemini-ms", type=float, default=20.0, help="fake Gemini latency")
+    parser.add_argument("--gemini-tokens", type=int, default=120, help="words per fake answer")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+
+    rag_app, store = setup(args)
+    client = TestClient(rag_app.app)
+    store.conversations[1] = [None, None]
+
+    results = {mode: run(client, rag_app, mode, args.turns, 1) for mode in ("history", "history5", "conversation")}
+    marks = sorted({1, 5, 10, args.turns // 2, args.turns} & set(range(1, args.turns + 1)))
+    print(f"{args.turns} turns, answers of {args.gemini_tokens} words")
+    for mode, rows in results.items():
+        sizes = "  ".join(f"t{rows[t - 1]['turn']}: {rows[t - 1]['request_bytes']:6d} B / "
+                          f"{rows[t - 1]['prompt_chars']:6d} ch" for t in marks)
+        print(f"{mode:<13} request / prompt  {sizes}  "
+              f"(latency p50 {statistics.median(r['latency_ms'] for r in rows):.1f} ms)")
+
+    conversations = rag_app.conversations
+    summary = store.conversations[1][0] or ""
+    conversations.evict(1)
+    start = time.perf_counter()
+    conversations.get(1)
+    cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    conversations.get(1)
+    warm_ms = (time.perf_counter() - start) * 1000
+    print(f"conversation state: {conversations.stats()}, summary {len(summary)} chars, "
+          f"load from DB {cold_ms:.2f} ms vs cached {warm_ms:.3f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"turns": args.turns, "results": results, "state": conversations.stats(),
+                       "summary_chars": len(summary), "cold_load_ms": round(cold_ms, 3),
+                       "cached_ms": round(warm_ms, 4)}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
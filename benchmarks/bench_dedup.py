@@ -0,0 +1,130 @@
+"""
+Index size, ingestion time and retrieval duplicates with and without ingest_data's
+near-duplicate filtering (INGEST_DEDUP, backend_app/dedup.py).
+
+The corpus is ingested twice into the in-memory fake plant_documents (fakes.py) - once with
+dedup off, once on - with the dense FakeEmbedder sleeping --embed-ms per chunk to stand in
+for all-MiniLM-L6-v2 on CPU. Storage is estimated from pgvector's vector format (8+4d bytes)
+plus the chunk text, with the ivfflat index holding another copy of every vector. Retrieval
+duplicates are the share of top-k results that are near-duplicates of a higher-ranked result
+for the same query.
+
+The bundled plant_articles.json has hardly any duplicated text; use generate_corpus.py
+--dup-rate for a corpus with republished copies:
+
+Usage:
+    python benchmarks/bench_dedup.py
+    python benchmarks/generate_corpus.py --articles 2000 --dup-rate 0.3 --out /tmp/corpus_dup.json
+    python benchmarks/bench_dedup.py --corpus /tmp/corpus_dup.json --json dedup.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend_app")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+
+
+def setup(embed_ms):
+    import sentence_transformers
+
+    store = fakes.VectorStore()
+    fakes.install(store)
+    sentence_transformers.SentenceTransformer = lambda *a, **k: fakes.FakeEmbedder(latency_ms=embed_ms, dense=True)
+    sys.path.insert(0, BACKEND_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import ingest_data
+        import rag_service
+    return ingest_data, rag_service, store
+
+
+def storage_mb(store):
+    vector = 8 + 4 * fakes.EMBEDDING_DIM
+    text = sum(len(row[3].encode()) for row in store.rows)
+    # heap row (vector + text) plus the ivfflat index's copy of the vector
+    return round((len(store.rows) * 2 * vector + text) / 2**20, 2)
+
+
+def make_queries(texts, n, rng, words=12):
+    queries = []
+    for text in rng.sample(texts, min(n, len(texts))):
+        tokens = text.split()
+        start = rng.randrange(max(1, len(tokens) - words))
+        queries.append(" ".join(tokens[start:start + words]))
+    return queries
+
+
+def duplicate_share(rag_service, queries, k, threshold):
+    from dedup import NearDuplicateIndex
+
+    shares = []
+    for query in queries:
+        results = rag_service.retrieve_relevant_chunks(query, top_k=k, mode="exact")
+        index = NearDuplicateIndex(threshold)
+        kept = sum(index.add(r["chunk_text"]) for r in results)
+        shares.append(1 - kept / len(results) if results else 0.0)
+    return statistics.mean(shares)
+
+
+def run(ingest_data, rag_service, store, args, dedup, queries):
+    store.clear()
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        stored = ingest_data.load_and_store_articles(args.corpus, dedup=dedup)
+    seconds = time.perf_counter() - start
+    stats = [line for line in output.getvalue().splitlines() if line.startswith("Dedup")]
+    return {
+        "dedup": dedup,
+        "chunks": stored,
+        "ingest_s": round(seconds, 2),
+        "storage_mb": storage_mb(store),
+        "topk_duplicate_share": round(duplicate_share(rag_service, queries, args.k, args.threshold), 4),
+        "stats": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="articles JSON (default backend_app/data/plant_articles.json)")
+    parser.add_argument("--embed-ms", type=float, default=5.0, help="fake embedding latency per chunk")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.8, help="similarity counted as a duplicate in top-k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    ingest_data, rag_service, store = setup(args.embed_ms)
+    # the same queries for both runs, cut from the undeduplicated chunks
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingest_data.load_and_store_articles(args.corpus, dedup=False)
+    queries = make_queries([row[3] for row in store.rows], args.queries, random.Random(args.seed))
+
+    results = [run(ingest_data, rag_service, store, args, dedup, queries) for dedup in (False, True)]
+    for r in results:
+        print(f"dedup {'on ' if r['dedup'] else 'off'}  chunks {r['chunks']:6d}  ingest {r['ingest_s']:7.2f} s  "
+              f"storage {r['storage_mb']:7.2f} MB  duplicates in top-{args.k} {r['topk_duplicate_share']:.1%}")
+        for line in r["stats"]:
+            print("   ", line)
+    off, on = results
+    if off["chunks"]:
+        print(f"saved: {1 - on['chunks'] / off['chunks']:.1%} of chunks, "
+              f"{off['ingest_s'] - on['ingest_s']:.2f} s of ingestion, "
+              f"{off['storage_mb'] - on['storage_mb']:.2f} MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"corpus": args.corpus, "k": args.k, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
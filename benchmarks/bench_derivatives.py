@@ -0,0 +1,150 @@
+"""
+Decode time and bytes read per classified upload: decoding the original photo vs. the derived
+224px pixels from backend_app/models/derivatives.py, plus the bytes the collection view serves
+(original vs. thumbnail / web variant).
+
+Runs on a temporary copy of --images (nothing is written into uploads/), optionally with
+--synthetic N extra camera-sized photos. "before" is what fastapi_pred/classify_uploads did for
+every image: read the file, load_image (JPEG draft decode), Resize + ToTensor + Normalize;
+"after" is loading the lossless <name>.224.webp + fastapi_pred.preprocess_pixels' normalisation
+(reproduced here because fastapi_pred needs the trained model to import). Both must give the
+same tensor.
+
+Usage:
+    python benchmarks/bench_derivatives.py
+    python benchmarks/bench_derivatives.py --synthetic 20 --workers 4 --json derivatives.json
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+from torchvision import transforms
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend_app", "models"))
+
+import derivatives  # noqa: E402
+
+MEAN = [0.485, 0.456, 0.406]
+STD = [0.229, 0.224, 0.225]
+transform = transforms.Compose([
+    transforms.Resize(derivatives.INPUT_SIZE),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=MEAN, std=STD),
+])
+_mean = torch.tensor(MEAN).view(3, 1, 1)
+_std = torch.tensor(STD).view(3, 1, 1)
+
+
+def before(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return len(data), transform(derivatives.load_image(data)).unsqueeze(0)
+
+
+def after(path):
+    pixels, meta = derivatives.load_model_pixels(path)
+    tensor = torch.from_numpy(pixels).permute(2, 0, 1).float().div(255)
+    return meta["bytes"]["model"], ((tensor - _mean) / _std).unsqueeze(0)
+
+
+def synthetic_photo(path, rng, size=(4000, 3000)):
+    # smooth gradients + noise: compresses like a real photo rather than like flat colour
+    w, h = size
+    x = np.linspace(0, 1, w, dtype=np.float32)[None, :]
+    y = np.linspace(0, 1, h, dtype=np.float32)[:, None]
+    x, y = np.broadcast_arrays(x, y)
+    base = np.stack([x * y, 1 - x, y * (1 - x)], axis=-1) * 200
+    noise = rng.normal(0, 12, (h, w, 3)).astype(np.float32)
+    Image.fromarray(np.clip(base + noise + 20, 0, 255).astype(np.uint8)).save(path, quality=90)
+
+
+def measure(fn, paths, repeat):
+    times, total_bytes, tensors = [], 0, []
+    for i in range(repeat):
+        for path in paths:
+            t0 = time.perf_counter()
+            n, tensor = fn(path)
+            times.append(time.perf_counter() - t0)
+            if i == 0:
+                total_bytes += n
+                tensors.append(tensor)
+    return times, total_bytes, tensors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", default=os.path.join(ROOT_DIR, "backend_app", "uploads"))
+    parser.add_argument("--synthetic", type=int, default=0, help="extra 4000x3000 JPEGs to add")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="derivatives-")
+    try:
+        for path in sorted(glob.glob(os.path.join(args.images, "*"))):
+            if path.lower().endswith(derivatives.IMAGE_EXTENSIONS):
+                shutil.copy2(path, workdir)
+        rng = np.random.default_rng(0)
+        for i in range(args.synthetic):
+            synthetic_photo(os.path.join(workdir, f"synthetic-{i}.jpg"), rng)
+        paths = list(derivatives.iter_uploads(workdir))
+
+        start = time.perf_counter()
+        derivatives.backfill(paths, args.workers, report_every=1e9)
+        backfill_s = time.perf_counter() - start
+        start = time.perf_counter()
+        derivatives.backfill(paths, args.workers, report_every=1e9)
+        rerun_s = time.perf_counter() - start
+
+        old_times, old_bytes, old_tensors = measure(before, paths, args.repeat)
+        new_times, new_bytes, new_tensors = measure(after, paths, args.repeat)
+        max_diff = max(float((a - b).abs().max()) for a, b in zip(old_tensors, new_tensors))
+
+        metas = [derivatives.read_meta(p) for p in paths]
+        served = {
+            "original": sum(os.path.getsize(p) for p in paths),
+            "thumb": sum(m["bytes"]["thumb"] for m in metas),
+            "web": sum(m["bytes"]["web"] for m in metas),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "images": len(paths),
+        "synthetic": args.synthetic,
+        "backfill_s": round(backfill_s, 2),
+        "backfill_rerun_s": round(rerun_s, 3),
+        "decode": {
+            name: {"p50_ms": round(statistics.median(t) * 1000, 2),
+                   "mean_ms": round(statistics.mean(t) * 1000, 2),
+                   "bytes_read": b}
+            for name, t, b in (("original", old_times, old_bytes), ("derived_224", new_times, new_bytes))
+        },
+        "max_abs_diff": max_diff,
+        "bytes_served": served,
+    }
+    print(f"{len(paths)} images ({args.synthetic} synthetic 4000x3000), backfill {backfill_s:.2f}s "
+          f"with {args.workers} workers, re-run (all fresh) {rerun_s:.3f}s")
+    for name, r in results["decode"].items():
+        print(f"  {name:<12} decode+preprocess p50 {r['p50_ms']:7.2f} ms  mean {r['mean_ms']:7.2f} ms  "
+              f"read {r['bytes_read'] / 1024:8.0f} KiB")
+    print(f"  max |tensor difference| {max_diff:.2e}")
+    print("bytes served: " + "  ".join(f"{k} {v / 1024:.0f} KiB" for k, v in served.items()))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Accuracy parity and latency of the classifier inference backends (eager, torchscript, onnx, int8)
+on a folder of sample images. Run from anywhere; the model is loaded the same way as in
+backend_app/models/fastapi_pred.py (my_model.MyModel + output/best_model.pth in --app-dir).
+
+Usage:
+    python benchmarks/bench_inference_backends.py [--images backend_app/uploads] [--backends eager,onnx]
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_APP_DIR = os.path.join(ROOT_DIR, "backend_app", "models")
+DEFAULT_IMAGES = os.path.join(ROOT_DIR, "backend_app", "uploads")
+
+
+def timed(run, inputs, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run(inputs)
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    return statistics.mean(timings) * 1000, timings[min(len(timings) - 1, int(0.95 * len(timings)))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--app-dir", default=DEFAULT_APP_DIR)
+    parser.add_argument("--backends", default="eager,torchscript,onnx,int8")
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    images_dir = os.path.abspath(args.images)
+    os.chdir(args.app_dir)
+    sys.path.insert(0, args.app_dir)
+    os.environ.setdefault("PRED_BACKEND", "eager")
+    import torch
+    import derivatives
+    import fastapi_pred
+    from inference_backends import load_backend
+
+    # only the uploaded photos: skip uploads/derived/, predictions.jsonl and other non-images
+    images = sorted(
+        p for p in glob.glob(os.path.join(images_dir, "*"))
+        if p.lower().endswith(derivatives.IMAGE_EXTENSIONS)
+    )
+
+    inputs = torch.cat([fastapi_pred.decode_and_preprocess(open(p, "rb").read()) for p in images])
+    print(f"{len(images)} images from {args.images}")
+    reference = load_backend(fastapi_pred.model, "eager", num_threads=args.threads)(inputs)
+    reference_top1 = reference.argmax(dim=1)
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    header = "  ".join(f"bs={b} mean/p95 ms".rjust(22) for b in batch_sizes)
+    print(f"{'backend':<12} {'top-1 agree':>11} {'max |dlogit|':>12}  {header}")
+    for name in args.backends.split(","):
+        try:
+            run = load_backend(
+                fastapi_pred.model, name, num_threads=args.threads,
+                onnx_path=os.path.join(args.app_dir, "output", "bench_model.onnx"),
+            )
+        except Exception as e:
+            print(f"{name:<12} unavailable: {e}")
+            continue
+        logits = run(inputs)
+        agree = (logits.argmax(dim=1) == reference_top1).float().mean().item()
+        max_diff = (logits - reference).abs().max().item()
+        cells = []
+        for b in batch_sizes:
+            batch = inputs[torch.arange(b) % len(inputs)]
+            mean_ms, p95_ms = timed(run, batch, args.repeat)
+            cells.append(f"{mean_ms:9.1f} / {p95_ms:9.1f}".rjust(22))
+        print(f"{name:<12} {agree:>11.1%} {max_diff:>12.2e}  {'  '.join(cells)}")
+
+
+if __name__ == "__main__":
+    main()
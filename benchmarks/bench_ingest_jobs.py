@@ -0,0 +1,144 @@
+"""
+Background index rebuilds (POST /api/initialize -> ingest_jobs.IngestJobManager) while chat
+keeps serving, against the in-memory fake plant_documents (fakes.py).
+
+1. plant_documents is filled with the bundled corpus (the "old" index).
+2. POST /api/initialize starts a rebuild from --corpus (as INGEST_JSON_PATH); the request
+   returns at once.
+3. Until the job ends, /api/chat is called in a loop; every call records its latency, the
+   number of sources and the plant_documents row count at that moment - it must always be
+   the old or the new count, never empty or half-filled.
+4. A second rebuild is cancelled after --cancel-after seconds; the rows must be unchanged
+   and the staging table gone.
+
+Usage:
+    python benchmarks/bench_ingest_jobs.py
+    python benchmarks/generate_corpus.py --articles 1000 --out /tmp/corpus_1k.json
+    python benchmarks/bench_ingest_jobs.py --corpus /tmp/corpus_1k.json --json ingest_jobs.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend_app")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def setup(args):
+    import sentence_transformers
+
+    store = fakes.VectorStore()
+    fakes.install(store)
+    sentence_transformers.SentenceTransformer = lambda *a, **k: fakes.FakeEmbedder(latency_ms=args.embed_ms)
+    sys.path.insert(0, BACKEND_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as rag_app
+        import ingest_data
+    rag_app.gemini_model = fakes.FakeGeminiModel(args.gemini_ms, 0, 0)
+    rag_app.llm.model = rag_app.gemini_model
+    return rag_app, ingest_data, store
+
+
+def wait_until_done(client, job_id, poll_s, on_poll=None):
+    while True:
+        job = client.get(f"/api/initialize/{job_id}").json()
+        if job["status"] not in ("queued", "running", "swapping"):
+            return job
+        if on_poll is not None:
+            on_poll(job)
+        time.sleep(poll_s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="articles JSON for the rebuild (default: the bundled corpus)")
+    parser.add_argument("--embed-ms", type=float, default=2.0, help="fake embedding latency per chunk")
+    parser.add_argument("--gemini-ms", type=float, default=20.0, help="fake Gemini latency")
+    parser.add_argument("--cancel-after", type=float, default=1.0, help="seconds before cancelling the second job")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+
+    rag_app, ingest_data, store = setup(args)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingest_data.load_and_store_articles(os.path.join(BACKEND_DIR, "data", "plant_articles.json"))
+    old_rows = len(store.rows)
+    if args.corpus:
+        ingest_data.INGEST_JSON_PATH = args.corpus  # server-side setting, not part of the request
+    client = TestClient(rag_app.app)
+
+    start = time.perf_counter()
+    response = client.post("/api/initialize")
+    submit_ms = (time.perf_counter() - start) * 1000
+    job = response.json()
+    print(f"old index {old_rows} chunks; POST /api/initialize -> {response.status_code} in {submit_ms:.1f} ms, "
+          f"job {job['job_id']}")
+
+    latencies, sources, rows_seen, errors = [], [], Counter(), 0
+    last_report = time.perf_counter()
+    while rag_app.ingest_jobs.get(job["job_id"]).active:
+        t0 = time.perf_counter()
+        reply = client.post("/api/chat", json={"message": "How often should I water a monstera?", "k": 5})
+        latencies.append(time.perf_counter() - t0)
+        rows_seen[len(store.rows)] += 1
+        if reply.status_code != 200:
+            errors += 1
+        else:
+            sources.append(len(reply.json()["sources"]))
+        if time.perf_counter() - last_report > 2:
+            status = client.get(f"/api/initialize/{job['job_id']}").json()
+            print(f"  {status['status']}: {status['articles_done']}/{status['articles_total']} articles, "
+                  f"{status['chunks_stored']} chunks, {status['chunks_per_s']} chunks/s")
+            last_report = time.perf_counter()
+    job = client.get(f"/api/initialize/{job['job_id']}").json()
+    new_rows = len(store.rows)
+    unexpected = {rows: n for rows, n in rows_seen.items() if rows not in (old_rows, new_rows)}
+    print(f"job {job['status']} in {job['elapsed_s']} s: {job['chunks_stored']} chunks "
+          f"({job['chunks_per_s']} chunks/s), index {old_rows} -> {new_rows} chunks")
+    print(f"chat during rebuild: {len(latencies)} calls, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 95) * 1000:.1f} ms, errors {errors}, "
+          f"calls without sources {sum(1 for s in sources if s == 0)}, "
+          f"row counts seen {dict(rows_seen)} (unexpected: {unexpected or 'none'})")
+
+    second = client.post("/api/initialize").json()
+    time.sleep(args.cancel_after)
+    cancelled = client.delete(f"/api/initialize/{second['job_id']}")
+    final = wait_until_done(client, second["job_id"], 0.1)
+    print(f"cancel after {args.cancel_after} s -> {cancelled.status_code}, job {final['status']} after "
+          f"{final['articles_done']}/{final['articles_total']} articles; index {len(store.rows)} chunks "
+          f"(unchanged: {len(store.rows) == new_rows}), staging dropped: {store.staging is None}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "submit_ms": round(submit_ms, 2),
+                "job": job,
+                "old_rows": old_rows,
+                "new_rows": new_rows,
+                "chat_calls": len(latencies),
+                "chat_p50_ms": round(statistics.median(latencies) * 1000, 2),
+                "chat_p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "chat_errors": errors,
+                "rows_seen": {str(k): v for k, v in rows_seen.items()},
+                "cancelled_job": final,
+                "rows_after_cancel": len(store.rows),
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Tail latency and load shedding of backend_app/llm_client.GeminiClient against the fake Gemini
+model (benchmarks/fakes.py) with injected slow calls, bursts and an outage.
+
+Scenarios (each fires ``--requests`` calls from ``--concurrency`` caller threads):
+- raw:      model.generate_content directly, as app.py did before (no deadline, no limits)
+- deadline: GeminiClient with a deadline; slow calls become fallbacks after --timeout
+- hedge:    deadline + a hedged second call once the first is slower than the recent p95
+- burst:    4x the callers against a small concurrency limit and queue -> fast 503s
+- outage:   every upstream call fails; the circuit breaker turns them into instant fallbacks
+
+Usage:
+    python benchmarks/bench_llm_client.py
+    python benchmarks/bench_llm_client.py --requests 400 --slow-prob 0.05 --slow-ms 3000 --json llm.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "backend_app"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+from llm_client import CircuitOpen, GeminiClient, LLMOverloaded, LLMTimeout, LLMUnavailable  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def outcome_of(error):
+    if error is None:
+        return "ok"
+    for cls, name in ((LLMOverloaded, "shed"), (CircuitOpen, "circuit_open"), (LLMTimeout, "timeout"),
+                      (LLMUnavailable, "error")):
+        if isinstance(error, cls):
+            return name
+    return "error"
+
+
+def run(call, requests, concurrency):
+    def one(_):
+        start = time.perf_counter()
+        try:
+            call()
+            error = None
+        except Exception as e:  # raw model errors are counted, not raised
+            error = e
+        return time.perf_counter() - start, outcome_of(error)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+def summarize(name, results, model):
+    latencies = [latency for latency, _ in results]
+    ok = [latency for latency, outcome in results if outcome == "ok"]
+    return {
+        "scenario": name,
+        "requests": len(results),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "ok_p99_ms": round(percentile(ok, 99) * 1000, 1) if ok else None,
+        "outcomes": dict(Counter(outcome for _, outcome in results)),
+        "upstream_calls": model.calls,
+        "max_in_flight": model.max_in_flight,
+    }
+
+
+def scenario(name, args, model_kwargs, client_kwargs=None, concurrency=None, warmup=0):
+    model = fakes.FakeGeminiModel(args.gemini_ms, 0, 0, seed=args.seed, **model_kwargs)
+    if client_kwargs is None:
+        call = lambda: model.generate_content("prompt")  # noqa: E731
+    else:
+        client = GeminiClient(model, **client_kwargs)
+        call = lambda: client.generate("prompt")  # noqa: E731
+        # fill the latency window the p95 hedge threshold is computed from
+        if warmup:
+            run(call, warmup, concurrency or args.concurrency)
+            model.calls = model.max_in_flight = 0
+    return summarize(name, run(call, args.requests, concurrency or args.concurrency), model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--gemini-ms", type=float, default=200, help="normal fake Gemini latency")
+    parser.add_argument("--slow-prob", type=float, default=0.05, help="share of calls hitting the slow tail")
+    parser.add_argument("--slow-ms", type=float, default=3000, help="latency of a slow call")
+    parser.add_argument("--timeout", type=float, default=1.0, help="GeminiClient deadline in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    tail = {"slow_prob": args.slow_prob, "slow_ms": args.slow_ms}
+    limits = {"timeout_s": args.timeout, "max_concurrency": args.concurrency, "max_queue": args.concurrency,
+              "max_queue_wait_s": args.timeout}
+    results = [
+        scenario("raw", args, tail),
+        scenario("deadline", args, tail, limits),
+        scenario("hedge", args, tail, dict(limits, max_concurrency=2 * args.concurrency, hedge_after="p95"),
+                 warmup=100),
+        scenario("burst", args, {}, dict(limits, max_concurrency=max(1, args.concurrency // 2),
+                                         max_queue=args.concurrency // 2),
+                 concurrency=4 * args.concurrency),
+        scenario("outage", args, {"error_prob": 1.0}, dict(limits, breaker_failures=5, breaker_reset_s=60)),
+    ]
+    print(f"fake Gemini {args.gemini_ms:.0f} ms, {args.slow_prob:.0%} of calls {args.slow_ms:.0f} ms, "
+          f"deadline {args.timeout} s, {args.requests} requests")
+    for r in results:
+        outcomes = ", ".join(f"{k} {v}" for k, v in sorted(r["outcomes"].items()))
+        print(f"{r['scenario']:<9} p50 {r['p50_ms']:7.1f}  p95 {r['p95_ms']:7.1f}  p99 {r['p99_ms']:7.1f} ms  "
+              f"upstream {r['upstream_calls']:4d}  max in flight {r['max_in_flight']:3d}  [{outcomes}]")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
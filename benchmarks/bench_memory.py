@@ -0,0 +1,87 @@
+"""
+Recommender memory before/after PlantRecommender.compact(): process RSS, the size of the
+main objects, and how much the top-10 rankings change (with --top-terms pruning).
+
+Usage:
+    python benchmarks/bench_memory.py [--data path/to/plant_articles.json] [--top-terms 2000]
+"""
+import argparse
+import ctypes
+import gc
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "Recommendation_module"))
+
+import recommender_for_app as rfa  # noqa: E402
+
+DEFAULT_DATA = os.path.join(ROOT_DIR, "backend_app", "data", "plant_articles.json")
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc; falls back to peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def release_freed_memory():
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)  # let glibc hand freed arenas back to the OS
+    except (OSError, AttributeError):
+        pass
+
+
+def footprint_mb(rec) -> dict:
+    m = rec.matrix
+    sizes = {"matrix": (m.data.nbytes + m.indices.nbytes + m.indptr.nbytes) / 2 ** 20}
+    vocabulary = getattr(rec.vectorizer, "vocabulary_", None)
+    sizes["vocabulary"] = (
+        (sys.getsizeof(vocabulary) + sum(sys.getsizeof(k) for k in vocabulary)) / 2 ** 20 if vocabulary else 0.0
+    )
+    for name in ("df_raw", "df_agg", "df_traits"):
+        df = getattr(rec, name)
+        sizes[name] = df.memory_usage(deep=True).sum() / 2 ** 20 if df is not None else 0.0
+    return sizes
+
+
+def report(label, rss, rec):
+    parts = "  ".join(f"{k} {v:7.2f}" for k, v in footprint_mb(rec).items())
+    print(f"{label:<8} RSS {rss:8.1f} MB  |  {parts}  (MB, {rec.matrix.dtype}, nnz={rec.matrix.nnz})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default=os.getenv("PLANT_DATA_PATH", DEFAULT_DATA))
+    parser.add_argument("--top-terms", type=int, default=None)
+    args = parser.parse_args()
+
+    rfa.ensure_nltk_resources()
+    release_freed_memory()
+    baseline = rss_mb()
+    print(f"baseline RSS {baseline:8.1f} MB (interpreter + libraries)")
+
+    rec = rfa.PlantRecommender.from_json(args.data)
+    release_freed_memory()
+    report("full", rss_mb(), rec)
+
+    seeds = [[name] for name in rec.plant_names[:20]]
+    before = [[n for n, _ in rec.similar_plants(s, top_k=10)] for s in seeds]
+
+    rec.compact(top_n_terms=args.top_terms)
+    release_freed_memory()
+    report("compact", rss_mb(), rec)
+
+    after = [[n for n, _ in rec.similar_plants(s, top_k=10)] for s in seeds]
+    overlap = sum(len(set(a) & set(b)) for a, b in zip(before, after)) / (10 * len(seeds))
+    same_order = sum(a == b for a, b in zip(before, after))
+    print(f"top-10 overlap vs full model: {overlap:.1%}, identical rankings: {same_order}/{len(seeds)}")
+
+
+if __name__ == "__main__":
+    main()
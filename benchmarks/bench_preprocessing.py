@@ -0,0 +1,100 @@
+"""
+Throughput of the recommender text preprocessing on plant_articles.json, plus a
+TF-IDF vocabulary parity check against the original pipeline (word_tokenize +
+a fresh PorterStemmer per document, no stem cache).
+
+Usage:
+    python benchmarks/bench_preprocessing.py [--data path/to/plant_articles.json] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "Recommendation_module"))
+
+import recommender_for_app as rfa  # noqa: E402
+from nltk.stem import PorterStemmer  # noqa: E402
+from nltk.tokenize import word_tokenize  # noqa: E402
+
+DEFAULT_DATA = os.path.join(ROOT_DIR, "backend_app", "data", "plant_articles.json")
+
+
+def preprocess_original(doc: str) -> str:
+    """The pipeline as it was before the stem cache: new stemmer per document, every token stemmed."""
+    if not isinstance(doc, str):
+        return ""
+    stemmer = PorterStemmer()
+    return " ".join(stemmer.stem(t) for t in word_tokenize(doc.lower()) if t.isalpha())
+
+
+def run_variant(name, fn, docs, repeat):
+    rfa.stem_cached.cache_clear()
+    n_chars = sum(len(d) for d in docs)
+    timings = []
+    n_tokens = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = [fn(d) for d in docs]
+        timings.append(time.perf_counter() - t0)
+        n_tokens = sum(o.count(" ") + 1 for o in out if o)
+    cold, best = timings[0], min(timings)
+    print(
+        f"{name:<22} cold {cold:7.3f}s  best {best:7.3f}s  "
+        f"{len(docs) / best:9.1f} docs/s  {n_tokens / best:11.0f} tokens/s  {n_chars / best / 1e6:6.2f} MB/s"
+    )
+
+
+def vocabulary_with(preprocessor, tokenizer, df_agg):
+    original_preprocess, original_tokenizer = rfa.preprocess_text, rfa.PROCESSING_OPTS["tokenizer"]
+    rfa.preprocess_text = preprocessor
+    rfa.PROCESSING_OPTS["tokenizer"] = tokenizer
+    try:
+        vectorizer, _, _ = rfa.build_tfidf_matrix(df_agg)
+    finally:
+        rfa.preprocess_text = original_preprocess
+        rfa.PROCESSING_OPTS["tokenizer"] = original_tokenizer
+    return set(vectorizer.vocabulary_)
+
+
+def compare(name, reference, other):
+    missing, extra = reference - other, other - reference
+    jaccard = len(reference & other) / max(len(reference | other), 1)
+    status = "IDENTICAL" if not missing and not extra else f"jaccard={jaccard:.4f}"
+    print(f"{name:<22} {status}  (-{len(missing)} / +{len(extra)} terms of {len(reference)})")
+    return not missing and not extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default=os.getenv("PLANT_DATA_PATH", DEFAULT_DATA))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rfa.ensure_nltk_resources()
+    df_raw, df_agg = rfa.load_and_aggregate_json(args.data)
+    docs = df_raw["content"].fillna("").tolist()
+    print(f"{len(docs)} articles, {sum(len(d) for d in docs) / 1e6:.2f} MB of text\n")
+
+    def with_tokenizer(tokenizer):
+        def fn(doc):
+            rfa.PROCESSING_OPTS["tokenizer"] = tokenizer
+            return rfa.preprocess_text(doc)
+        return fn
+
+    run_variant("original", preprocess_original, docs, args.repeat)
+    run_variant("nltk + stem cache", with_tokenizer("nltk"), docs, args.repeat)
+    run_variant("regex + stem cache", with_tokenizer("regex"), docs, args.repeat)
+    rfa.PROCESSING_OPTS["tokenizer"] = "nltk"
+
+    print("\nTF-IDF vocabulary vs original pipeline:")
+    reference = vocabulary_with(preprocess_original, "nltk", df_agg)
+    ok = compare("nltk + stem cache", reference, vocabulary_with(rfa.preprocess_text, "nltk", df_agg))
+    compare("regex + stem cache", reference, vocabulary_with(rfa.preprocess_text, "regex", df_agg))
+    if not ok:
+        sys.exit("stem cache changed the TF-IDF vocabulary")
+
+
+if __name__ == "__main__":
+    main()
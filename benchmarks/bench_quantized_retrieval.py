@@ -0,0 +1,162 @@
+"""
+Recall@k, latency and storage of rag_service's retrieval modes (RAG_RETRIEVAL_MODE):
+exact float32 search vs. a halfvec or binary-quantised first stage with exact re-ranking.
+
+Queries are random word windows cut from stored chunks. Every query is run in exact mode
+(the reference top-k) and in halfvec / binary mode for each --candidates value; recall@k is
+the share of the exact top-k that the quantised mode returns.
+
+By default the corpus is ingested into the in-memory fake plant_documents (fakes.py) with
+the dense variant of FakeEmbedder, and storage is estimated from pgvector's on-disk formats
+(vector 8+4d bytes, halfvec 8+2d, bit 8+d/8). With --database the queries run against the
+Postgres configured in .env (already ingested, indexes from config/initDb.js, real
+all-MiniLM-L6-v2), and table/index sizes are read from pg_relation_size.
+
+Usage:
+    python benchmarks/bench_quantized_retrieval.py
+    python benchmarks/generate_corpus.py --articles 5000 --out /tmp/corpus_5k.json
+    python benchmarks/bench_quantized_retrieval.py --corpus /tmp/corpus_5k.json --candidates 10,20,40,80
+    python benchmarks/bench_quantized_retrieval.py --database --json quantized.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend_app")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+
+MODES = ("halfvec", "binary")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def setup(args):
+    """rag_service against the fake store (corpus ingested) or, with --database, the real one."""
+    store = None
+    if not args.database:
+        import sentence_transformers
+
+        store = fakes.VectorStore()
+        fakes.install(store)
+        sentence_transformers.SentenceTransformer = lambda *a, **k: fakes.FakeEmbedder(dense=True)
+    sys.path.insert(0, BACKEND_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import ingest_data
+        import rag_service
+
+        if store is not None:
+            ingest_data.load_and_store_articles(args.corpus)
+    return rag_service, store
+
+
+def chunk_texts(rag_service, store):
+    if store is not None:
+        return [row[3] for row in store.rows]
+    with rag_service.db.connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT chunk_text FROM plant_documents WHERE embedding IS NOT NULL")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def make_queries(texts, n, rng, words=12):
+    queries = []
+    for text in rng.sample(texts, min(n, len(texts))):
+        tokens = text.split()
+        start = rng.randrange(max(1, len(tokens) - words))
+        queries.append(" ".join(tokens[start:start + words]))
+    return queries
+
+
+def timed_retrieve(rag_service, query, k, mode, candidates=None):
+    start = time.perf_counter()
+    chunks = rag_service.retrieve_relevant_chunks(query, top_k=k, mode=mode, candidates=candidates)
+    return time.perf_counter() - start, [(c["article_title"], c["chunk_text"]) for c in chunks]
+
+
+def storage_estimate(rows, dim):
+    per_row = {"exact": 8 + 4 * dim, "halfvec": 8 + 2 * dim, "binary": 8 + dim // 8}
+    return {mode: {"bytes_per_row": size, "column_mb": round(rows * size / 2**20, 2)} for mode, size in per_row.items()}
+
+
+def storage_measured(rag_service):
+    with rag_service.db.connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT avg(pg_column_size(embedding)),
+                   avg(pg_column_size(embedding::halfvec(384))),
+                   avg(pg_column_size(binary_quantize(embedding)::bit(384))),
+                   pg_table_size('plant_documents')
+            FROM plant_documents WHERE embedding IS NOT NULL
+        """)
+        exact, half, bits, table = cursor.fetchone()
+        cursor.execute("""
+            SELECT indexrelname, pg_relation_size(indexrelid)
+            FROM pg_stat_user_indexes WHERE relname = 'plant_documents'
+        """)
+        indexes = {name: round(size / 2**20, 2) for name, size in cursor.fetchall()}
+    return {
+        "bytes_per_row": {"exact": float(exact), "halfvec": float(half), "binary": float(bits)},
+        "table_mb": round(table / 2**20, 2),
+        "index_mb": indexes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", help="articles JSON (default backend_app/data/plant_articles.json)")
+    parser.add_argument("--database", action="store_true", help="query the Postgres from .env instead of the fake")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--candidates", default="5,10,20,40,80", help="first-stage candidate counts to sweep")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rag_service, store = setup(args)
+    texts = chunk_texts(rag_service, store)
+    queries = make_queries(texts, args.queries, random.Random(args.seed))
+    print(f"{len(texts)} chunks, {len(queries)} queries, k={args.k}")
+
+    for query in queries[:5]:  # warm-up: builds the fake's matrices / fills Postgres caches
+        for mode in ("exact",) + MODES:
+            timed_retrieve(rag_service, query, args.k, mode, args.k)
+
+    exact_runs = [timed_retrieve(rag_service, q, args.k, "exact") for q in queries]
+    reference = [set(result) for _, result in exact_runs]
+    rows = [{"mode": "exact", "candidates": None, "recall": 1.0,
+             "p50_ms": round(statistics.median(t for t, _ in exact_runs) * 1000, 2),
+             "p95_ms": round(percentile([t for t, _ in exact_runs], 95) * 1000, 2)}]
+    for mode in MODES:
+        for candidates in (int(c) for c in args.candidates.split(",")):
+            runs = [timed_retrieve(rag_service, q, args.k, mode, candidates) for q in queries]
+            recall = statistics.mean(len(ref & set(result)) / max(1, len(ref))
+                                     for ref, (_, result) in zip(reference, runs))
+            times = [t for t, _ in runs]
+            rows.append({"mode": mode, "candidates": max(candidates, args.k), "recall": round(recall, 4),
+                         "p50_ms": round(statistics.median(times) * 1000, 2),
+                         "p95_ms": round(percentile(times, 95) * 1000, 2)})
+
+    for r in rows:
+        candidates = "-" if r["candidates"] is None else r["candidates"]
+        print(f"{r['mode']:<8} candidates {candidates:>4}  recall@{args.k} {r['recall']:.3f}  "
+              f"p50 {r['p50_ms']:7.2f} ms  p95 {r['p95_ms']:7.2f} ms")
+
+    storage = storage_measured(rag_service) if args.database else storage_estimate(len(texts), fakes.EMBEDDING_DIM)
+    print("storage:", json.dumps(storage))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"chunks": len(texts), "k": args.k, "results": rows, "storage": storage}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Seed-name resolution: the old exact lower-cased lookup of get_centroid_vector (dict rebuilt on
+every call) vs. PlantNameIndex (Recommendation_module/recommender_for_app.py, built once).
+
+Queries are the model's plant names with the kind of noise collection entries have: case
+changes, trailing punctuation, a one-character typo, a cultivar suffix - plus random strings
+that must stay unresolved. Reported per query kind: the share resolved to the right plant,
+and per-lookup latency.
+
+Usage:
+    python benchmarks/bench_seed_resolution.py
+    python benchmarks/bench_seed_resolution.py --corpus /tmp/corpus_5k.json --json seeds.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import string
+import sys
+import time
+from collections import defaultdict
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "Recommendation_module"))
+
+from recommender_for_app import PlantNameIndex, _normalize_name  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def typo(rng, name):
+    i = rng.randrange(1, len(name) - 1)
+    kind = rng.choice(("delete", "double", "swap", "replace"))
+    if kind == "delete":
+        return name[:i] + name[i + 1:]
+    if kind == "double":
+        return name[:i] + name[i] + name[i:]
+    if kind == "swap":
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+
+
+def make_queries(names, rng, per_kind):
+    sample = rng.sample(names, min(per_kind, len(names)))
+    queries = []
+    for name in sample:
+        queries.append(("exact", name, name))
+        queries.append(("case", name.upper() if rng.random() < 0.5 else name.lower(), name))
+        queries.append(("punctuation", name + rng.choice((",", ".", " ", " (indoor)")), name))
+        queries.append(("cultivar", f"{name} 'Variegata'", name))
+        if len(name) >= 6:
+            queries.append(("typo", typo(rng, name), name))
+    for _ in range(len(sample)):
+        junk = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 14)))
+        queries.append(("unknown", junk, None))
+    return queries
+
+
+def old_lookup(seed, plant_names):
+    # get_centroid_vector before PlantNameIndex: dict per call, exact lower-cased match
+    name_to_idx = {n.lower(): i for i, n in enumerate(plant_names)}
+    idx = name_to_idx.get(seed.strip().lower())
+    return plant_names[idx] if idx is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", default=os.path.join(ROOT_DIR, "backend_app", "data", "plant_articles.json"))
+    parser.add_argument("--per-kind", type=int, default=500, help="plant names sampled per query kind")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        plant_names = sorted({a["plant_name"] for a in json.load(f)})
+    start = time.perf_counter()
+    index = PlantNameIndex(plant_names)
+    build_ms = (time.perf_counter() - start) * 1000
+    queries = make_queries(plant_names, random.Random(args.seed), args.per_kind)
+
+    def same_plant(found, expected):
+        if expected is None:
+            return found is None
+        return found is not None and _normalize_name(found) == _normalize_name(expected)
+
+    results = {}
+    for method, lookup in (("exact_dict", lambda q: old_lookup(q, plant_names)),
+                           ("name_index", lambda q: index.lookup(q).plant_name)):
+        correct, times = defaultdict(list), defaultdict(list)
+        for kind, query, expected in queries:
+            t0 = time.perf_counter()
+            found = lookup(query)
+            times[kind].append(time.perf_counter() - t0)
+            correct[kind].append(same_plant(found, expected))
+        results[method] = {
+            kind: {"accuracy": round(statistics.mean(correct[kind]), 4),
+                   "p50_us": round(percentile(times[kind], 50) * 1e6, 1),
+                   "p99_us": round(percentile(times[kind], 99) * 1e6, 1)}
+            for kind in correct
+        }
+
+    print(f"{len(plant_names)} plant names, index built in {build_ms:.1f} ms, {len(queries)} queries")
+    for method, kinds in results.items():
+        print(method)
+        for kind, r in kinds.items():
+            print(f"  {kind:<12} correct {r['accuracy']:6.1%}  p50 {r['p50_us']:8.1f} us  p99 {r['p99_us']:8.1f} us")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"plant_names": len(plant_names), "build_ms": round(build_ms, 2), "results": results}, f,
+                      indent=2)
+
+
+if __name__ == "__main__":
+    main()
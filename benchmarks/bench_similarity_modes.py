@@ -0,0 +1,83 @@
+"""
+similar_plants latency: TF-IDF (sparse, vocabulary-wide) vs plant embeddings (dense, 384-d),
+plus how much the two top-k lists overlap.
+
+Without an exported embeddings file (backend_app/compute_plant_embeddings.py --export) the
+script falls back to 384-d LSA vectors (TruncatedSVD of the TF-IDF matrix), which have the
+same shape and cost as the MiniLM ones but not their semantics - use them for latency only.
+
+Usage:
+    python benchmarks/bench_similarity_modes.py [--embeddings backend_app/data/plant_embeddings.npz]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "Recommendation_module"))
+
+import recommender_for_app as rfa  # noqa: E402
+
+DEFAULT_DATA = os.path.join(ROOT_DIR, "backend_app", "data", "plant_articles.json")
+DEFAULT_EMBEDDINGS = os.path.join(ROOT_DIR, "backend_app", "data", "plant_embeddings.npz")
+
+
+def lsa_embeddings(rec, dim):
+    from sklearn.decomposition import TruncatedSVD
+
+    dim = min(dim, rec.matrix.shape[0] - 1, rec.matrix.shape[1] - 1)
+    return rec.plant_names, TruncatedSVD(n_components=dim, random_state=0).fit_transform(rec.matrix)
+
+
+def time_queries(rec, queries, mode, top_k):
+    timings, results = [], []
+    for seeds in queries:
+        start = time.perf_counter()
+        results.append([name for name, _ in rec.similar_plants(seeds, top_k=top_k, mode=mode)])
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default=os.getenv("PLANT_DATA_PATH", DEFAULT_DATA))
+    parser.add_argument("--embeddings", default=os.getenv("PLANT_EMBEDDINGS_PATH", DEFAULT_EMBEDDINGS))
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seeds", type=int, default=2, help="seed plants per query")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384, help="LSA fallback dimension")
+    args = parser.parse_args()
+
+    rec = rfa.PlantRecommender.from_json(args.data)
+    if os.path.exists(args.embeddings):
+        names, vectors = rfa.load_plant_embeddings(args.embeddings)
+        source = args.embeddings
+    else:
+        names, vectors = lsa_embeddings(rec, args.dim)
+        source = f"LSA fallback ({vectors.shape[1]}-d), no {args.embeddings}"
+    rec.attach_embeddings(names, vectors)
+    covered = int((abs(rec.embeddings).sum(axis=1) > 0).sum())
+    print(f"{len(rec.plant_names)} plants, tf-idf {rec.matrix.shape} nnz={rec.matrix.nnz}, "
+          f"embeddings {rec.embeddings.shape} ({covered} plants covered) from {source}")
+
+    rng = random.Random(0)
+    queries = [rng.sample(rec.plant_names, min(args.seeds, len(rec.plant_names))) for _ in range(args.queries)]
+    results = {}
+    for mode in ("tfidf", "embedding"):
+        time_queries(rec, queries[:20], mode, args.top_k)  # warm-up
+        timings, results[mode] = time_queries(rec, queries, mode, args.top_k)
+        timings.sort()
+        print(f"{mode:<10} mean {statistics.mean(timings):7.3f} ms  p50 {timings[len(timings) // 2]:7.3f} ms  "
+              f"p95 {timings[int(len(timings) * 0.95)]:7.3f} ms")
+
+    overlap = statistics.mean(
+        len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(results["tfidf"], results["embedding"])
+    )
+    print(f"top-{args.top_k} overlap tf-idf vs embedding: {overlap:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Trait extraction on plant_articles.json: the single-pass TraitExtractor against the
+per-pattern parse_traits_from_text reference – parity on every article and timing.
+
+Usage:
+    python benchmarks/bench_traits.py [--data path/to/plant_articles.json] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "Recommendation_module"))
+
+import recommender_for_app as rfa  # noqa: E402
+
+DEFAULT_DATA = os.path.join(ROOT_DIR, "backend_app", "data", "plant_articles.json")
+
+
+def best_time(fn, docs, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for d in docs:
+            fn(d)
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default=os.getenv("PLANT_DATA_PATH", DEFAULT_DATA))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df_raw, _ = rfa.load_and_aggregate_json(args.data)
+    docs = [d for d in df_raw["content"].tolist() if isinstance(d, str)]
+
+    mismatches = 0
+    for i, d in enumerate(docs):
+        expected, got = rfa.parse_traits_from_text(d), rfa.parse_traits_single_pass(d)
+        if expected != got:
+            mismatches += 1
+            print(f"article {i}: expected {expected}, got {got}")
+    print(f"parity: {len(docs) - mismatches}/{len(docs)} articles identical")
+
+    n_chars = sum(len(d) for d in docs)
+    reference = best_time(rfa.parse_traits_from_text, docs, args.repeat)
+    single = best_time(rfa.parse_traits_single_pass, docs, args.repeat)
+    for name, t in (("per-pattern re.search", reference), ("single pass", single)):
+        print(f"{name:<22} {t * 1000:8.1f} ms  {len(docs) / t:9.1f} docs/s  {n_chars / t / 1e6:6.2f} MB/s")
+    print(f"speedup: {reference / single:.2f}x")
+    if mismatches:
+        sys.exit("single-pass extractor disagrees with parse_traits_from_text")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+PlantRecommender.add_articles vs. a full rebuild: the incremental model must match
+PlantRecommender.from_json on the same articles (plant order, vocabulary, TF-IDF values,
+traits, constraint rankings, similar_plants results), and adding must be much cheaper
+than rebuilding.
+
+A random --holdout share of the corpus is left out of the initial build and added back in
+batches of --batch articles (some held-out plants are new, some get extra articles);
+--rebuild-every sets PlantRecommender.full_rebuild_every so the periodic full-rebuild
+safety net is exercised as well. Exits with status 1 on any mismatch.
+
+Usage:
+    python benchmarks/check_incremental_tfidf.py
+    python benchmarks/check_incremental_tfidf.py --data /tmp/corpus_5k.json --holdout 0.01 --batch 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "Recommendation_module"))
+
+import recommender_for_app as rfa  # noqa: E402
+
+DEFAULT_DATA = os.path.join(ROOT_DIR, "backend_app", "data", "plant_articles.json")
+
+
+def write_json(articles, directory, name):
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(articles, f)
+    return path
+
+
+def compare(incremental, full, rng, queries=50):
+    """List of mismatch descriptions (empty = models agree)."""
+    problems = []
+    if incremental.plant_names != full.plant_names:
+        return ["plant_names differ"]
+    if incremental.vectorizer.vocabulary_ != full.vectorizer.vocabulary_:
+        problems.append("vocabulary differs")
+    elif incremental.matrix.shape != full.matrix.shape:
+        problems.append(f"matrix shape {incremental.matrix.shape} != {full.matrix.shape}")
+    else:
+        diff = abs(incremental.matrix - full.matrix).max() if full.matrix.nnz else 0.0
+        if diff > 1e-12:
+            problems.append(f"tf-idf differs by up to {diff:.3g}")
+        if not np.allclose(incremental.vectorizer.idf_, full.vectorizer.idf_, rtol=0, atol=1e-12):
+            problems.append("idf differs")
+    if not incremental.df_traits.reset_index(drop=True).equals(full.df_traits.reset_index(drop=True)):
+        problems.append("traits differ")
+    if not (np.array_equal(incremental.constraint_index.scores, full.constraint_index.scores)
+            and np.array_equal(incremental.constraint_index.rankings, full.constraint_index.rankings)):
+        problems.append("constraint rankings differ")
+    names = full.plant_names
+    for _ in range(queries):
+        seeds = rng.sample(names, min(2, len(names)))
+        a = incremental.similar_plants(seeds, top_k=10)
+        b = full.similar_plants(seeds, top_k=10)
+        if [n for n, _ in a] != [n for n, _ in b] or not np.allclose([s for _, s in a], [s for _, s in b], atol=1e-9):
+            problems.append(f"similar_plants({seeds}) differs")
+            break
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--data", default=os.getenv("PLANT_DATA_PATH", DEFAULT_DATA))
+    parser.add_argument("--holdout", type=float, default=0.25, help="share of articles added incrementally")
+    parser.add_argument("--batch", type=int, default=3, help="articles per add_articles call")
+    parser.add_argument("--rebuild-every", type=int, default=4, help="full_rebuild_every for the test (0 = never)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(args.data, encoding="utf-8") as f:
+        articles = json.load(f)
+    held = set(rng.sample(range(len(articles)), max(1, int(len(articles) * args.holdout))))
+    base = [a for i, a in enumerate(articles) if i not in held]
+    added = [a for i, a in enumerate(articles) if i in held]
+    base_plants = {a["plant_name"] for a in base}
+    new_plants = {a["plant_name"] for a in added} - base_plants
+    print(f"{len(base)} base articles, {len(added)} added in batches of {args.batch} "
+          f"({len(new_plants)} new plants), full rebuild every {args.rebuild_every} adds")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        incremental = rfa.PlantRecommender.from_json(write_json(base, tmp, "base.json"), incremental=True)
+        incremental.full_rebuild_every = args.rebuild_every
+        add_times, rebuild_times = [], []
+        for start in range(0, len(added), args.batch):
+            rebuild = bool(args.rebuild_every) and incremental.updates_since_rebuild + 1 >= args.rebuild_every
+            t0 = time.perf_counter()
+            incremental.add_articles(added[start:start + args.batch])
+            (rebuild_times if rebuild else add_times).append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        full = rfa.PlantRecommender.from_json(write_json(base + added, tmp, "full.json"))
+        full_s = time.perf_counter() - t0
+
+    problems = compare(incremental, full, rng)
+    print(f"full build {full_s:.2f} s | add_articles p50 {statistics.median(add_times) * 1000:.1f} ms "
+          f"max {max(add_times) * 1000:.1f} ms ({len(add_times)} calls, {len(rebuild_times)} safety-net rebuilds)")
+    if problems:
+        print("MISMATCH: " + "; ".join(problems))
+        sys.exit(1)
+    print("incremental and full builds agree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Offline stand-ins used by the benchmark suite, so RAG numbers are reproducible without a
+Postgres/pgvector server, a Gemini API key or a downloaded embedding model.
+
+- FakeEmbedder: SentenceTransformer-compatible ``encode`` returning deterministic,
+  L2-normalised 384-d hashed bag-of-words vectors (optional fixed latency). ``dense=True``
+  sums a fixed random Gaussian vector per token instead, so every component is populated
+  like a real sentence embedding (needed where quantisation is measured).
+- FakeGeminiModel: ``generate_content`` with a fixed latency plus per-output-token cost.
+- VectorStore / FakeConnection: a psycopg2-style connection over an in-memory
+  plant_documents table that understands the statements the backend issues
+  (INSERT, DELETE, COUNT, pgvector ``<#>`` top-k, the halfvec / binary_quantize
+  first stage + exact re-rank of rag_service (capped at hnsw.ef_search rows like an HNSW
+  scan, SET LOCAL resets at commit), and ingest_data's staging table + swap, with
+  DELETE / INSERT ... SELECT applied atomically at commit), plus the conversations /
+  messages statements of conversations.py. ``install()`` patches psycopg2.connect.
+
+The fakes only replace *services*; the backend modules themselves are imported and run
+unchanged, so their Python-side cost is part of every measurement.
+"""
+import hashlib
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+HNSW_EF_SEARCH_DEFAULT = 40  # pgvector's hnsw.ef_search default
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class FakeEmbedder:
+    def __init__(self, dim: int = EMBEDDING_DIM, latency_ms: float = 0.0, dense: bool = False):
+        self.dim = dim
+        self.latency = latency_ms / 1000.0
+        self.dense = dense
+        self._token_vectors = {}
+
+    def _bucket(self, token: str):
+        digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def _token_vector(self, token: str):
+        vector = self._token_vectors.get(token)
+        if vector is None:
+            seed = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._token_vectors[token] = vector
+        return vector
+
+    def encode(self, sentences, convert_to_numpy: bool = True, batch_size: int = 32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if self.latency:
+            time.sleep(self.latency * max(1, -(-len(texts) // batch_size)))
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN_RE.findall(text.lower()):
+                if self.dense:
+                    out[row] += self._token_vector(token)
+                    continue
+                col, sign = self._bucket(token)
+                out[row, col] += sign
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        out /= np.where(norms == 0, 1.0, norms)
+        return out[0] if single else out
+
+
+class FakeGeminiModel:
+    """
+    generate_content(prompt) after ``latency_ms + tokens * per_token_ms``; counts calls and prompt sizes.
+
+    Tail latency and failures are injectable: with probability ``slow_prob`` a call takes
+    ``slow_ms`` instead, with ``error_prob`` it raises. A ``request_options={"timeout": s}``
+    shorter than the latency raises TimeoutError after ``s``, like the SDK's deadline.
+    """
+
+    def __init__(self, latency_ms: float = 400.0, tokens: int = 120, per_token_ms: float = 2.0,
+                 slow_prob: float = 0.0, slow_ms: float = 0.0, error_prob: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1000.0
+        self.tokens = tokens
+        self.per_token = per_token_ms / 1000.0
+        self.slow_prob = slow_prob
+        self.slow = slow_ms / 1000.0
+        self.error_prob = error_prob
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.prompt_chars += len(prompt if isinstance(prompt, str) else str(prompt))
+            slow = self.rng.random() < self.slow_prob
+            fail = self.rng.random() < self.error_prob
+        try:
+            latency = self.slow if slow else self.latency + self.tokens * self.per_token
+            timeout = (request_options or {}).get("timeout")
+            if timeout is not None and latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError("fake Gemini deadline exceeded")
+            time.sleep(latency)
+            if fail:
+                raise RuntimeError("fake Gemini error")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        text = " ".join(["leaf"] * self.tokens)
+        return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(
+            prompt_token_count=self.prompt_chars // 4, candidates_token_count=self.tokens))
+
+
+def _parse_vector(value):
+    if isinstance(value, str):
+        return np.fromstring(value.strip("[]"), sep=",", dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+# popcount of every byte value, for Hamming distances on packed bits
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+class VectorStore:
+    """In-memory plant_documents: parallel lists + lazily built embedding matrices."""
+
+    def __init__(self, query_latency_ms: float = 0.0):
+        self.rows = []  # (plant_name, article_title, article_url, chunk_text)
+        self.vectors = []
+        self._matrix = None
+        self._quantized = {}  # mode -> halfvec (rounded, kept as float32) / binary_quantize copy of _matrix
+        self.query_latency = query_latency_ms / 1000.0
+        self.lock = threading.RLock()  # held by FakeConnection.commit() for a whole transaction
+        self.statements = 0
+        self.staging = None  # plant_documents_staging (ingest_data.rebuild_index), a VectorStore
+        self.conversations = {}  # id -> [summary, summary_message_id] (backend_app/conversations.py)
+        self.messages = []  # (id, conversation_id, message, response)
+
+    def insert(self, plant_name, title, url, text, embedding):
+        with self.lock:
+            self.rows.append((plant_name, title, url, text))
+            self.vectors.append(_parse_vector(embedding))
+            self._matrix = None
+            self._quantized = {}
+
+    def clear(self):
+        self.replace([], [])
+
+    def replace(self, rows, vectors):
+        with self.lock:
+            self.rows, self.vectors, self._matrix, self._quantized = list(rows), list(vectors), None, {}
+
+    def _matrices(self, mode: str):
+        with self.lock:
+            if self._matrix is None:
+                self._matrix = np.vstack(self.vectors) if self.vectors else np.zeros((0, EMBEDDING_DIM), np.float32)
+            if mode != "exact" and mode not in self._quantized:
+                # halfvec: pgvector stores 16-bit floats but computes distances in float32;
+                # binary_quantize: 1 where the component is > 0
+                self._quantized[mode] = (self._matrix.astype(np.float16).astype(np.float32) if mode == "halfvec"
+                                         else np.packbits(self._matrix > 0, axis=1))
+            return self._matrix, self._quantized.get(mode), self.rows
+
+    @staticmethod
+    def _smallest(distances, k: int):
+        k = min(k, len(distances))
+        if not k:
+            return np.zeros(0, dtype=np.int64)
+        idx = np.argpartition(distances, k - 1)[:k]
+        return idx[np.argsort(distances[idx], kind="stable")]
+
+    def top_k(self, query, k: int, mode: str = "exact", candidates: int = None):
+        """Rows ordered like pgvector would: ``mode`` picks ``candidates`` rows, re-ranked exactly."""
+        matrix, quantized, rows = self._matrices(mode)
+        if self.query_latency:
+            time.sleep(self.query_latency)
+        query = _parse_vector(query)
+        if mode == "exact":
+            idx = None
+        elif mode == "halfvec":
+            idx = self._smallest(-(quantized @ query.astype(np.float16).astype(np.float32)), candidates)
+        else:
+            packed = np.packbits(query > 0)
+            idx = self._smallest(_POPCOUNT[np.bitwise_xor(quantized, packed)].sum(axis=1), candidates)
+        # pgvector: a <#> b = -(a . b), ORDER BY ascending
+        scores = (matrix if idx is None else matrix[idx]) @ query
+        best = self._smallest(-scores, k)
+        return [rows[i if idx is None else idx[i]] + (1 + float(scores[i]),) for i in best]
+
+
+class FakeCursor:
+    """Single-row inserts apply at once; DELETE and INSERT ... SELECT wait for commit() like a transaction."""
+
+    def __init__(self, store: VectorStore, connection=None):
+        self.store = store
+        self.connection = connection
+        self._result = []
+        self.rowcount = -1
+
+    def _defer(self, apply):
+        if self.connection is None:
+            apply()
+        else:
+            self.connection.pending.append(apply)
+
+    def execute(self, sql, params=None):
+        self.store.statements += 1
+        statement = " ".join(sql.split()).lower()
+        params = params or ()
+        self._result = []
+        if statement.startswith(("drop table if exists plant_documents_staging", "drop table plant_documents_staging")):
+            self._defer(lambda: setattr(self.store, "staging", None))
+        elif statement.startswith("create table plant_documents_staging"):
+            self._defer(lambda: setattr(self.store, "staging", VectorStore()))
+        elif statement.startswith("insert into plant_documents_staging"):
+            self.store.staging.insert(*params[:5])
+            self.rowcount = 1
+        elif statement.startswith("insert into plant_documents") and "from plant_documents_staging" in statement:
+            staging = self.store.staging
+            self.rowcount = len(staging.rows)
+            # applied after the pending DELETE: the same rows appended to an empty table
+            self._defer(lambda: self.store.replace(self.store.rows + staging.rows, self.store.vectors + staging.vectors))
+        elif statement.startswith("insert into plant_documents"):
+            self.store.insert(*params[:5])
+            self.rowcount = 1
+        elif statement.startswith("delete from plant_documents"):
+            self.rowcount = len(self.store.rows)
+            self._defer(self.store.clear)
+        elif statement.startswith("analyze"):
+            pass
+        elif statement.startswith("set local hnsw.ef_search"):
+            if self.connection is not None:
+                self.connection.ef_search = int(params[0])
+        elif statement.startswith("select summary, summary_message_id from conversations"):
+            row = self.store.conversations.get(params[0])
+            self._result = [tuple(row)] if row is not None else []
+        elif statement.startswith("select id, message, response from messages"):
+            conversation_id, after, limit = params
+            rows = [m for m in self.store.messages if m[1] == conversation_id and m[0] > after]
+            self._result = [(m[0], m[2], m[3]) for m in rows[::-1][:limit]]
+        elif statement.startswith("insert into messages"):
+            import psycopg2
+
+            if params[0] not in self.store.conversations:
+                raise psycopg2.IntegrityError("conversation does not exist")
+            with self.store.lock:
+                message_id = len(self.store.messages) + 1
+                self.store.messages.append((message_id, params[0], params[1], params[2]))
+            self._result, self.rowcount = [(message_id,)], 1
+        elif statement.startswith("update conversations set summary"):
+            summary, upto, conversation_id = params
+            self.store.conversations[conversation_id] = [summary, upto]
+            self.rowcount = 1
+        elif statement.startswith("select count(*)") and "from plant_documents" in statement:
+            self._result = [(len(self.store.rows),)]
+        elif "from plant_documents" in statement and "<#>" in statement:
+            mode = "halfvec" if "::halfvec" in statement else "binary" if "binary_quantize" in statement else "exact"
+            # like an HNSW index scan: no more than hnsw.ef_search rows come out of the first stage
+            ef_search = getattr(self.connection, "ef_search", HNSW_EF_SEARCH_DEFAULT)
+            candidates = min(int(params[2]), ef_search) if mode != "exact" else None
+            self._result = self.store.top_k(params[0], int(params[-1]), mode, candidates)
+        else:
+            raise NotImplementedError(f"fake database does not understand: {statement[:80]}")
+
+    def executemany(self, sql, seq):
+        for params in seq:
+            self.execute(sql, params)
+
+    def fetchall(self):
+        result, self._result = self._result, []
+        return result
+
+    def fetchone(self):
+        return self._result.pop(0) if self._result else None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeConnection:
+    def __init__(self, store: VectorStore, connect_latency_ms: float = 0.0):
+        self.store = store
+        self.pending = []
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=0)  # idle, for psycopg2.pool.putconn
+        self.ef_search = HNSW_EF_SEARCH_DEFAULT
+        if connect_latency_ms:
+            time.sleep(connect_latency_ms / 1000.0)
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self.store, self)
+
+    def commit(self):
+        # readers of the store never see a half-applied transaction
+        with self.store.lock:
+            for apply in self.pending:
+                apply()
+            self.pending = []
+        self.ef_search = HNSW_EF_SEARCH_DEFAULT  # SET LOCAL ends with the transaction
+
+    def rollback(self):
+        self.pending = []
+        self.ef_search = HNSW_EF_SEARCH_DEFAULT
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def install(store: VectorStore, connect_latency_ms: float = 0.0):
+    """Route every psycopg2.connect() in this process to ``store``; returns a function undoing it."""
+    import psycopg2
+
+    original = psycopg2.connect
+    psycopg2.connect = lambda *args, **kwargs: FakeConnection(store, connect_latency_ms)
+    return lambda: setattr(psycopg2, "connect", original)
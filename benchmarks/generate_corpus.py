@@ -0,0 +1,201 @@
+"""
+Synthetic plant-article corpora for scale tests, in the plant_articles.json schema
+(plant_name, article_title, site, link, content) so they load with both
+PlantRecommender.from_json and ingest_data.load_and_store_articles.
+
+Every plant gets a hidden care profile (light / water / humidity / toxicity / difficulty);
+its articles mention those traits with phrases the recommender's trait regexes recognise,
+embedded in filler text built from a bank of recurring phrases over a Zipf-distributed
+vocabulary: word and bigram frequencies are heavy-tailed and the TF-IDF vocabulary keeps
+growing with the corpus, like real text. The output is streamed, so memory use is
+flat regardless of --articles.
+
+Usage:
+    python benchmarks/generate_corpus.py --articles 10000 --out /tmp/corpus_10k.json
+    python benchmarks/generate_corpus.py --articles 1000000 --mean-chars 2000 --out /tmp/corpus_1m.json \\
+        --truth /tmp/corpus_1m_traits.json
+    python benchmarks/run_suite.py --corpus /tmp/corpus_10k.json --only ingest,similar,constraints,hybrid
+"""
+import argparse
+import json
+import os
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+GENERA = [
+    "Monstera", "Philodendron", "Epipremnum", "Calathea", "Maranta", "Ficus", "Dracaena", "Sansevieria",
+    "Spathiphyllum", "Anthurium", "Alocasia", "Aglaonema", "Peperomia", "Pilea", "Hoya", "Begonia",
+    "Aloe", "Haworthia", "Echeveria", "Crassula", "Sedum", "Kalanchoe", "Zamioculcas", "Chlorophytum",
+    "Nephrolepis", "Asplenium", "Adiantum", "Tradescantia", "Syngonium", "Dieffenbachia", "Schefflera",
+    "Croton", "Fittonia", "Oxalis", "Strelitzia", "Yucca", "Beaucarnea", "Chamaedorea", "Dypsis",
+    "Phalaenopsis", "Dendrobium", "Cattleya", "Saintpaulia", "Streptocarpus", "Cyclamen", "Gardenia",
+    "Jasminum", "Rosmarinus", "Ocimum", "Mentha", "Lavandula", "Citrus", "Capsicum", "Coffea",
+]
+
+# Phrases per trait value; each contains a pattern of the matching *_MAP in recommender_for_app.
+TRAIT_PHRASES = {
+    "light": {
+        "low": ["It copes with low light and a shady corner.", "Place it where it gets little light, away from windows."],
+        "medium": ["It prefers bright indirect light.", "An east-facing window with filtered light is ideal."],
+        "high": ["Give it full sun on a south-facing sill.", "It needs at least 6 hours of sun every day."],
+    },
+    "water": {
+        "low": ["Water sparingly and let the soil dry completely between waterings.", "It tolerates drought well."],
+        "medium": ["Allow top inch to dry before watering again.", "Moderate watering keeps it happy."],
+        "high": ["Keep soil evenly moist during the growing season.", "It likes constantly moist compost."],
+    },
+    "humidity": {
+        "low": ["It tolerates dry air from central heating.", "Low humidity is not a problem."],
+        "medium": ["Average humidity is enough.", "Normal household humidity suits it."],
+        "high": ["It loves high humidity, so use a humidifier.", "A humid environment such as a terrarium helps."],
+    },
+    "toxicity": {
+        "safe": ["The plant is non-toxic and pet-safe.", "It is safe for cats and dogs."],
+        "toxic": ["It is toxic if eaten, keep away from pets.", "The sap contains calcium oxalate and is an irritant."],
+    },
+    "difficulty": {
+        "easy": ["A very easy, beginner-friendly plant.", "It is low-maintenance and great for busy people."],
+        "medium": ["It needs moderate care and some experience.", "Best for an intermediate grower."],
+        "hard": ["It is a demanding plant that requires attention.", "Growing it indoors is challenging."],
+    },
+}
+
+SITES = ["thespruce.com", "gardenersworld.com", "almanac.com", "houseplantcentral.com", "rhs.org.uk"]
+TITLE_TEMPLATES = [
+    "How to Grow and Care for {name}", "{name} Care Guide", "{name}: Light, Water and Soil",
+    "Common {name} Problems and How to Fix Them", "Propagating {name}",
+]
+SYLLABLES = ["ka", "lo", "mi", "ren", "sto", "phy", "lum", "ver", "dia", "tha", "gro", "nel", "bra", "sep",
+             "qui", "dor", "fa", "zen", "pel", "ix", "ul", "mo", "tri", "an", "cor", "ves", "ba", "lin"]
+COMMON_WORDS = ("the plant leaves grow soil pot roots water light new stems growth care indoor spring summer "
+                "winter fertilizer repot season temperature flowers cuttings propagation humidity window "
+                "drainage mix feed prune pale brown tips pests mealybugs spider mites healthy young mature").split()
+
+
+def zipf_probabilities(size: int, exponent: float = 1.07):
+    # a handful of items dominate, the long tail keeps adding new ones as the corpus grows
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def build_vocabulary(rng, size: int):
+    words = set(COMMON_WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES, size=rng.integers(2, 5))))
+    return np.array(COMMON_WORDS + sorted(words - set(COMMON_WORDS)))
+
+
+def build_phrases(rng, vocab, size: int):
+    """Recurring 3-8 word phrases; sampling phrases instead of single words keeps bigrams repetitive."""
+    word_probs = zipf_probabilities(len(vocab))
+    lengths = rng.integers(3, 9, size=size)
+    words = vocab[rng.choice(len(vocab), size=int(lengths.sum()), p=word_probs)]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    phrases = np.array([" ".join(words[a:b]) for a, b in zip(bounds[:-1], bounds[1:])], dtype=object)
+    return phrases, zipf_probabilities(size, exponent=0.9)
+
+
+def plant_names(rng, count: int):
+    names, seen = [], set()
+    while len(names) < count:
+        genus = GENERA[int(rng.integers(len(GENERA)))]
+        epithet = "".join(rng.choice(SYLLABLES, size=rng.integers(2, 4)))
+        name = f"{genus} {epithet}"
+        if name in seen:
+            name = f"{name} '{len(names)}'"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def random_profile(rng):
+    return {trait: rng.choice(list(values)) for trait, values in TRAIT_PHRASES.items()}
+
+
+def make_content(rng, name, profile, phrases, probs, mean_chars, mention_prob):
+    target = max(200, int(rng.lognormal(np.log(mean_chars), 0.5)))
+    picked = phrases[rng.choice(len(phrases), size=max(2, target // 36), p=probs)]
+    sentences = [" ".join(picked[i:i + 2]).capitalize() + "." for i in range(0, len(picked), 2)]
+    care = [rng.choice(TRAIT_PHRASES[t][v]) for t, v in profile.items() if rng.random() < mention_prob]
+    for phrase in care:
+        sentences.insert(int(rng.integers(len(sentences) + 1)), phrase)
+    sentences.insert(0, f"{name} is a popular houseplant.")
+    return " ".join(sentences)
+
+
+def republish(rng, content, site, edit_rate=0.02):
+    """A syndicated copy: new lead-in sentence (shifts every chunk boundary) and a few dropped words."""
+    words = [w for w in content.split() if rng.random() >= edit_rate]
+    return f"This article originally appeared on {site} and is shared with permission. " + " ".join(words)
+
+
+def generate(args):
+    rng = np.random.default_rng(args.seed)
+    phrases, probs = build_phrases(rng, build_vocabulary(rng, args.vocabulary), args.phrases)
+    n_plants = args.plants or max(1, round(args.articles / args.articles_per_plant))
+    names = plant_names(rng, n_plants)
+    profiles = [random_profile(rng) for _ in names]
+
+    start = time.perf_counter()
+    written = 0
+    recent = deque(maxlen=1000)  # (plant, content) candidates for --dup-rate copies
+    with open(args.out, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(args.articles):
+            p = i % n_plants  # round-robin: every plant gets articles_per_plant +-1 articles
+            name = names[p]
+            site = rng.choice(SITES)
+            if recent and rng.random() < args.dup_rate:
+                name, original = recent[int(rng.integers(len(recent)))]
+                content = republish(rng, original, site)
+            else:
+                content = make_content(rng, name, profiles[p], phrases, probs, args.mean_chars, args.mention_prob)
+                recent.append((name, content))
+            article = {
+                "plant_name": name,
+                "article_title": rng.choice(TITLE_TEMPLATES).format(name=name),
+                "site": site,
+                "link": f"https://example.org/{re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')}/{i}",
+                "content": content,
+            }
+            if written:
+                f.write(",\n")
+            f.write(json.dumps(article, ensure_ascii=False))
+            written += 1
+            if args.progress and written % args.progress == 0:
+                rate = written / (time.perf_counter() - start)
+                print(f"{written}/{args.articles} articles ({rate:.0f}/s)")
+        f.write("\n]\n")
+
+    if args.truth:
+        with open(args.truth, "w", encoding="utf-8") as f:
+            json.dump({name: profile for name, profile in zip(names, profiles)}, f, indent=1)
+    size_mb = os.path.getsize(args.out) / 2 ** 20
+    print(f"{written} articles for {n_plants} plants, {size_mb:.1f} MB -> {args.out} "
+          f"in {time.perf_counter() - start:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--plants", type=int, help="default: articles / --articles-per-plant")
+    parser.add_argument("--articles-per-plant", type=float, default=3.0, help="the real corpus has ~2.9")
+    parser.add_argument("--mean-chars", type=int, default=8000, help="median article length (real: ~7900)")
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--phrases", type=int, default=50000, help="size of the recurring phrase bank")
+    parser.add_argument("--mention-prob", type=float, default=0.7, help="chance an article mentions each trait")
+    parser.add_argument("--dup-rate", type=float, default=0.0,
+                        help="share of articles that are lightly edited republished copies of a recent article")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--truth", help="also write the generated care profile per plant (JSON)")
+    parser.add_argument("--progress", type=int, default=0, help="print progress every N articles")
+    generate(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Load test for the image classifier (backend_app/models/fastapi_pred.py): sends the images from
+backend_app/uploads to /predict with a fixed concurrency and reports images/s and latency
+percentiles.
+
+Against a running server:
+    python benchmarks/load_predict.py --url http://127.0.0.1:8000 --concurrency 16 --requests 400
+
+Sweep over batch settings (starts a uvicorn server per "max_batch:max_wait_ms" pair):
+    python benchmarks/load_predict.py --sweep 1:0,4:5,8:10,16:20 --concurrency 16
+"""
+import argparse
+import glob
+import json
+import mimetypes
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_IMAGES = os.path.join(ROOT_DIR, "backend_app", "uploads")
+DEFAULT_APP_DIR = os.path.join(ROOT_DIR, "backend_app", "models")
+
+
+def load_images(folder):
+    paths = sorted(
+        p for p in glob.glob(os.path.join(folder, "*"))
+        if os.path.splitext(p)[1].lower() in (".jpg", ".jpeg", ".png", ".webp")
+    )
+    if not paths:
+        sys.exit(f"no images in {folder}")
+    images = []
+    for p in paths:
+        with open(p, "rb") as f:
+            images.append((os.path.basename(p), f.read()))
+    return images
+
+
+def multipart_body(filename, payload):
+    boundary = uuid.uuid4().hex
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    return head + payload + f"\r\n--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+def post_image(url, image):
+    body, content_type = multipart_body(*image)
+    request = urllib.request.Request(f"{url}/predict", data=body, headers={"Content-Type": content_type})
+    t0 = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as response:
+        json.load(response)
+    return time.perf_counter() - t0
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_load(url, images, concurrency, n_requests):
+    post_image(url, images[0])  # warm-up
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda i: post_image(url, images[i % len(images)]), range(n_requests)))
+    elapsed = time.perf_counter() - t0
+    return {
+        "images_per_s": n_requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def wait_until_healthy(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    raise RuntimeError(f"server at {url} did not become healthy")
+
+
+def sweep(settings, args, images):
+    url = f"http://127.0.0.1:{args.port}"
+    results = []
+    for setting in settings.split(","):
+        max_batch, max_wait_ms = setting.split(":")
+        env = dict(os.environ, PRED_MAX_BATCH=max_batch, PRED_MAX_WAIT_MS=max_wait_ms)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "fastapi_pred:app", "--port", str(args.port)],
+            cwd=args.app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_healthy(url)
+            result = run_load(url, images, args.concurrency, args.requests)
+        finally:
+            server.terminate()
+            server.wait()
+        results.append({"max_batch": int(max_batch), "max_wait_ms": float(max_wait_ms), **result})
+        print_result(f"batch={max_batch:<3} wait={max_wait_ms}ms", result)
+    return results
+
+
+def print_result(label, r):
+    print(
+        f"{label:<24} {r['images_per_s']:8.1f} img/s  p50 {r['p50_ms']:7.1f} ms  "
+        f"p95 {r['p95_ms']:7.1f} ms  max {r['max_ms']:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--images", default=DEFAULT_IMAGES)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sweep", help='comma separated "max_batch:max_wait_ms" pairs')
+    parser.add_argument("--app-dir", default=DEFAULT_APP_DIR)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    print(f"{len(images)} images, concurrency {args.concurrency}, {args.requests} requests")
+    if args.sweep:
+        results = sweep(args.sweep, args, images)
+    else:
+        result = run_load(args.url, images, args.concurrency, args.requests)
+        print_result(args.url, result)
+        results = [result]
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Throughput and memory of recommender_service with several uvicorn workers, with and without
+the shared mmap'd model (RECOMMENDER_SHARED_DIR).
+
+Starts one server per setting ("workers" or "workers:shared"), fires /recommend/hybrid
+requests at a fixed concurrency and reports requests/s, latency percentiles and the
+proportional set size (PSS, Linux) summed over the uvicorn master and its workers; PSS
+splits shared pages between the processes that map them, so N workers mapping one model
+count it once.
+
+Usage:
+    python benchmarks/load_recommender.py --sweep 1,4,4:shared --concurrency 16 --requests 2000
+    python benchmarks/load_recommender.py --data /tmp/corpus_10k.json --sweep 1:shared,2:shared,4:shared
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_DIR = os.path.join(ROOT_DIR, "Recommendation_module")
+DEFAULT_DATA = os.path.join(ROOT_DIR, "backend_app", "data", "plant_articles.json")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def descendants(pid):
+    children = []
+    for tid in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return children + [d for c in children for d in descendants(c)]
+
+
+def pss_mb(pid):
+    """PSS of pid and all its descendants in MB (0 where /proc/<pid>/smaps_rollup is unavailable)."""
+    total = 0
+    for p in [pid] + descendants(pid):
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        except (OSError, StopIteration):
+            pass
+    return total / 1024
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    t0 = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=60) as response:
+        json.load(response)
+    return time.perf_counter() - t0
+
+
+def wait_until_ready(url, timeout):
+    """Wait for the first /health answer; the warm-up below makes sure every worker has loaded."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.5)
+    raise RuntimeError(f"server at {url} did not become healthy")
+
+
+def plant_names(data_path):
+    with open(data_path, encoding="utf-8") as f:
+        return sorted({a["plant_name"] for a in json.load(f)})
+
+
+def run_setting(setting, args, names):
+    workers, _, flag = setting.partition(":")
+    workers, shared = int(workers), flag == "shared"
+    env = dict(os.environ, PLANT_DATA_PATH=os.path.abspath(args.data), RECOMMENDER_RELOAD_INTERVAL="0")
+    shared_dir = None
+    if shared:
+        shared_dir = tempfile.mkdtemp(prefix="plant-recommender-")
+        env["RECOMMENDER_SHARED_DIR"] = shared_dir
+    else:
+        env.pop("RECOMMENDER_SHARED_DIR", None)
+    cmd = [sys.executable, "-m", "uvicorn", "recommender_service:app", "--port", str(args.port),
+           "--workers", str(workers), "--log-level", "warning"]
+    started = time.perf_counter()
+    server = subprocess.Popen(cmd, cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_ready(url, args.startup_timeout)
+        rng = random.Random(0)
+        bodies = [{"seed_plants": rng.sample(names, 2), "light": rng.choice(["low", "medium", "high"]),
+                   "pets_safe": rng.random() < 0.5, "top_k": 10} for _ in range(args.requests)]
+        # every worker has to finish importing before the numbers mean anything
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda b: post(f"{url}/recommend/hybrid", b), bodies[: workers * 20]))
+        ready_s = time.perf_counter() - started
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(lambda b: post(f"{url}/recommend/hybrid", b), bodies))
+        elapsed = time.perf_counter() - t0
+        return {
+            "setting": setting,
+            "workers": workers,
+            "shared": shared,
+            "requests_per_s": round(len(bodies) / elapsed, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "pss_mb": round(pss_mb(server.pid), 1),
+            "ready_s": round(ready_s, 1),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        if shared_dir:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sweep", default="1,4,4:shared", help='comma separated "workers" or "workers:shared"')
+    parser.add_argument("--data", default=os.getenv("PLANT_DATA_PATH", DEFAULT_DATA))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    names = plant_names(args.data)
+    print(f"{len(names)} plants, concurrency {args.concurrency}, {args.requests} requests, {os.cpu_count()} CPUs")
+    results = []
+    for setting in args.sweep.split(","):
+        r = run_setting(setting.strip(), args, names)
+        results.append(r)
+        print(f"{r['setting']:<12} {r['requests_per_s']:8.1f} req/s  p50 {r['p50_ms']:7.1f} ms  "
+              f"p95 {r['p95_ms']:7.1f} ms  PSS {r['pss_mb']:8.1f} MB  ready after {r['ready_s']} s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
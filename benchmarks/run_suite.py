@@ -0,0 +1,321 @@
+"""
+Reproducible end-to-end benchmark suite; writes a JSON report that can be diffed between commits.
+
+Cases (select with --only):
+    ingest       ingest_data.load_and_store_articles() into the in-memory vector store
+    retrieve     rag_service.retrieve_relevant_chunks()
+    chat         POST /api/chat (app.py) with the fake Gemini model
+    similar / constraints / hybrid   the recommender_service endpoints
+    predict      POST /predict (models/fastapi_pred.py), needs my_model.py + output/best_model.pth
+
+Postgres, Gemini and the embedding model are replaced by the offline stand-ins in
+benchmarks/fakes.py (pass --real-embedder to load all-MiniLM-L6-v2 instead). Latencies
+are in-process (FastAPI TestClient), so they exclude the network but include routing,
+validation and serialisation.
+
+Usage:
+    python benchmarks/run_suite.py --out bench-before.json
+    python benchmarks/run_suite.py --out bench-after.json --compare bench-before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend_app")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+
+CASES = ("ingest", "retrieve", "chat", "similar", "constraints", "hybrid", "predict")
+
+QUESTIONS = [
+    "How often should I water a peace lily?",
+    "Is monstera toxic to cats?",
+    "What light does a snake plant need?",
+    "Why are the leaves of my fiddle leaf fig turning brown?",
+    "How do I increase humidity for a calathea?",
+    "Can I keep aloe vera in a bathroom?",
+    "When should I repot a pothos?",
+    "What is the ideal temperature for an orchid?",
+]
+
+
+def summarize(timings_s, extra=None):
+    ms = sorted(t * 1000 for t in timings_s)
+    pick = lambda q: ms[min(len(ms) - 1, int(q * len(ms)))]  # noqa: E731
+    total = sum(timings_s)
+    result = {
+        "n": len(ms),
+        "mean_ms": round(statistics.mean(ms), 3),
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+        "throughput_per_s": round(len(ms) / total, 2) if total else None,
+    }
+    result.update(extra or {})
+    return result
+
+
+def timed(fn, calls, warmup):
+    for args in calls[:warmup]:
+        fn(*args)
+    timings = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def git_revision():
+    try:
+        rev = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"], cwd=ROOT_DIR) != 0
+        return rev + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------------------------------------------------------------- RAG service
+
+def setup_rag(args, store):
+    fakes.install(store, connect_latency_ms=args.db_connect_ms)
+    if not args.real_embedder:
+        import sentence_transformers
+
+        # the backend modules build their model at import time
+        sentence_transformers.SentenceTransformer = lambda *a, **k: fakes.FakeEmbedder(latency_ms=args.embed_ms)
+    sys.path.insert(0, BACKEND_DIR)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as rag_app
+        import ingest_data
+        import rag_service
+    rag_app.gemini_model = fakes.FakeGeminiModel(args.gemini_ms, args.gemini_tokens, args.gemini_token_ms)
+    rag_app.llm.model = rag_app.gemini_model
+    return rag_app, ingest_data, rag_service
+
+
+def bench_ingest(args, store, ingest_data):
+    results = []
+    for _ in range(args.ingest_repeats):
+        store.clear()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ingest_data.load_and_store_articles(args.corpus)
+        results.append(time.perf_counter() - start)
+    chunks = len(store.rows)
+    return summarize(results, {"chunks": chunks, "chunks_per_s": round(chunks / statistics.mean(results), 1)})
+
+
+def bench_retrieve(args, rag_service, rng):
+    calls = [(rng.choice(QUESTIONS), args.k) for _ in range(args.iterations)]
+    return summarize(timed(rag_service.retrieve_relevant_chunks, calls, args.warmup))
+
+
+def bench_chat(args, rag_app, rng):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(rag_app.app)
+    history = [{"user": QUESTIONS[0], "assistant": "Water it when the top soil is dry."}]
+
+    def call(question):
+        response = client.post("/api/chat", json={"message": question, "k": args.k, "history": history})
+        response.raise_for_status()
+
+    calls = [(rng.choice(QUESTIONS),) for _ in range(args.chat_iterations)]
+    model = rag_app.gemini_model
+    timings = timed(call, calls, min(args.warmup, 2))
+    return summarize(timings, {
+        "gemini_ms": args.gemini_ms + args.gemini_tokens * args.gemini_token_ms,
+        "avg_prompt_chars": round(model.prompt_chars / max(model.calls, 1)),
+    })
+
+
+# ---------------------------------------------------------------- recommender
+
+def setup_recommender(args):
+    os.environ.setdefault("RECOMMENDER_RELOAD_INTERVAL", "0")
+    if args.corpus:
+        os.environ["PLANT_DATA_PATH"] = os.path.abspath(args.corpus)
+    sys.path.insert(0, os.path.join(ROOT_DIR, "Recommendation_module"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        import recommender_service
+    from fastapi.testclient import TestClient
+
+    return recommender_service, TestClient(recommender_service.app)
+
+
+def bench_recommender(case, args, service, client, rng):
+    names = service.RECOMMENDER.plant_names
+    levels = {"light": ["low", "medium", "high"], "water": ["low", "medium", "high"]}
+
+    def payload():
+        body = {"top_k": 10}
+        if case in ("similar", "hybrid"):
+            body["seed_plants"] = rng.sample(names, min(2, len(names)))
+        if case in ("constraints", "hybrid"):
+            body.update({key: rng.choice(values) for key, values in levels.items()})
+            body["pets_safe"] = rng.random() < 0.5
+        return body
+
+    def call(body):
+        response = client.post(f"/recommend/{case}", json=body)
+        response.raise_for_status()
+
+    calls = [(payload(),) for _ in range(args.iterations)]
+    return summarize(timed(call, calls, args.warmup), {"plants": len(names)})
+
+
+# ---------------------------------------------------------------- classifier
+
+def bench_predict(args, rng):
+    models_dir = os.path.abspath(args.predict_dir)
+    missing = [p for p in ("my_model.py", os.path.join("output", "best_model.pth"))
+               if not os.path.exists(os.path.join(models_dir, p))]
+    if missing:
+        return {"skipped": f"missing {', '.join(missing)} in {models_dir}"}
+    from fastapi.testclient import TestClient
+    from PIL import Image
+
+    cwd = os.getcwd()
+    os.chdir(models_dir)  # fastapi_pred loads output/best_model.pth relative to its folder
+    sys.path.insert(0, models_dir)
+    try:
+        import fastapi_pred
+    finally:
+        os.chdir(cwd)
+
+    def image_bytes():
+        pixels = bytes(rng.getrandbits(8) for _ in range(3 * 64 * 48))
+        buf = io.BytesIO()
+        Image.frombytes("RGB", (64, 48), pixels).resize((640, 480)).save(buf, "JPEG", quality=85)
+        return buf.getvalue()
+
+    with TestClient(fastapi_pred.app) as client:
+        def call(data):
+            response = client.post("/predict", files={"file": ("plant.jpg", data, "image/jpeg")})
+            response.raise_for_status()
+
+        # distinct images: every request misses the prediction cache
+        calls = [(image_bytes(),) for _ in range(args.predict_iterations)]
+        return summarize(timed(call, calls, args.warmup), {"backend": fastapi_pred.BACKEND})
+
+
+# ---------------------------------------------------------------- report
+
+def compare(report, baseline_path, threshold):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\ncompared with {baseline_path} ({baseline['meta'].get('git')})")
+    print(f"{'case':<12}{'p50 before':>12}{'p50 after':>12}{'delta':>9}{'p95 before':>12}{'p95 after':>12}{'delta':>9}")
+    regressions = []
+    for case, result in report["results"].items():
+        old = baseline["results"].get(case)
+        if not old or "p50_ms" not in old or "p50_ms" not in result:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms"):
+            delta = (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            deltas.append(delta)
+            if delta > threshold:
+                regressions.append(f"{case} {key} +{delta:.1f}%")
+        print(f"{case:<12}{old['p50_ms']:>12.2f}{result['p50_ms']:>12.2f}{deltas[0]:>+8.1f}%"
+              f"{old['p95_ms']:>12.2f}{result['p95_ms']:>12.2f}{deltas[1]:>+8.1f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument("--only", default=",".join(CASES), help="comma separated subset of: " + ", ".join(CASES))
+    parser.add_argument("--out", default="benchmark-report.json")
+    parser.add_argument("--compare", help="earlier report to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in %% (p50/p95)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", help="articles JSON for ingest and the recommender (see generate_corpus.py); "
+                                         "default backend_app/data/plant_articles.json")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--chat-iterations", type=int, default=20)
+    parser.add_argument("--predict-iterations", type=int, default=50)
+    parser.add_argument("--ingest-repeats", type=int, default=3)
+    parser.add_argument("--k", type=int, default=5, help="retrieved chunks per question")
+    parser.add_argument("--real-embedder", action="store_true", help="use all-MiniLM-L6-v2 instead of FakeEmbedder")
+    parser.add_argument("--embed-ms", type=float, default=0.0, help="fake embedder latency per batch")
+    parser.add_argument("--db-connect-ms", type=float, default=0.0, help="fake cost of psycopg2.connect()")
+    parser.add_argument("--gemini-ms", type=float, default=200.0, help="fake Gemini base latency")
+    parser.add_argument("--gemini-tokens", type=int, default=100)
+    parser.add_argument("--gemini-token-ms", type=float, default=1.0)
+    parser.add_argument("--predict-dir", default=os.path.join(BACKEND_DIR, "models"))
+    args = parser.parse_args()
+
+    selected = [c.strip() for c in args.only.split(",") if c.strip()]
+    unknown = set(selected) - set(CASES)
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+
+    rng = random.Random(args.seed)
+    results = {}
+    if {"ingest", "retrieve", "chat"} & set(selected):
+        store = fakes.VectorStore()
+        rag_app, ingest_data, rag_service = setup_rag(args, store)
+        # ingest always runs first: retrieve/chat query the corpus it loads
+        results["ingest"] = bench_ingest(args, store, ingest_data)
+        if "ingest" not in selected:
+            del results["ingest"]
+        if "retrieve" in selected:
+            results["retrieve"] = bench_retrieve(args, rag_service, rng)
+        if "chat" in selected:
+            results["chat"] = bench_chat(args, rag_app, rng)
+    recommender_cases = [c for c in ("similar", "constraints", "hybrid") if c in selected]
+    if recommender_cases:
+        service, client = setup_recommender(args)
+        for case in recommender_cases:
+            results[case] = bench_recommender(case, args, service, client, rng)
+    if "predict" in selected:
+        results["predict"] = bench_predict(args, rng)
+
+    report = {
+        "meta": {
+            "git": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for case, result in results.items():
+        if "skipped" in result:
+            print(f"{case:<12} skipped: {result['skipped']}")
+        else:
+            print(f"{case:<12} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                  f"{result['throughput_per_s']:>9} /s  (n={result['n']})")
+    print(f"report written to {args.out}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions:
+            print("regressions: " + "; ".join(regressions))
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()